@@ -0,0 +1,385 @@
+"""转换性能基准：生成合成数据集，逐个测量 format_options 中每种转换的速度与内存峰值
+
+用法：
+    python -m benchmarks.bench_conversions run [--files 500] [--objects 10] [--vertices 50] [--resolution 1920x1080]
+        [--image-data both] [--repeat 3] [-j 1] [--data 数据文件夹] [--output results.json]
+    python -m benchmarks.bench_conversions compare 基准.json 新结果.json [--threshold 0.1]
+
+每个用例在新的进程中运行，内存峰值互不影响。结果保存为 JSON；
+compare 逐个用例对比两次结果，速度下降或内存增长超过阈值时以非零状态退出，可用于 CI。
+"""
+import argparse
+import base64
+import json
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import traceback
+
+import numpy as np
+from PIL import Image
+
+try:
+    import resource
+except ImportError:  # Windows 上没有 resource 模块，不统计内存峰值
+    resource = None
+
+from labelconverter.engine import COCO_FORMAT, STORE_FORMAT, convert_files
+from labelconverter.options import ConvertOptions
+
+NUM_CLASSES = 20
+LABEL_MAPPING = {f"class{k}": str(k) for k in range(NUM_CLASSES)}
+# 数据集参数文件，--data 指向已有数据集且参数相同时不再重新生成
+DATASET_FILE = 'dataset.json'
+
+# (用例名, 转换格式, 源文件夹, 源格式, 是否需要图像文件夹, 是否受 imageData 影响)
+CASES = [
+    ("YOLO检测 (JSON)", "YOLO检测", 'json_rect', 'json', False, True),
+    ("YOLO检测 (XML)", "YOLO检测", 'xml', 'xml', False, False),
+    ("YOLO分割", "YOLO分割", 'json_poly', 'json', False, True),
+    ("JSON 转 XML", "JSON 转 XML", 'json_rect', 'json', False, True),
+    ("XML 转 JSON", "XML 转 JSON", 'xml', 'xml', True, True),
+    ("YOLO 转 XML", "YOLO 转 XML", 'yolo_det', 'yolo', True, False),
+    ("YOLO 转 JSON (检测)", "YOLO 转 JSON", 'yolo_det', 'yolo', True, True),
+    ("YOLO 转 JSON (分割)", "YOLO 转 JSON", 'yolo_seg', 'yolo', True, True),
+    ("导出数据集存储", STORE_FORMAT, 'json_poly', 'json', False, True),
+    ("转为 COCO", COCO_FORMAT, 'json_rect', 'json', False, True),
+]
+
+
+def make_image(width, height, rng):
+    """平滑渐变加少量噪声的 JPEG，压缩后大小与普通照片相近"""
+    y, x = np.mgrid[0:height, 0:width]
+    base = np.stack([x * 255 // max(width, 1), y * 255 // max(height, 1), (x + y) * 255 // max(width + height, 1)], -1)
+    noise = np.random.default_rng(rng.randrange(2 ** 32)).integers(0, 24, size=base.shape)
+    return Image.fromarray(np.clip(base + noise, 0, 255).astype(np.uint8))
+
+
+def random_box(width, height, rng):
+    xmin, ymin = rng.uniform(0, width * 0.8), rng.uniform(0, height * 0.8)
+    return xmin, ymin, rng.uniform(xmin + 1, width), rng.uniform(ymin + 1, height)
+
+
+def random_polygon(width, height, vertices, rng):
+    """围绕随机中心的星形多边形，顶点按角度排列"""
+    cx, cy = rng.uniform(0.2, 0.8) * width, rng.uniform(0.2, 0.8) * height
+    radius = min(width, height) * rng.uniform(0.05, 0.2)
+    points = []
+    for k in range(vertices):
+        angle = 2 * np.pi * k / vertices
+        r = radius * rng.uniform(0.5, 1.0)
+        points.append([cx + r * np.cos(angle), cy + r * np.sin(angle)])
+    return points
+
+
+def labelme_json(shapes, image_name, width, height, image_data):
+    return {"version": "5.0.2.1", "flags": {},
+            "shapes": [{"label": label, "points": points, "group_id": None, "shape_type": shape_type, "flags": {}}
+                       for label, shape_type, points in shapes],
+            "imagePath": image_name, "imageData": image_data, "imageHeight": height, "imageWidth": width}
+
+
+def voc_xml(boxes, image_name, width, height):
+    objects = "".join(
+        f"<object><name>{label}</name><pose>Unspecified</pose><truncated>0</truncated><difficult>0</difficult>"
+        f"<bndbox><xmin>{int(xmin)}</xmin><ymin>{int(ymin)}</ymin><xmax>{int(xmax)}</xmax><ymax>{int(ymax)}</ymax>"
+        f"</bndbox></object>" for label, xmin, ymin, xmax, ymax in boxes)
+    return (f"<annotation><folder>images</folder><filename>{image_name}</filename>"
+            f"<size><width>{width}</width><height>{height}</height><depth>3</depth></size>"
+            f"<segmented>0</segmented>{objects}</annotation>")
+
+
+def generate(folder, files, objects, vertices, resolution, image_data, seed=0):
+    """在 folder 中生成合成数据集
+
+    images/ 为图像；json_rect/、json_poly/ 为 LabelMe 矩形与多边形标注，image_data 为 True 时
+    另外生成嵌入 Base64 imageData 的 json_rect_embed/、json_poly_embed/；xml/ 为 VOC 标注；
+    yolo_det/ 为 YOLO 检测标注（像素坐标的中心点与宽高），yolo_seg/ 为 YOLO 分割标注（归一化坐标）。
+    """
+    rng = random.Random(seed)
+    width, height = resolution
+    subfolders = ['images', 'json_rect', 'json_poly', 'xml', 'yolo_det', 'yolo_seg']
+    if image_data:
+        subfolders += ['json_rect_embed', 'json_poly_embed']
+    for name in subfolders:
+        os.makedirs(os.path.join(folder, name), exist_ok=True)
+    image_file = os.path.join(folder, 'images', 'img0.jpg')
+    make_image(width, height, rng).save(image_file, quality=90)
+    with open(image_file, 'rb') as f:
+        encoded = base64.b64encode(f.read()).decode('ascii') if image_data else None
+
+    for i in range(files):
+        name = f"img{i}"
+        image_name = name + '.jpg'
+        if i:
+            shutil.copyfile(image_file, os.path.join(folder, 'images', image_name))
+        boxes = [(f"class{rng.randrange(NUM_CLASSES)}",) + random_box(width, height, rng) for _ in range(objects)]
+        polygons = [(f"class{rng.randrange(NUM_CLASSES)}", random_polygon(width, height, vertices, rng))
+                    for _ in range(objects)]
+        rect_shapes = [(label, 'rectangle', [[xmin, ymin], [xmax, ymax]]) for label, xmin, ymin, xmax, ymax in boxes]
+        poly_shapes = [(label, 'polygon', points) for label, points in polygons]
+        variants = [('', None)] + ([('_embed', encoded)] if image_data else [])
+        for suffix, data in variants:
+            for kind, shapes in (('json_rect', rect_shapes), ('json_poly', poly_shapes)):
+                with open(os.path.join(folder, kind + suffix, name + '.json'), 'w') as f:
+                    json.dump(labelme_json(shapes, image_name, width, height, data), f, indent=2)
+        with open(os.path.join(folder, 'xml', name + '.xml'), 'w') as f:
+            f.write(voc_xml(boxes, image_name, width, height))
+        with open(os.path.join(folder, 'yolo_det', name + '.txt'), 'w') as f:
+            for label, xmin, ymin, xmax, ymax in boxes:
+                f.write(f"{LABEL_MAPPING[label]} {(xmin + xmax) / 2} {(ymin + ymax) / 2} {xmax - xmin} {ymax - ymin}\n")
+        with open(os.path.join(folder, 'yolo_seg', name + '.txt'), 'w') as f:
+            for label, points in polygons:
+                coords = " ".join(f"{x / width} {y / height}" for x, y in points)
+                f.write(f"{LABEL_MAPPING[label]} {coords}\n")
+
+
+def folder_size(path):
+    """文件夹（或单个文件）中全部文件的总字节数"""
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for root, _, names in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in names)
+    return total
+
+
+def peak_rss_mb(who=None):
+    """当前进程（或已结束的子进程中最大）的内存峰值，单位 MB；不支持时为 None
+
+    Linux 上当前进程读取 /proc/self/status 中的 VmHWM：ru_maxrss 会保留 exec 之前父进程的峰值，
+    新启动的进程也至少与启动它的基准进程一样大。
+    """
+    if who is None:
+        try:
+            with open('/proc/self/status') as f:
+                for line in f:
+                    if line.startswith('VmHWM:'):
+                        return int(line.split()[1]) / 1024
+        except OSError:
+            pass
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF if who is None else who)
+    # Linux 上 ru_maxrss 的单位为 KB，macOS 上为字节
+    return usage.ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def run_case(case):
+    """在单独的进程中执行一次转换，返回耗时、转换文件数、输出大小与内存峰值"""
+    idle_rss = peak_rss_mb()
+    output = tempfile.mkdtemp(dir=case['scratch'])
+    try:
+        start = time.perf_counter()
+        options = ConvertOptions(label_mapping=LABEL_MAPPING, source_format=case['source_format'],
+                                 workers=case['workers'], image_data_mode=case['image_data_mode'])
+        count = convert_files(case['source'], case['format_choice'], case['images'], output, options)
+        seconds = time.perf_counter() - start
+        output_bytes = folder_size(output)
+    finally:
+        shutil.rmtree(output, ignore_errors=True)
+    workers_rss = peak_rss_mb(resource.RUSAGE_CHILDREN) if resource is not None and case['workers'] != 1 else None
+    return {'seconds': seconds, 'count': count, 'output_bytes': output_bytes,
+            'idle_rss_mb': idle_rss, 'peak_rss_mb': peak_rss_mb(), 'workers_peak_rss_mb': workers_rss}
+
+
+def run_case_process(case, queue):
+    try:
+        queue.put(('ok', run_case(case)))
+    except Exception:
+        queue.put(('error', traceback.format_exc()))
+
+
+def build_cases(data, image_data, workers, scratch):
+    """按 --image-data 展开用例：with 为读取含 imageData 的 JSON、输出 JSON 时嵌入图像，without 相反"""
+    variants = {'without': [False], 'with': [True], 'both': [False, True]}[image_data]
+    cases = []
+    for embed in variants:
+        for name, format_choice, source, source_format, needs_images, affected in CASES:
+            if embed and not affected:
+                continue
+            if embed and source.startswith('json'):
+                source += '_embed'
+            cases.append({
+                'name': name + (" +imageData" if embed else ""),
+                'format_choice': format_choice,
+                'source': os.path.join(data, source),
+                'source_format': source_format,
+                'images': os.path.join(data, 'images') if needs_images or embed else '',
+                'image_data_mode': 'embed' if embed else 'omit',
+                'workers': workers,
+                'scratch': scratch,
+            })
+    return cases
+
+
+def measure(case, repeat):
+    """每次重复都使用新的进程，耗时取最小值，内存峰值取最大值"""
+    context = multiprocessing.get_context('spawn')
+    runs = []
+    for _ in range(repeat):
+        # 不使用进程池：池中的进程为守护进程，不能再启动 -j 的工作进程
+        queue = context.Queue()
+        process = context.Process(target=run_case_process, args=(case, queue))
+        process.start()
+        status, result = queue.get()
+        process.join()
+        if status == 'error':
+            raise RuntimeError(f"用例 {case['name']} 运行失败：\n{result}")
+        runs.append(result)
+    best = min(runs, key=lambda run: run['seconds'])
+    input_bytes = folder_size(case['source'])
+    files = best['count']
+    seconds = best['seconds']
+    rss = [run['peak_rss_mb'] for run in runs if run['peak_rss_mb'] is not None]
+    workers_rss = [run['workers_peak_rss_mb'] for run in runs if run['workers_peak_rss_mb'] is not None]
+    return {
+        'format_choice': case['format_choice'],
+        'files': files,
+        'seconds': seconds,
+        'files_per_sec': files / seconds if seconds > 0 else None,
+        'input_mb': input_bytes / 1e6,
+        'output_mb': best['output_bytes'] / 1e6,
+        'mb_per_sec': input_bytes / 1e6 / seconds if seconds > 0 else None,
+        'peak_rss_mb': max(rss) if rss else None,
+        'idle_rss_mb': best['idle_rss_mb'],
+        'workers_peak_rss_mb': max(workers_rss) if workers_rss else None,
+        'runs': [run['seconds'] for run in runs],
+    }
+
+
+def prepare_data(args, params):
+    """使用 --data 指定的数据集（参数相同时直接复用）或在临时文件夹中生成"""
+    folder = args.data or tempfile.mkdtemp(prefix='labelconverter_bench_')
+    params_file = os.path.join(folder, DATASET_FILE)
+    if os.path.isfile(params_file):
+        with open(params_file) as f:
+            if json.load(f) == params:
+                return folder
+        shutil.rmtree(folder)
+    print(f"生成数据集：{folder}", file=sys.stderr)
+    start = time.perf_counter()
+    generate(folder, params['files'], params['objects'], params['vertices'], params['resolution'],
+             params['image_data'] != 'without', params['seed'])
+    with open(params_file, 'w') as f:
+        json.dump(params, f)
+    print(f"生成用时 {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    return folder
+
+
+def format_number(value, spec):
+    return '-' if value is None else format(value, spec)
+
+
+def print_results(results):
+    print(f"{'用例':<24}{'文件/秒':>10}{'MB/秒':>10}{'峰值内存MB':>12}{'耗时s':>9}")
+    for name, result in results.items():
+        print(f"{name:<24}{format_number(result['files_per_sec'], '10.1f')}"
+              f"{format_number(result['mb_per_sec'], '10.2f')}"
+              f"{format_number(result['peak_rss_mb'], '12.1f')}{result['seconds']:9.3f}")
+
+
+def run(args):
+    width, height = (int(v) for v in args.resolution.lower().split('x'))
+    params = {'files': args.files, 'objects': args.objects, 'vertices': args.vertices,
+              'resolution': [width, height], 'image_data': args.image_data, 'seed': args.seed}
+    data = prepare_data(args, params)
+    results = {}
+    try:
+        with tempfile.TemporaryDirectory() as scratch:
+            for case in build_cases(data, args.image_data, args.workers, scratch):
+                if args.only and not any(pattern in case['name'] for pattern in args.only):
+                    continue
+                print(f"运行 {case['name']} ……", file=sys.stderr)
+                results[case['name']] = measure(case, args.repeat)
+    finally:
+        if not args.data:
+            shutil.rmtree(data, ignore_errors=True)
+    report = {
+        'dataset': params,
+        'settings': {'repeat': args.repeat, 'workers': args.workers},
+        'environment': {'python': platform.python_version(), 'platform': platform.platform(),
+                        'cpu_count': os.cpu_count(), 'time': time.strftime('%Y-%m-%dT%H:%M:%S')},
+        'results': results,
+    }
+    print_results(results)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存到 {args.output}", file=sys.stderr)
+    return 0
+
+
+def compare_results(base, new, threshold):
+    """返回 [(用例名, 速度变化, 内存变化, 是否退化), ...]，变化为相对比例，正数表示更快或更省内存"""
+    rows = []
+    for name, old in base['results'].items():
+        result = new['results'].get(name)
+        if result is None:
+            continue
+        speed = None
+        if old['files_per_sec'] and result['files_per_sec']:
+            speed = result['files_per_sec'] / old['files_per_sec'] - 1
+        memory = None
+        if old['peak_rss_mb'] and result['peak_rss_mb']:
+            memory = 1 - result['peak_rss_mb'] / old['peak_rss_mb']
+        regressed = (speed is not None and speed < -threshold) or (memory is not None and memory < -threshold)
+        rows.append((name, speed, memory, regressed))
+    return rows
+
+
+def compare(args):
+    with open(args.base, encoding='utf-8') as f:
+        base = json.load(f)
+    with open(args.new, encoding='utf-8') as f:
+        new = json.load(f)
+    if base['dataset'] != new['dataset'] or base['settings'] != new['settings']:
+        print("警告：两次运行的数据集参数或设置不同，结果不可直接比较", file=sys.stderr)
+    missing = sorted(set(base['results']) ^ set(new['results']))
+    if missing:
+        print(f"只在其中一次运行中出现的用例：{', '.join(missing)}", file=sys.stderr)
+    rows = compare_results(base, new, args.threshold)
+    print(f"{'用例':<24}{'速度变化':>10}{'内存变化':>10}")
+    for name, speed, memory, regressed in rows:
+        mark = "  退化" if regressed else ""
+        print(f"{name:<24}{format_number(speed and speed * 100, '+9.1f')}%"
+              f"{format_number(memory and memory * 100, '+9.1f')}%{mark}")
+    regressions = [row[0] for row in rows if row[3]]
+    if regressions:
+        print(f"{len(regressions)} 个用例退化超过 {args.threshold:.0%}：{', '.join(regressions)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    run_parser = subparsers.add_parser('run', help="生成数据集并运行全部用例")
+    run_parser.add_argument('--files', type=int, default=500, help="每种标注的文件数")
+    run_parser.add_argument('--objects', type=int, default=10, help="每张图像的目标数")
+    run_parser.add_argument('--vertices', type=int, default=50, help="每个多边形的顶点数")
+    run_parser.add_argument('--resolution', default='1920x1080', help="图像分辨率，宽x高")
+    run_parser.add_argument('--image-data', choices=['without', 'with', 'both'], default='both',
+                            help="是否测量含 imageData 的 JSON（读取与写出）")
+    run_parser.add_argument('--seed', type=int, default=0)
+    run_parser.add_argument('--repeat', type=int, default=3, help="每个用例的重复次数，耗时取最小值")
+    run_parser.add_argument('-j', '--workers', type=int, default=1, help="转换使用的进程数")
+    run_parser.add_argument('--only', action='append', metavar='NAME', help="只运行名称包含 NAME 的用例，可重复指定")
+    run_parser.add_argument('--data', default=None, help="数据集文件夹，参数相同时复用，默认每次在临时文件夹中生成")
+    run_parser.add_argument('--output', default=None, help="结果 JSON 文件")
+    compare_parser = subparsers.add_parser('compare', help="对比两次运行的结果")
+    compare_parser.add_argument('base', help="基准结果 JSON")
+    compare_parser.add_argument('new', help="新结果 JSON")
+    compare_parser.add_argument('--threshold', type=float, default=0.1,
+                                help="允许的速度下降或内存增长比例，默认 0.1")
+    args = parser.parse_args(argv)
+    return run(args) if args.command == 'run' else compare(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
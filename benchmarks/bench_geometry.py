@@ -0,0 +1,158 @@
+"""坐标变换性能对比：原先逐点计算、逐顶点写入的循环 与 labelconverter.geometry 的批量计算
+
+用法：python -m benchmarks.bench_geometry [--files 50] [--polygons 4] [--vertices 2000,5000] [--boxes 50] [--precision 6]
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from PIL import Image
+
+from labelconverter.dataset import Annotation, Shape
+from labelconverter.engine import write_json, write_txt
+
+WIDTH, HEIGHT = 4000, 3000
+
+
+def write_seg_loop(annotation, out_file, precision=None):
+    """原先 convert_json_to_txt 中 YOLO分割 的写法（precision 不为 None 时按固定小数位数输出）"""
+    spec = '' if precision is None else f'.{precision}f'
+    for shape in annotation.shapes:
+        out_file.write(f"{shape.label} ")
+        for point in shape.points:
+            x_normalized = point[0] / annotation.image_width
+            y_normalized = point[1] / annotation.image_height
+            out_file.write(f"{x_normalized:{spec}} {y_normalized:{spec}} ")
+        out_file.write("\n")
+
+
+def write_det_loop(annotation, out_file):
+    """原先 convert_json_to_txt / convert_xml_to_yolo 中 YOLO检测 的写法"""
+    for shape in annotation.shapes:
+        xmin, ymin = shape.points[0]
+        xmax, ymax = shape.points[1]
+        center_x = (xmin + xmax) / 2
+        center_y = (ymin + ymax) / 2
+        width = xmax - xmin
+        height = ymax - ymin
+        out_file.write(f"{shape.label} {center_x} {center_y} {width} {height}\n")
+
+
+def write_yolo_json_loop(annotation, folder, image_file):
+    """原先 convert_yolo_to_json 的写法：逐点还原顶点后整体交给 json.dumps(indent=4)（不嵌入图像）"""
+    shapes = [{"label": shape.label,
+               "points": [[x * WIDTH, y * HEIGHT] for x, y in shape.points],
+               "group_id": None, "shape_type": shape.shape_type, "flags": {}} for shape in annotation.shapes]
+    json_data = {"version": "5.0.2.1", "flags": {}, "shapes": shapes, "imagePath": os.path.basename(image_file),
+                 "imageData": None, "imageHeight": HEIGHT, "imageWidth": WIDTH}
+    with open(os.path.join(folder, annotation.name[:-4] + '.loop.json'), 'w') as f:
+        f.write(json.dumps(json_data, indent=4))
+
+
+def make_polygons(num_files, num_polygons, vertices, rng, normalized=False):
+    """LabelMe 多边形（像素坐标），normalized 为 True 时生成 YOLO 分割标注（归一化坐标）"""
+    scale_x, scale_y = (1, 1) if normalized else (WIDTH, HEIGHT)
+    files = []
+    for i in range(num_files):
+        shapes = [Shape(str(rng.randrange(80)), 'polygon',
+                        [[rng.uniform(0, scale_x), rng.uniform(0, scale_y)] for _ in range(rng.randint(*vertices))])
+                  for _ in range(num_polygons)]
+        if normalized:
+            files.append(Annotation(f"poly{i}.txt", 'yolo', shapes))
+        else:
+            files.append(Annotation(f"poly{i}.json", 'json', shapes, WIDTH, HEIGHT))
+    return files
+
+
+def make_boxes(num_files, num_boxes, rng):
+    files = []
+    for i in range(num_files):
+        shapes = []
+        for _ in range(num_boxes):
+            xmin, ymin = rng.uniform(0, WIDTH / 2), rng.uniform(0, HEIGHT / 2)
+            shapes.append(Shape(str(rng.randrange(80)), 'rectangle',
+                                [[xmin, ymin], [xmin + rng.uniform(1, WIDTH / 2), ymin + rng.uniform(1, HEIGHT / 2)]]))
+        files.append(Annotation(f"box{i}.json", 'json', shapes, WIDTH, HEIGHT))
+    return files
+
+
+def timed(func, files):
+    start = time.perf_counter()
+    for annotation in files:
+        func(annotation)
+    return time.perf_counter() - start
+
+
+def loop_writer(loop, folder, *args):
+    def run(annotation):
+        with open(f"{folder}/{annotation.name[:-5]}.loop.txt", 'w') as out_file:
+            loop(annotation, out_file, *args)
+    return run
+
+
+def read_outputs(folder, name, suffix):
+    base = os.path.join(folder, os.path.splitext(name)[0])
+    with open(base + ".loop" + suffix) as old, open(base + suffix) as new:
+        return old.read(), new.read()
+
+
+def compare(old, new, folder, files, suffix):
+    """输出一致性检查"""
+    for annotation in files:
+        old(annotation)
+        new(annotation)
+        old_text, new_text = read_outputs(folder, annotation.name, suffix)
+        assert old_text == new_text, annotation.name
+
+
+def report(title, old, new, count, unit):
+    print(title)
+    print(f"  逐点循环: {old:.3f}s  ({count / old:.0f} {unit}/秒)")
+    print(f"  批量计算: {new:.3f}s  ({count / new:.0f} {unit}/秒)  加速比 {old / new:.1f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--files', type=int, default=50)
+    parser.add_argument('--polygons', type=int, default=4, help="每个文件的多边形数")
+    parser.add_argument('--vertices', default='2000,5000', help="每个多边形的顶点数范围")
+    parser.add_argument('--boxes', type=int, default=50, help="检测基准中每个文件的矩形框数")
+    parser.add_argument('--precision', type=int, default=6, help="固定小数位数对比中使用的位数")
+    args = parser.parse_args(argv)
+    vertices = tuple(int(v) for v in args.vertices.split(','))
+    rng = random.Random(0)
+    polygons = make_polygons(args.files, args.polygons, vertices, rng)
+    yolo_polygons = make_polygons(args.files, args.polygons, vertices, rng, normalized=True)
+    boxes = make_boxes(args.files * 20, args.boxes, rng)
+    num_vertices = sum(len(shape.points) for annotation in polygons for shape in annotation.shapes)
+    num_yolo_vertices = sum(len(shape.points) for annotation in yolo_polygons for shape in annotation.shapes)
+
+    with tempfile.TemporaryDirectory() as folder:
+        image_file = os.path.join(folder, 'image.png')
+        Image.new('RGB', (WIDTH, HEIGHT)).save(image_file)
+        cases = [
+            (f"YOLO分割 写入：{args.files} 个文件，共 {num_vertices} 个顶点",
+             loop_writer(write_seg_loop, folder), lambda a: write_txt(a, "YOLO分割", folder),
+             polygons, '.txt', num_vertices, "顶点"),
+            (f"YOLO分割 写入（保留 {args.precision} 位小数）：共 {num_vertices} 个顶点",
+             loop_writer(write_seg_loop, folder, args.precision),
+             lambda a: write_txt(a, "YOLO分割", folder, precision=args.precision),
+             polygons, '.txt', num_vertices, "顶点"),
+            (f"YOLO 分割转 JSON：{args.files} 个文件，共 {num_yolo_vertices} 个顶点",
+             lambda a: write_yolo_json_loop(a, folder, image_file),
+             lambda a: write_json(a, folder, image_file, image_data_mode='omit'),
+             yolo_polygons, '.json', num_yolo_vertices, "顶点"),
+            (f"YOLO检测 写入：{len(boxes)} 个文件 × {args.boxes} 个框",
+             loop_writer(write_det_loop, folder), lambda a: write_txt(a, "YOLO检测", folder),
+             boxes, '.txt', len(boxes), "文件"),
+        ]
+        for title, old, new, files, suffix, count, unit in cases:
+            compare(old, new, folder, files[:5], suffix)
+            report(title, timed(old, files), timed(new, files), count, unit)
+
+
+if __name__ == '__main__':
+    main()
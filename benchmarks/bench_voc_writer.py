@@ -0,0 +1,70 @@
+"""VOC XML 写入性能对比：ElementTree -> 字符串 -> minidom 格式化 与 labelconverter.voc 单次生成
+
+用法：python -m benchmarks.bench_voc_writer [--files 2000] [--objects 20]
+"""
+import argparse
+import random
+import time
+import xml.etree.ElementTree as ET
+from xml.dom import minidom
+
+from labelconverter.voc import format_voc
+
+
+def format_voc_minidom(objects):
+    """原先 convert_json_to_xml / convert_yolo_to_xml 中的写法"""
+    root = ET.Element("annotation")
+    for label, xmin, ymin, xmax, ymax in objects:
+        obj = ET.SubElement(root, "object")
+        name = ET.SubElement(obj, "name")
+        name.text = label
+        bndbox = ET.SubElement(obj, "bndbox")
+        ET.SubElement(bndbox, "xmin").text = str(int(xmin))
+        ET.SubElement(bndbox, "ymin").text = str(int(ymin))
+        ET.SubElement(bndbox, "xmax").text = str(int(xmax))
+        ET.SubElement(bndbox, "ymax").text = str(int(ymax))
+    xml_str = ET.tostring(root, encoding='unicode')
+    return minidom.parseString(xml_str).toprettyxml(indent="   ")
+
+
+def make_files(num_files, num_objects, seed=0):
+    rng = random.Random(seed)
+    files = []
+    for _ in range(num_files):
+        objects = []
+        for _ in range(num_objects):
+            xmin, ymin = rng.uniform(0, 1000), rng.uniform(0, 1000)
+            objects.append((rng.choice(["car", "person", "dog", "A&B"]), xmin, ymin,
+                            xmin + rng.uniform(1, 500), ymin + rng.uniform(1, 500)))
+        files.append(objects)
+    return files
+
+
+def timed(func, files):
+    start = time.perf_counter()
+    for objects in files:
+        func(objects)
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--files', type=int, default=2000)
+    parser.add_argument('--objects', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    files = make_files(args.files, args.objects)
+    # 输出一致性检查
+    for objects in files[:50]:
+        assert format_voc(objects) == format_voc_minidom(objects)
+
+    old = timed(format_voc_minidom, files)
+    new = timed(format_voc, files)
+    print(f"{args.files} 个文件 × {args.objects} 个目标")
+    print(f"ElementTree + minidom: {old:.3f}s  ({args.files / old:.0f} 文件/秒)")
+    print(f"labelconverter.voc:    {new:.3f}s  ({args.files / new:.0f} 文件/秒)")
+    print(f"加速比: {old / new:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
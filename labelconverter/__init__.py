@@ -0,0 +1,20 @@
+"""数据标签转换引擎：JSON、XML 与 YOLO 标注格式之间的相互转换（不依赖 PyQt5）"""
+from .dataset import Annotation, DatasetIndex, Shape
+from .diagnostics import Diagnostics
+from .engine import FORMAT_OPTIONS, YOLO_FORMATS, convert_files, is_numeric_label
+from .errors import ConversionCancelled, ConversionError, NonNumericLabelError
+from .options import ConvertOptions, IncrementalOptions, OutputArchiveOptions, PipelineOptions, ShardOptions
+
+__all__ = [
+    "FORMAT_OPTIONS", "YOLO_FORMATS", "ConversionCancelled", "ConversionError", "NonNumericLabelError",
+    "Annotation", "ConvertOptions", "DatasetIndex", "DatasetStore", "Diagnostics", "IncrementalOptions",
+    "OutputArchiveOptions", "PipelineOptions", "ShardOptions", "Shape", "convert_files", "is_numeric_label",
+]
+
+
+def __getattr__(name):
+    # DatasetStore 依赖 NumPy，用到时才导入，import labelconverter 不加载 NumPy
+    if name == 'DatasetStore':
+        from .store import DatasetStore
+        return DatasetStore
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,351 @@
+"""zip/tar 压缩包：作为标注或图像的来源，以及按大小切分的输出分片，成员直接在内存中读写，不解压到磁盘
+
+压缩包中的成员用虚拟路径 "压缩包路径/成员名" 表示，文件名、子文件夹结构与图像匹配都与普通文件夹相同。
+读取标注时按成员在压缩包中的顺序依次读出（tar 以流方式读取，压缩的 tar 只解压一遍）；
+图像按需随机读取，作为图像来源时建议使用 zip 或不压缩的 tar。
+"""
+import io
+import os
+import shutil
+import tarfile
+import tempfile
+import time
+import zipfile
+
+from .discovery import matches
+from .errors import ConversionError
+
+# 可作为来源的压缩包后缀
+ARCHIVE_SUFFIXES = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+# 输出分片的格式
+SHARD_FORMATS = ['zip', 'tar']
+# 默认每个输出分片中成员的总大小上限（字节）
+DEFAULT_SHARD_SIZE = 512 * 1024 * 1024
+# 输出分片的文件名，序号从 0 开始
+SHARD_NAME = 'shard-{:05d}.{}'
+_TAR_BLOCK = 512
+# 收集的单个输出超过该长度（字符）时转存到临时文件，嵌入图像的 JSON 等大输出不整个留在内存中
+CAPTURE_SPILL_SIZE = 4 * 1024 * 1024
+
+# 当前进程中正在收集的输出 [(路径, 文本), ...]，未收集时为 None
+_captured = None
+# 每个进程各自打开的压缩包（文件句柄不能跨 fork 共享读取位置）
+_open_readers = {}
+
+
+def is_archive(path):
+    """path 是否为支持的压缩包文件（按后缀判断）"""
+    return bool(path) and path.lower().endswith(ARCHIVE_SUFFIXES) and os.path.isfile(path)
+
+
+def _normalize(name):
+    """成员名统一为不以 ./ 或 / 开头、以 / 分隔的相对路径"""
+    name = name.replace('\\', '/')
+    while name.startswith('./'):
+        name = name[2:]
+    return name.lstrip('/')
+
+
+def _selected(name, suffixes, recursive, include, exclude):
+    """按与 discovery.walk_files 相同的规则判断成员是否产出"""
+    parent, _, base = name.rpartition('/')
+    if parent and not recursive:
+        return False
+    if suffixes is not None and not base.endswith(suffixes):
+        return False
+    if include and not matches(name, include):
+        return False
+    if exclude:
+        if matches(name, exclude):
+            return False
+        prefix = ''
+        for part in parent.split('/') if parent else ():
+            prefix += part
+            if matches(prefix, exclude) or matches(prefix + '/', exclude):
+                return False
+            prefix += '/'
+    return True
+
+
+def iter_members(archive_path, suffixes=None, recursive=False, include=(), exclude=()):
+    """按压缩包中的顺序依次产出 (成员名, 内容字节)，过滤规则与 discovery.walk_files 相同
+
+    成员名以 / 分隔；recursive 为 False 时只产出不在子文件夹中的成员。
+    """
+    suffixes = tuple(suffixes) if suffixes is not None else None
+    include, exclude = tuple(include or ()), tuple(exclude or ())
+    if archive_path.lower().endswith('.zip'):
+        with zipfile.ZipFile(archive_path) as zf:
+            for info in zf.infolist():
+                name = _normalize(info.filename)
+                if not info.is_dir() and _selected(name, suffixes, recursive, include, exclude):
+                    yield name, zf.read(info)
+    else:
+        # 以流方式读取，压缩的 tar 不需要先建立成员表
+        with tarfile.open(archive_path, 'r|*') as tf:
+            for member in tf:
+                name = _normalize(member.name)
+                if member.isfile() and _selected(name, suffixes, recursive, include, exclude):
+                    yield name, tf.extractfile(member).read()
+
+
+class ArchiveReader:
+    """按成员名随机读取压缩包中的文件"""
+
+    def __init__(self, archive_path):
+        self.archive_path = archive_path
+        if archive_path.lower().endswith('.zip'):
+            self.zip = zipfile.ZipFile(archive_path)
+            self.tar = None
+            self.members = {_normalize(info.filename): info for info in self.zip.infolist() if not info.is_dir()}
+        else:
+            self.zip = None
+            self.tar = tarfile.open(archive_path, 'r:*')
+            self.members = {_normalize(member.name): member for member in self.tar.getmembers() if member.isfile()}
+
+    def names(self):
+        return list(self.members)
+
+    def open(self, name):
+        """以二进制方式打开成员，返回可 seek 的只读文件对象"""
+        member = self.members.get(name)
+        if member is None:
+            raise FileNotFoundError(f"{self.archive_path} 中没有 {name}")
+        if self.zip is not None:
+            return self.zip.open(member)
+        return self.tar.extractfile(member)
+
+    def close(self):
+        (self.zip or self.tar).close()
+
+
+def open_reader(archive_path):
+    """返回当前进程中该压缩包的共享 ArchiveReader"""
+    key = (os.path.abspath(archive_path), os.getpid())
+    reader = _open_readers.get(key)
+    if reader is None:
+        reader = _open_readers[key] = ArchiveReader(archive_path)
+    return reader
+
+
+def split_member(path):
+    """虚拟路径 "压缩包路径/成员名" -> (压缩包路径, 成员名)，不在压缩包中时返回 None"""
+    parent, name = os.path.split(path)
+    parts = [name]
+    while parent and parent != os.path.dirname(parent):
+        if is_archive(parent):
+            return parent, '/'.join(reversed(parts))
+        if os.path.isdir(parent):
+            return None
+        parent, name = os.path.split(parent)
+        parts.append(name)
+    return None
+
+
+def open_binary(path):
+    """以二进制方式打开普通文件，或虚拟路径对应的压缩包成员"""
+    try:
+        return open(path, 'rb')
+    except (FileNotFoundError, NotADirectoryError):
+        member = split_member(path)
+        if member is None:
+            raise
+        return open_reader(member[0]).open(member[1])
+
+
+class SpilledOutput:
+    """收集时转存到临时文件的输出；写入输出文件或分片后由 write_to / ShardWriter.add_output 删除临时文件"""
+    __slots__ = ('path',)
+
+    def __init__(self, path):
+        self.path = path
+
+    @property
+    def size(self):
+        return os.path.getsize(self.path)
+
+    def write_to(self, output_file):
+        """流式复制到输出文件（新建的输出文件权限与直接写出时相同），然后删除临时文件"""
+        try:
+            with open(self.path, 'rb') as src, open(output_file, 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+        finally:
+            self.discard()
+
+    def discard(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+def discard_outputs(outputs):
+    """删除未写出的收集结果中的临时文件"""
+    for _, text in outputs:
+        if isinstance(text, SpilledOutput):
+            text.discard()
+
+
+def pending_size(outputs):
+    """收集结果中仍在内存里的文本长度"""
+    return sum(len(text) for _, text in outputs if isinstance(text, str))
+
+
+class _CapturedFile(io.StringIO):
+    """写入内存的输出文件，关闭时连同路径加入 sink；超过 CAPTURE_SPILL_SIZE 后改为写入临时文件"""
+
+    def __init__(self, path, sink):
+        super().__init__()
+        self.path = path
+        self.sink = sink
+        self.spill = None
+
+    def write(self, text):
+        if self.spill is not None:
+            return self.spill.write(text)
+        count = super().write(text)
+        if self.tell() > CAPTURE_SPILL_SIZE:
+            self.spill = tempfile.NamedTemporaryFile('w', encoding='utf-8', suffix='.part', delete=False)
+            self.spill.write(self.getvalue())
+            self.seek(0)
+            self.truncate()
+        return count
+
+    def close(self):
+        if not self.closed:
+            if self.spill is not None:
+                self.spill.close()
+                self.sink.append((self.path, SpilledOutput(self.spill.name)))
+            else:
+                self.sink.append((self.path, self.getvalue()))
+        super().close()
+
+
+def open_output(path):
+    """打开输出文件用于写入文本；在 Captured 包装的任务中写入内存，由主进程写入输出分片"""
+    if _captured is None:
+        return open(path, 'w')
+    return _CapturedFile(path, _captured)
+
+
+class Captured:
+    """包装 run_tasks 的任务函数：返回 (原结果, [(输出路径, 文本), ...])
+
+    任务中经 open_output 写出的文件不落盘，随结果一起传回主进程；超过 CAPTURE_SPILL_SIZE 的输出
+    以 SpilledOutput（系统临时文件夹中的文件）代替文本，每个输出占用的内存因此有上限。
+    须包装模块级函数以便在进程间传递。
+    """
+
+    def __init__(self, func):
+        self.func = func
+
+    def __call__(self, context, task):
+        global _captured
+        previous, _captured = _captured, []
+        try:
+            result = self.func(context, task)
+            return result, _captured
+        finally:
+            _captured = previous
+
+
+class ShardWriter:
+    """将输出文件依次写入 folder 中的 shard-00000.zip、shard-00001.zip……（文件名前加 prefix）
+
+    每个分片中成员内容的总大小（tar 包括成员头与对齐）不超过 max_bytes，超过时开始下一个分片；
+    单个成员超过上限时独占一个分片。
+    """
+
+    def __init__(self, folder, archive_format='zip', max_bytes=DEFAULT_SHARD_SIZE, prefix=''):
+        if archive_format not in SHARD_FORMATS:
+            raise ConversionError(f"不支持的分片格式: {archive_format}")
+        if max_bytes <= 0:
+            raise ConversionError("分片大小上限必须大于 0")
+        self.folder = folder
+        self.archive_format = archive_format
+        self.max_bytes = max_bytes
+        self.prefix = prefix
+        self.paths = []
+        self.members = 0
+        self._archive = None
+        self._size = 0
+
+    def _open_next(self):
+        self._close_current()
+        os.makedirs(self.folder, exist_ok=True)
+        path = os.path.join(self.folder, self.prefix + SHARD_NAME.format(len(self.paths), self.archive_format))
+        if self.archive_format == 'zip':
+            self._archive = zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED)
+        else:
+            self._archive = tarfile.open(path, 'w')
+        self.paths.append(path)
+        self._size = 0
+
+    def _close_current(self):
+        if self._archive is not None:
+            self._archive.close()
+            self._archive = None
+
+    def _reserve(self, length):
+        if self.archive_format == 'zip':
+            size = length
+        else:
+            size = _TAR_BLOCK + -(-length // _TAR_BLOCK) * _TAR_BLOCK
+        if self._archive is None or (self._size and self._size + size > self.max_bytes):
+            self._open_next()
+        self._size += size
+        self.members += 1
+
+    def add(self, name, data):
+        """添加一个成员，name 为以 / 分隔的相对路径，data 为字节"""
+        self._reserve(len(data))
+        if self.archive_format == 'zip':
+            self._archive.writestr(name, data)
+        else:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = int(time.time())
+            self._archive.addfile(info, io.BytesIO(data))
+
+    def add_file(self, name, path):
+        """添加一个成员，内容从文件 path 中流式读入"""
+        size = os.path.getsize(path)
+        self._reserve(size)
+        if self.archive_format == 'zip':
+            self._archive.write(path, name)
+        else:
+            info = tarfile.TarInfo(name)
+            info.size = size
+            info.mtime = int(time.time())
+            with open(path, 'rb') as f:
+                self._archive.addfile(info, f)
+
+    def add_output(self, name, text):
+        """添加 Captured 收集的一个输出（文本或 SpilledOutput），返回写入的字节数"""
+        if isinstance(text, SpilledOutput):
+            try:
+                size = text.size
+                self.add_file(name, text.path)
+            finally:
+                text.discard()
+            return size
+        data = text.encode('utf-8')
+        self.add(name, data)
+        return len(data)
+
+    def close(self):
+        """结束最后一个分片，返回全部分片的路径"""
+        self._close_current()
+        return self.paths
+
+
+def parse_size(text):
+    """解析 '512M'、'1G'、'100000' 这样的大小（K/M/G 为 1024 的幂），返回字节数"""
+    text = text.strip().upper().rstrip('B')
+    units = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+    try:
+        if text and text[-1] in units:
+            return int(float(text[:-1]) * units[text[-1]])
+        return int(text)
+    except ValueError:
+        raise ConversionError(f"无法解析大小: {text}") from None
@@ -0,0 +1,269 @@
+"""命令行入口：python -m labelconverter convert --from xml --to yolo-det --src ... --images ... --out ..."""
+import argparse
+import json
+import logging
+import sys
+
+from .archive import SHARD_FORMATS, parse_size
+from .diagnostics import ERROR_POLICIES, Diagnostics
+from .engine import COCO_FORMAT, IMAGE_DATA_MODES, STORE_FORMAT, ConversionError, NonNumericLabelError, convert_files
+from .instrument import DEFAULT_SLOWEST, RunMetrics, profiling
+from .labelmap import CLASSES_FILE_NAME, class_names, load_mapping, save_mapping
+from .manifest import MANIFEST_NAME, default_manifest_path
+from .options import ConvertOptions, IncrementalOptions, OutputArchiveOptions, PipelineOptions, ShardOptions
+from .pipeline import DEFAULT_IO_THREADS, DEFAULT_READ_AHEAD
+from .sharding import find_shard_reports, load_shard_report, merge_reports
+from .stats import DEFAULT_EXAMPLES, PROBLEM_NAMES, PROBLEMS, collect_stats, failed_checks, format_stats
+
+# (源格式, 目标格式) -> 界面中的转换格式
+CONVERSIONS = {
+    ('json', 'yolo-det'): "YOLO检测",
+    ('xml', 'yolo-det'): "YOLO检测",
+    ('json', 'yolo-seg'): "YOLO分割",
+    ('json', 'xml'): "JSON 转 XML",
+    ('xml', 'json'): "XML 转 JSON",
+    ('yolo', 'xml'): "YOLO 转 XML",
+    ('yolo', 'json'): "YOLO 转 JSON",
+    ('json', 'store'): STORE_FORMAT,
+    ('xml', 'store'): STORE_FORMAT,
+    ('yolo', 'store'): STORE_FORMAT,
+    ('coco', 'yolo-det'): "YOLO检测",
+    ('coco', 'yolo-seg'): "YOLO分割",
+    ('coco', 'xml'): "JSON 转 XML",
+    ('coco', 'store'): STORE_FORMAT,
+    ('json', 'coco'): COCO_FORMAT,
+    ('xml', 'coco'): COCO_FORMAT,
+    ('yolo', 'coco'): COCO_FORMAT,
+}
+
+
+def parse_label_mapping(items):
+    """将若干 '原标签=新标签' 解析为标签映射字典"""
+    label_mapping = {}
+    for item in items or []:
+        original, sep, new = item.partition('=')
+        if not sep or not original:
+            raise argparse.ArgumentTypeError(f"标签映射格式应为 原标签=新标签: {item}")
+        label_mapping[original] = new
+    return label_mapping
+
+
+def print_progress(event):
+    """在同一行刷新进度"""
+    print(f"\r{str(event):<60}", end='', file=sys.stderr, flush=True)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='labelconverter', description="数据标签转换器（命令行）")
+    parser.add_argument('-v', '--verbose', action='store_true', help="输出每个文件的转换信息")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    convert = subparsers.add_parser('convert', help="转换标注文件夹")
+    convert.add_argument('--from', dest='source_format', required=True,
+                         choices=sorted({src for src, _ in CONVERSIONS}), help="源标注格式")
+    convert.add_argument('--to', dest='target_format', required=True,
+                         choices=sorted({dst for _, dst in CONVERSIONS}), help="目标标注格式")
+    convert.add_argument('--src', required=True, help="标注文件夹或 zip/tar 压缩包（--from coco 时为 COCO 文件）")
+    convert.add_argument('--images', default='',
+                         help="图像文件夹或 zip/tar 压缩包（转换为 JSON 时需要；YOLO 转为 XML、store 或 coco 时用于读取图像尺寸）")
+    convert.add_argument('--recursive-images', action='store_true', help="在图像文件夹的子文件夹中查找图像")
+    convert.add_argument('-r', '--recursive', action='store_true',
+                         help="包括标注文件夹的子文件夹，输出中保持相同的子文件夹结构（同时在图像文件夹的子文件夹中查找图像）")
+    convert.add_argument('--include', action='append', metavar='GLOB',
+                         help="只转换相对路径或文件名匹配的标注文件，可重复指定")
+    convert.add_argument('--exclude', action='append', metavar='GLOB',
+                         help="跳过相对路径或文件名匹配的标注文件与子文件夹，可重复指定")
+    convert.add_argument('--stream', action='store_true',
+                         help="边遍历边转换，不等待整个文件夹列出与解析完（标签逐文件检查）")
+    convert.add_argument('--out', required=True, help="输出文件夹（--to store 时为数据集存储文件夹，--to coco 时写入其中的 annotations.json）")
+    convert.add_argument('--pipeline', action='store_true',
+                         help="读取、转换与写出重叠执行：后台线程预读标注文件并延后写出输出（适合网络存储等高延迟的磁盘）")
+    convert.add_argument('--io-threads', type=int, default=DEFAULT_IO_THREADS, metavar='N',
+                         help=f"--pipeline 的预读线程数（默认 {DEFAULT_IO_THREADS}）")
+    convert.add_argument('--read-ahead', type=int, default=DEFAULT_READ_AHEAD, metavar='N',
+                         help=f"--pipeline 最多预读与等待写出的文件数（默认 {DEFAULT_READ_AHEAD}），"
+                              "等待写出的输出在内存中合计不超过 64 MB，更大的输出暂存在系统临时文件夹")
+    convert.add_argument('--out-archive', choices=SHARD_FORMATS, default=None,
+                         help="将逐文件的输出写入输出文件夹中按大小切分的 zip/tar 分片，而不是单独的文件")
+    convert.add_argument('--shard-size', default='512M', metavar='SIZE',
+                         help="每个输出分片中文件的总大小上限，如 256M、1G（默认 512M）")
+    convert.add_argument('--map', action='append', metavar='LABEL=NEW', help="标签映射，可重复指定")
+    convert.add_argument('--map-file', metavar='FILE', default=None,
+                         help="从文件读取标签映射（.json，或 classes.txt/.yaml 的类别列表），--map 可覆盖其中的项")
+    convert.add_argument('--auto-ids', action='store_true',
+                         help=f"按名称为（映射后的）标签分配连续编号 0..N-1，类别列表写入输出文件夹中的 {CLASSES_FILE_NAME}")
+    convert.add_argument('--save-map', metavar='FILE', default=None,
+                         help="转换完成后保存实际使用的标签映射（.json，连续编号时也可为 .txt/.yaml）")
+    convert.add_argument('-j', '--workers', type=int, default=1, help="并行进程数，0 表示使用全部 CPU 核心")
+    convert.add_argument('--num-shards', type=int, default=None, metavar='N',
+                         help="多机分片转换的分片数：按相对路径的哈希只转换属于 --shard-index 的文件，"
+                              "结束时在输出文件夹中写入分片报告，全部完成后用 merge 合并")
+    convert.add_argument('--shard-index', type=int, default=None, metavar='I', help="本次转换的分片序号（0 到 N-1）")
+    convert.add_argument('--chunksize', type=int, default=None, help="每次分发给工作进程的文件数")
+    convert.add_argument('--size-cache', metavar='FILE', default=None,
+                         help="图像尺寸缓存文件（SQLite），重复转换同一批图像时不再解析图像尺寸")
+    convert.add_argument('--image-data', choices=IMAGE_DATA_MODES, default='embed',
+                         help="输出 JSON 的 imageData：embed 嵌入 Base64，reference 写 null 并使用相对 imagePath"
+                              "（图像不能来自压缩包），omit 写 null 且 imagePath 只保留文件名")
+    convert.add_argument('--precision', type=int, default=None, metavar='N',
+                         help="输出 YOLO 坐标保留的小数位数，默认完整精度")
+    convert.add_argument('--clip', action='store_true', help="输出 YOLO 坐标前将其限制在图像范围内")
+    convert.add_argument('--progress', action='store_true', help="在标准错误输出中显示进度、速度与剩余时间")
+    convert.add_argument('--incremental', action='store_true',
+                         help=f"增量转换：只转换变化或新增的文件，清单默认保存为输出文件夹中的 {MANIFEST_NAME}")
+    convert.add_argument('--manifest', metavar='FILE', default=None, help="增量转换清单文件位置（隐含 --incremental）")
+    convert.add_argument('--hash', dest='hash_sources', action='store_true',
+                         help="增量转换时按内容哈希判断修改时间变化的文件是否真的改变")
+    convert.add_argument('--delete-orphans', action='store_true', help="增量转换时删除源文件已不存在的输出文件")
+    convert.add_argument('--on-error', choices=ERROR_POLICIES, default='fail',
+                         help="文件解析或转换失败时：fail 立即停止（默认），skip 记录后跳过该文件继续转换")
+    convert.add_argument('--max-errors', type=int, default=None, metavar='N',
+                         help="出错的文件达到 N 个时停止（隐含 --on-error skip）")
+    convert.add_argument('--diagnostics', metavar='FILE', default=None,
+                         help="结束时（包括停止时）写入逐文件的警告与错误：.csv 每条一行，其他后缀为 JSON")
+    convert.add_argument('--report', metavar='FILE', default=None,
+                         help="结束时（包括失败时）写入 JSON 运行报告：各步骤与各阶段耗时、读写字节数、最慢的文件与跳过原因")
+    convert.add_argument('--slowest', type=int, default=DEFAULT_SLOWEST, metavar='N', help="运行报告中列出的最慢文件数")
+    convert.add_argument('--profile', metavar='FILE', default=None,
+                         help="用 cProfile 分析主进程并保存统计文件（多进程时不包括工作进程）")
+    convert.add_argument('--tracemalloc', dest='trace_memory', action='store_true',
+                         help="用 tracemalloc 跟踪主进程的内存分配，峰值与分配最多的位置写入运行报告")
+
+    stats = subparsers.add_parser('stats', help="统计标注文件夹并检查完整性，可在转换前作为检查步骤")
+    stats.add_argument('--from', dest='source_format', default=None,
+                       choices=sorted({src for src, _ in CONVERSIONS}), help="只统计该格式的标注文件（默认全部）")
+    stats.add_argument('--src', required=True, help="标注文件夹或 zip/tar 压缩包（--from coco 时为 COCO 文件）")
+    stats.add_argument('--images', default='', help="图像文件夹或压缩包，指定时检查每个标注文件是否有对应的图像")
+    stats.add_argument('--recursive-images', action='store_true', help="在图像文件夹的子文件夹中查找图像")
+    stats.add_argument('-r', '--recursive', action='store_true', help="包括标注文件夹的子文件夹")
+    stats.add_argument('--include', action='append', metavar='GLOB', help="只统计相对路径或文件名匹配的标注文件")
+    stats.add_argument('--exclude', action='append', metavar='GLOB', help="跳过相对路径或文件名匹配的标注文件与子文件夹")
+    stats.add_argument('--map', action='append', metavar='LABEL=NEW', help="按映射后的标签统计类别，可重复指定")
+    stats.add_argument('--map-file', metavar='FILE', default=None, help="从文件读取标签映射")
+    stats.add_argument('-j', '--workers', type=int, default=1, help="并行解析的进程数，0 表示使用全部 CPU 核心")
+    stats.add_argument('--chunksize', type=int, default=None, help="每次分发给工作进程的文件数")
+    stats.add_argument('--examples', type=int, default=DEFAULT_EXAMPLES, metavar='N',
+                       help=f"每个检查项列出的示例文件数（默认 {DEFAULT_EXAMPLES}）")
+    stats.add_argument('--json', metavar='FILE', default=None, help="将统计报告写为 JSON")
+    stats.add_argument('--fail-on', action='append', choices=PROBLEMS + ['all'], metavar='CHECK',
+                       help=f"任一指定的检查项不为 0 时以退出码 4 结束，可重复指定：{', '.join(PROBLEMS)} 或 all")
+    stats.add_argument('--progress', action='store_true', help="在标准错误输出中显示解析进度")
+
+    merge = subparsers.add_parser('merge', help="合并分片转换的报告：检查分片齐全与类别编号一致，汇总标签、统计与诊断")
+    merge.add_argument('reports', nargs='+', metavar='PATH', help="分片报告文件，或包含分片报告的输出文件夹")
+    merge.add_argument('--out', metavar='FILE', default=None, help="将合并后的报告写为 JSON")
+    merge.add_argument('--save-map', metavar='FILE', default=None,
+                       help="保存合并后的标签映射（.json，连续编号时也可为 .txt/.yaml）")
+    return parser
+
+
+def run_convert(args):
+    format_choice = CONVERSIONS.get((args.source_format, args.target_format))
+    if format_choice is None:
+        raise ConversionError(f"不支持从 {args.source_format} 转换为 {args.target_format}")
+    if args.target_format == 'json' and not args.images:
+        raise ConversionError("转换为 JSON 时需要通过 --images 指定图像文件夹")
+    if (args.hash_sources or args.delete_orphans) and not (args.incremental or args.manifest):
+        raise ConversionError("--hash 与 --delete-orphans 需要与 --incremental 或 --manifest 一起使用")
+    if args.trace_memory and not args.report:
+        raise ConversionError("--tracemalloc 的结果写入运行报告，需要与 --report 一起使用")
+    if (args.shard_index is None) != (args.num_shards is None):
+        raise ConversionError("--shard-index 与 --num-shards 需要一起使用")
+    manifest = args.manifest or (default_manifest_path(args.out) if args.incremental else None)
+    label_mapping = load_mapping(args.map_file) if args.map_file else {}
+    label_mapping.update(parse_label_mapping(args.map))
+    shard_size = parse_size(args.shard_size)
+    options = ConvertOptions(
+        label_mapping=label_mapping, source_format=args.source_format,
+        recursive=args.recursive, include=args.include, exclude=args.exclude,
+        recursive_images=args.recursive_images or args.recursive, image_data_mode=args.image_data,
+        precision=args.precision, clip=args.clip, size_cache=args.size_cache,
+        auto_ids=args.auto_ids, mapping_file=args.save_map,
+        workers=args.workers, chunksize=args.chunksize, stream=args.stream,
+        incremental=IncrementalOptions(manifest, args.hash_sources, args.delete_orphans) if manifest else None,
+        pipeline=PipelineOptions(args.io_threads, args.read_ahead) if args.pipeline else None,
+        output_archive=OutputArchiveOptions(args.out_archive, shard_size) if args.out_archive else None,
+        shard=ShardOptions(args.shard_index, args.num_shards) if args.num_shards is not None else None)
+    metrics = RunMetrics(args.slowest) if args.report else None
+    diagnostics = Diagnostics('skip' if args.max_errors is not None else args.on_error, args.max_errors)
+    status, message = 'error', None
+    try:
+        with profiling(metrics, args.profile, args.trace_memory):
+            convert_files(args.src, format_choice, args.images, args.out, options,
+                          progress=print_progress if args.progress else None, metrics=metrics,
+                          diagnostics=diagnostics)
+        status = 'ok'
+    except ConversionError as e:
+        message = str(e)
+        raise
+    finally:
+        if metrics is not None:
+            metrics.write(args.report, status, message)
+        if args.diagnostics:
+            diagnostics.write(args.diagnostics)
+        if args.progress:
+            print(file=sys.stderr)
+        if diagnostics.policy == 'skip' and diagnostics.errors:
+            print(diagnostics.summary(), file=sys.stderr)
+    # 有文件因出错被跳过时以 3 退出，便于脚本区分
+    return 3 if diagnostics.errors else 0
+
+
+def run_stats(args):
+    label_mapping = load_mapping(args.map_file) if args.map_file else {}
+    label_mapping.update(parse_label_mapping(args.map))
+    report = collect_stats(args.src, args.source_format, args.images, label_mapping, args.recursive,
+                           args.recursive_images or args.recursive, args.include, args.exclude,
+                           args.workers, args.chunksize, print_progress if args.progress else None,
+                           examples=args.examples)
+    if args.progress:
+        print(file=sys.stderr)
+    print(format_stats(report))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    checks = PROBLEMS if 'all' in (args.fail_on or ()) else args.fail_on or ()
+    failed = failed_checks(report, checks)
+    if failed:
+        print("检查未通过: " + "，".join(f"{PROBLEM_NAMES[check]} {count}" for check, count in failed.items()),
+              file=sys.stderr)
+        return 4
+    return 0
+
+
+def run_merge(args):
+    merged = merge_reports([load_shard_report(path) for path in find_shard_reports(args.reports)])
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(merged, f, ensure_ascii=False, indent=2)
+    if args.save_map:
+        save_mapping(merged['label_mapping'], args.save_map)
+    diagnostics = merged['diagnostics']
+    print(f"{merged['num_shards']} 个分片共转换 {merged['converted']} 个文件，"
+          f"{diagnostics['errors']} 个错误，{diagnostics['warnings']} 个警告")
+    names = class_names(merged['label_mapping'])
+    if names is not None and merged['info']['format_choice'] in ("YOLO检测", "YOLO分割"):
+        print("类别（按编号）: " + ", ".join(names))
+    print(format_stats(merged['stats']))
+    return 0
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format='%(message)s')
+    try:
+        if args.command == 'convert':
+            return run_convert(args)
+        if args.command == 'stats':
+            return run_stats(args)
+        if args.command == 'merge':
+            return run_merge(args)
+    except NonNumericLabelError as e:
+        labels = ", ".join(sorted(e.labels))
+        print(f"错误: {e} 非数字标签: {labels}（可使用 --map 指定映射）", file=sys.stderr)
+        return 2
+    except (ConversionError, argparse.ArgumentTypeError) as e:
+        print(f"错误: {e}", file=sys.stderr)
+        return 2
+    return 1
@@ -0,0 +1,173 @@
+"""COCO 目标检测/实例分割标注的流式读写
+
+读取时逐个解码 images、annotations 数组中的元素，按图像拆分为 Annotation，不把整个文件载入为一个字典；
+写入时 images 直接写入输出文件，annotations 先写入同目录下的临时文件，最后拼接，内存占用与数据集大小无关。
+"""
+import json
+import logging
+import os
+import posixpath
+import shutil
+import tempfile
+from collections import defaultdict
+
+from .dataset import Annotation, Shape
+from .errors import ConversionError
+from .streaming import iter_object_members
+
+logger = logging.getLogger(__name__)
+
+# 输出文件夹中 COCO 文件的文件名
+COCO_FILE_NAME = 'annotations.json'
+
+
+def read_coco(path, segmentation=False, select=None):
+    """读取 COCO 文件，按 images 中的顺序返回每张图像的 Annotation
+
+    每个标注的 bbox 转为矩形；segmentation 为 True 时，多边形形式的 segmentation 转为多边形（像素坐标），
+    此时带多边形的标注不再输出矩形。RLE 形式的 segmentation 只保留 bbox。
+    Annotation.path 为图像文件相对 COCO 文件所在文件夹的路径（保留 file_name 中的子文件夹），
+    file_name 重复或指向该文件夹之外时抛出 ConversionError。
+    解码出的标注直接加入所属图像的 Annotation，不另外按图像收集；select 不为 None 时只保留
+    select(Annotation.path) 为 True 的图像，其余图像的标注在读取时即丢弃。
+    """
+    folder = os.path.dirname(path)
+    annotations = []
+    by_id = {}
+    # images 之前出现的标注，读到 images 后再加入；找不到 images 记录的图像编号
+    early = defaultdict(list)
+    orphans = set()
+    images_read = False
+    categories = None
+    # annotations 在 categories 之前时，形状的 label 暂为类别编号，读完后再替换
+    deferred = False
+    with open(path, 'r') as f:
+        for key, value in iter_object_members(f, stream_keys=('images', 'annotations')):
+            if key == 'images':
+                names = set()
+                for image in value:
+                    file_name = _relative_file_name(image['file_name'], path, names)
+                    image_path = os.path.join(folder, file_name)
+                    shapes = early.pop(image['id'], [])
+                    if select is not None and not select(image_path):
+                        by_id[image['id']] = None
+                        continue
+                    annotation = Annotation(image_path, 'json', shapes, image.get('width'), image.get('height'),
+                                            image['file_name'])
+                    by_id[image['id']] = annotation
+                    annotations.append(annotation)
+                images_read = True
+            elif key == 'annotations':
+                deferred = categories is None
+                for ann in value:
+                    image_id = ann['image_id']
+                    if image_id in by_id:
+                        if by_id[image_id] is not None:
+                            by_id[image_id].shapes += _annotation_shapes(ann, segmentation, categories)
+                    elif images_read:
+                        orphans.add(image_id)
+                    else:
+                        early[image_id] += _annotation_shapes(ann, segmentation, categories)
+            elif key == 'categories':
+                categories = {category['id']: category['name'] for category in value}
+
+    if deferred:
+        categories = categories or {}
+        for annotation in annotations:
+            for shape in annotation.shapes:
+                shape.label = categories.get(shape.label, str(shape.label))
+    orphans.update(early)
+    if orphans:
+        logger.warning("COCO 文件 %s 中有 %d 张图像的标注找不到对应的 images 记录，已忽略",
+                       path, len(orphans))
+    return annotations
+
+
+def _relative_file_name(file_name, path, names):
+    """images 中的 file_name 规范化为以 / 分隔的相对路径，重复或指向 COCO 文件所在文件夹之外时抛出 ConversionError"""
+    relative = posixpath.normpath(file_name.replace('\\', '/'))
+    if posixpath.isabs(relative) or relative == '..' or relative.startswith('../'):
+        raise ConversionError(f"COCO 文件 {path} 中的 file_name 指向所在文件夹之外: {file_name}")
+    if relative in names:
+        raise ConversionError(f"COCO 文件 {path} 中的 file_name 重复: {file_name}")
+    names.add(relative)
+    return relative
+
+
+def _annotation_shapes(ann, segmentation, categories=None):
+    """单个 COCO 标注对应的形状；categories 为 None（尚未读到）时 label 暂为 category_id，读取完后再替换为类别名"""
+    label = ann['category_id'] if categories is None else categories.get(ann['category_id'], str(ann['category_id']))
+    polygons = ann.get('segmentation') if segmentation else None
+    if isinstance(polygons, list) and polygons:
+        return [Shape(label, 'polygon', [[polygon[i], polygon[i + 1]]
+                                                      for i in range(0, len(polygon) - 1, 2)])
+                for polygon in polygons if len(polygon) >= 6]
+    x, y, w, h = ann['bbox']
+    return [Shape(label, 'rectangle', [[x, y], [x + w, y + h]])]
+
+
+def category_ids(labels):
+    """类别名 -> COCO 类别编号：全部为整数时直接使用该整数，否则按名称排序从 1 开始编号"""
+    labels = sorted(labels)
+    try:
+        ids = {label: int(label) for label in labels}
+    except ValueError:
+        return {label: i for i, label in enumerate(labels, 1)}
+    if all(str(ids[label]) == label for label in labels):
+        return ids
+    return {label: i for i, label in enumerate(labels, 1)}
+
+
+def polygon_area(flat):
+    """扁平顶点序列 [x1, y1, x2, y2, ...] 围成的面积（鞋带公式）"""
+    xs, ys = flat[0::2], flat[1::2]
+    n = len(xs)
+    return abs(sum(xs[i] * ys[(i + 1) % n] - xs[(i + 1) % n] * ys[i] for i in range(n))) / 2
+
+
+class CocoWriter:
+    """逐张图像写入 COCO 文件：images 直接写出，annotations 暂存在同目录的临时文件中，close 时拼接"""
+
+    def __init__(self, path):
+        self.path = path
+        folder = os.path.dirname(os.path.abspath(path))
+        os.makedirs(folder, exist_ok=True)
+        self.file = open(path, 'w')
+        self.spool = tempfile.TemporaryFile('w+', dir=folder)
+        self.num_images = 0
+        self.num_annotations = 0
+        self.file.write('{"images": [')
+
+    def add_image(self, file_name, width, height, objects):
+        """添加一张图像，objects 为 [(类别编号, 'rectangle' 或 'polygon', 扁平顶点列表), ...]（像素坐标）"""
+        self.num_images += 1
+        image_id = self.num_images
+        image = {"id": image_id, "file_name": file_name, "width": width or 0, "height": height or 0}
+        self.file.write((',\n' if image_id > 1 else '\n') + json.dumps(image))
+        for category_id, shape_type, flat in objects:
+            xs, ys = flat[0::2], flat[1::2]
+            xmin, ymin = min(xs), min(ys)
+            bbox = [xmin, ymin, max(xs) - xmin, max(ys) - ymin]
+            if shape_type == 'rectangle':
+                area = bbox[2] * bbox[3]
+                flat = [xmin, ymin, xmin + bbox[2], ymin, xmin + bbox[2], ymin + bbox[3], xmin, ymin + bbox[3]]
+            else:
+                area = polygon_area(flat)
+            self.num_annotations += 1
+            annotation = {"id": self.num_annotations, "image_id": image_id, "category_id": category_id,
+                          "bbox": bbox, "area": area, "segmentation": [flat], "iscrowd": 0}
+            self.spool.write((',\n' if self.num_annotations > 1 else '\n') + json.dumps(annotation))
+
+    def close(self, categories):
+        """写入暂存的 annotations 与 categories，categories 为 {类别名: 编号}"""
+        try:
+            self.file.write('\n],\n"annotations": [')
+            self.spool.seek(0)
+            shutil.copyfileobj(self.spool, self.file)
+            self.file.write('\n],\n"categories": ')
+            self.file.write(json.dumps([{"id": category_id, "name": name, "supercategory": ""}
+                                        for name, category_id in sorted(categories.items(), key=lambda x: x[1])]))
+            self.file.write('}\n')
+        finally:
+            self.spool.close()
+            self.file.close()
@@ -0,0 +1,280 @@
+"""数据集索引：一次遍历解析全部标注文件，扫描、校验与转换都读取同一份内存表示"""
+import io
+import os
+import xml.etree.ElementTree as ET
+from collections import Counter
+
+from .archive import is_archive, iter_members
+from .discovery import walk_files
+from .errors import ConversionError
+from .instrument import Instrumented, timed
+from .parallel import run_tasks_paired
+from .progress import ProgressReporter, check_cancelled
+from .streaming import iter_object_members
+
+# 标注文件后缀
+SOURCE_SUFFIXES = {'json': '.json', 'xml': '.xml', 'yolo': '.txt'}
+_SUFFIX_KINDS = {suffix: kind for kind, suffix in SOURCE_SUFFIXES.items()}
+# list_source_tasks 中各类文件的顺序
+_KIND_ORDER = {kind: i for i, kind in enumerate(SOURCE_SUFFIXES)}
+
+
+class Shape:
+    """单个标注对象：标签、形状类型与顶点（矩形为左上、右下两点）"""
+    __slots__ = ('label', 'shape_type', 'points')
+
+    def __init__(self, label, shape_type, points):
+        self.label = label
+        self.shape_type = shape_type
+        self.points = points
+
+
+class Annotation:
+    """单个标注文件的精简表示，不保留 imageData 等转换用不到的字段
+
+    YOLO 文件的多边形顶点为归一化坐标；图像尺寸与标注中记录的图像文件名未知时为 None。
+    """
+    __slots__ = ('path', 'kind', 'shapes', 'image_width', 'image_height', 'image_path')
+
+    def __init__(self, path, kind, shapes, image_width=None, image_height=None, image_path=None):
+        self.path = path
+        self.kind = kind
+        self.shapes = shapes
+        self.image_width = image_width
+        self.image_height = image_height
+        self.image_path = image_path
+
+    @property
+    def name(self):
+        return os.path.basename(self.path)
+
+
+def _open_text(path, data=None):
+    """打开标注文件用于读取文本；data 为已读入内存的文件内容（如压缩包成员，按 UTF-8 解码）时不打开 path"""
+    if data is None:
+        return open(path, 'r')
+    return io.TextIOWrapper(io.BytesIO(data), encoding='utf-8')
+
+
+@timed('read_json')
+def read_json(path, data=None):
+    """读取 LabelMe JSON 文件
+
+    流式解析顶层字段并跳过 imageData，耗时与内存只与标注数量有关，与嵌入的图像大小无关。
+    data 为已读入内存的文件内容时从中解析，path 只用于记录（下同）。
+    """
+    with _open_text(path, data) as f:
+        data = dict(iter_object_members(f, skip_keys=('imageData',)))
+    shapes = [Shape(shape['label'], shape.get('shape_type'), shape['points'])
+              for shape in data.get('shapes', [])]
+    return Annotation(path, 'json', shapes, data.get('imageWidth'), data.get('imageHeight'), data.get('imagePath'))
+
+
+@timed('read_xml')
+def read_xml(path, data=None):
+    """读取 VOC XML 文件
+
+    使用 iterparse 逐个处理 object，处理完即清空，内存占用不随文件大小增长。
+    """
+    shapes = []
+    image_width = image_height = image_path = None
+    root = None
+    depth = 0
+    for event, elem in ET.iterparse(path if data is None else io.BytesIO(data), events=('start', 'end')):
+        if event == 'start':
+            root = elem if root is None else root
+            depth += 1
+            continue
+        depth -= 1
+        if depth != 1:  # 只处理根节点的直接子节点
+            continue
+        if elem.tag == 'object':
+            bbox = elem.find('bndbox')
+            xmin = float(bbox.find('xmin').text)
+            ymin = float(bbox.find('ymin').text)
+            xmax = float(bbox.find('xmax').text)
+            ymax = float(bbox.find('ymax').text)
+            shapes.append(Shape(elem.find('name').text, 'rectangle', [[xmin, ymin], [xmax, ymax]]))
+            root.clear()
+        elif elem.tag == 'size':
+            width, height = elem.find('width'), elem.find('height')
+            if width is not None and height is not None:
+                image_width = int(float(width.text))
+                image_height = int(float(height.text))
+        elif elem.tag == 'filename':
+            image_path = elem.text
+    return Annotation(path, 'xml', shapes, image_width, image_height, image_path)
+
+
+@timed('read_yolo')
+def read_yolo(path, data=None):
+    """读取 YOLO TXT 文件：5 个字段为矩形框，否则为归一化的多边形"""
+    shapes = []
+    with _open_text(path, data) as f:
+        for line in f:
+            parts = line.strip().split()
+            if not parts:
+                continue
+            class_id = parts[0]
+            if len(parts) == 5:
+                center_x, center_y, width, height = map(float, parts[1:5])
+                xmin = center_x - width / 2
+                ymin = center_y - height / 2
+                xmax = center_x + width / 2
+                ymax = center_y + height / 2
+                shapes.append(Shape(class_id, 'rectangle', [[xmin, ymin], [xmax, ymax]]))
+            else:
+                points = list(map(float, parts[1:]))
+                polygon_points = [[points[i], points[i + 1]] for i in range(0, len(points) - 1, 2)]
+                shapes.append(Shape(class_id, 'polygon', polygon_points))
+    return Annotation(path, 'yolo', shapes)
+
+
+READERS = {'json': read_json, 'xml': read_xml, 'yolo': read_yolo}
+
+
+def read_annotation(kind, path, data=None):
+    """按类型读取标注文件，data 为已读入内存的文件内容（可选）"""
+    return READERS[kind](path, data)
+
+
+def task_size(task):
+    """(类型, 路径) 或 (类型, 虚拟路径, 内容) 任务的源文件字节数"""
+    return len(task[2]) if len(task) > 2 else os.path.getsize(task[1])
+
+
+def _read_task(context, task):
+    kind, path = task[:2]
+    try:
+        return read_annotation(kind, path, task[2] if len(task) > 2 else None), None
+    except Exception as e:
+        return None, f"文件 {path} 解析失败: {e}"
+
+
+def _source_suffixes(source_format):
+    if source_format is None:
+        return list(SOURCE_SUFFIXES.values())
+    if source_format not in SOURCE_SUFFIXES:
+        raise ConversionError(f"不支持的源格式: {source_format}")
+    return [SOURCE_SUFFIXES[source_format]]
+
+
+def iter_source_tasks(folder_path, source_format=None, recursive=False, include=None, exclude=None):
+    """边遍历边产出 (类型, 路径)，顺序为遍历顺序，参数见 list_source_tasks 与 discovery.walk_files
+
+    folder_path 为压缩包时按成员顺序产出 (类型, 虚拟路径, 内容字节)，见 archive 模块。
+    """
+    suffixes = _source_suffixes(source_format)
+    if is_archive(folder_path):
+        return ((_SUFFIX_KINDS[os.path.splitext(name)[1]], os.path.join(folder_path, name.replace('/', os.sep)), data)
+                for name, data in iter_members(folder_path, suffixes, recursive, include, exclude))
+    return ((_SUFFIX_KINDS[os.path.splitext(relative)[1]], os.path.join(folder_path, relative.replace('/', os.sep)))
+            for relative in walk_files(folder_path, suffixes, recursive, include, exclude))
+
+
+@timed('list_files')
+def list_source_tasks(folder_path, source_format=None, recursive=False, include=None, exclude=None):
+    """按 JSON、XML、YOLO 的顺序列出 (类型, 路径)，同类文件按路径排序
+
+    source_format 为 'json'、'xml' 或 'yolo' 时只列出该类文件；recursive 为 True 时包括子文件夹；
+    include/exclude 为相对路径或文件名的通配符（见 discovery.walk_files）。
+    """
+    tasks = list(iter_source_tasks(folder_path, source_format, recursive, include, exclude))
+    tasks.sort(key=lambda task: (_KIND_ORDER[task[0]], task[1]))
+    return tasks
+
+
+class DatasetIndex:
+    """一个标注文件夹的内存索引
+
+    annotations 按 JSON、XML、YOLO 的顺序排列，同类文件按文件名排序；
+    labels 与 shape_types 在构建时一并统计，之后无需再读取文件。
+    """
+
+    def __init__(self, folder_path, annotations):
+        self.folder_path = folder_path
+        self.annotations = annotations
+        self.by_kind = {kind: [] for kind in SOURCE_SUFFIXES}
+        self.labels = set()
+        self.shape_types = Counter()
+        for annotation in annotations:
+            self.by_kind[annotation.kind].append(annotation)
+            for shape in annotation.shapes:
+                self.labels.add(shape.label)
+                if annotation.kind == 'json':
+                    self.shape_types[shape.shape_type] += 1
+
+    @classmethod
+    def build(cls, folder_path, source_format=None, workers=1, chunksize=None, progress=None, cancel=None,
+              diagnostics=None):
+        """列出并解析文件夹中的标注文件；source_format 为 'json'、'xml' 或 'yolo' 时只读取该类文件
+
+        progress 接收 ProgressEvent，cancel.is_set() 为真时在文件之间停止并抛出 ConversionCancelled；
+        任一文件解析失败时抛出 ConversionError，diagnostics 为 Diagnostics 时按其策略记录并跳过。
+        """
+        tasks = list_source_tasks(folder_path, source_format)
+        return cls.parse(folder_path, tasks, workers, chunksize, progress, cancel, diagnostics=diagnostics)
+
+    @classmethod
+    def parse(cls, folder_path, tasks, workers=1, chunksize=None, progress=None, cancel=None, metrics=None,
+              sort=False, diagnostics=None):
+        """解析 list_source_tasks 返回的 (类型, 路径) 列表（或其中一部分），参数与 build 相同
+
+        tasks 也可以是 iter_source_tasks 返回的生成器（此时总数未知）或 pipeline.prefetch 的结果；
+        sort 为 True 时解析后按 list_source_tasks 的顺序排列（用于按成员顺序读取的压缩包）。
+        metrics 为 RunMetrics 时记录每个文件的解析耗时与读取的字节数。
+        diagnostics 为 Diagnostics 时，解析失败的文件按其策略记录并跳过（或停止）。
+        """
+        annotations = []
+        reporter = ProgressReporter(progress, "解析", len(tasks) if hasattr(tasks, '__len__') else None)
+        task_func = _read_task if metrics is None else Instrumented(_read_task)
+        for task, result in run_tasks_paired(task_func, tasks, None, workers, chunksize):
+            if metrics is not None:
+                result, seconds, snapshot = result
+                metrics.add_file('parse', task[1], seconds, snapshot)
+                metrics.add_read(task[1], task_size(task))
+            annotation, error = result
+            if error:
+                if metrics is not None:
+                    metrics.error(task[1], error)
+                if diagnostics is None:
+                    raise ConversionError(error)
+                diagnostics.error(task[1], 'parse', error)
+            else:
+                annotations.append(annotation)
+            reporter.advance()
+            check_cancelled(cancel)
+        if reporter.total is None:
+            reporter.finish()
+        if sort:
+            annotations.sort(key=lambda annotation: (_KIND_ORDER[annotation.kind], annotation.path))
+        return cls(folder_path, annotations)
+
+    def __len__(self):
+        return len(self.annotations)
+
+    def only(self, kind):
+        """只包含某一类标注文件的索引"""
+        return DatasetIndex(self.folder_path, list(self.by_kind[kind]))
+
+    def labels_of(self, kinds, label_mapping=None):
+        """指定类型文件中的标签集合（优先使用修改后的标签）"""
+        label_mapping = label_mapping or {}
+        return {label_mapping.get(shape.label, shape.label)
+                for kind in kinds for annotation in self.by_kind[kind] for shape in annotation.shapes}
+
+    @property
+    def has_polygon(self):
+        return self.shape_types['polygon'] > 0
+
+    @property
+    def has_rectangle(self):
+        return self.shape_types['rectangle'] > 0
+
+    @property
+    def has_yolo(self):
+        return bool(self.by_kind['yolo'])
+
+    def json_all_rectangle(self):
+        """所有 JSON 文件是否只包含 rectangle 标注"""
+        return all(shape_type == 'rectangle' for shape_type in self.shape_types)
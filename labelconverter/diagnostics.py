@@ -0,0 +1,112 @@
+"""转换诊断：逐文件记录警告与错误（文件、原因、严重程度），按策略决定出错时继续还是停止
+
+不弹窗、不打断批量转换，结束后汇总为一段文字（summary）或写为报告文件（write）。
+错误策略：
+    fail   遇到第一个错误即停止（默认，与之前的行为相同）；
+    skip   跳过出错的文件继续转换；max_errors 不为 None 时，错误数达到该值后停止。
+"""
+import csv
+import json
+from collections import Counter
+
+from .errors import ConversionError
+
+ERROR_POLICIES = ['fail', 'skip']
+SEVERITIES = ('error', 'warning')
+# 原因 -> 说明
+REASONS = {
+    'parse': "标注文件解析失败",
+    'convert': "转换失败",
+    'non_numeric': "映射后仍有非数字标签",
+    'missing_image': "找不到对应的图像",
+}
+# summary 中每类原因列出的文件数
+SUMMARY_FILES = 5
+
+
+class Diagnostic:
+    """一条诊断：文件、原因（见 REASONS）、消息与严重程度"""
+    __slots__ = ('path', 'reason', 'message', 'severity')
+
+    def __init__(self, path, reason, message, severity):
+        self.path = path
+        self.reason = reason
+        self.message = message
+        self.severity = severity
+
+    def as_dict(self):
+        return {'path': self.path, 'reason': self.reason, 'severity': self.severity, 'message': self.message}
+
+
+class Diagnostics:
+    """收集一次运行中的诊断，policy 与 max_errors 见模块说明"""
+
+    def __init__(self, policy='fail', max_errors=None):
+        if policy not in ERROR_POLICIES:
+            raise ConversionError(f"不支持的错误策略: {policy}")
+        if max_errors is not None and max_errors < 1:
+            raise ConversionError("错误数上限必须大于 0")
+        self.policy = policy
+        self.max_errors = max_errors
+        self.items = []
+        self.counts = Counter()
+
+    @property
+    def errors(self):
+        return sum(count for (severity, _), count in self.counts.items() if severity == 'error')
+
+    @property
+    def warnings(self):
+        return sum(count for (severity, _), count in self.counts.items() if severity == 'warning')
+
+    def _add(self, path, reason, message, severity):
+        self.items.append(Diagnostic(path, reason, message, severity))
+        self.counts[severity, reason] += 1
+
+    def warning(self, path, reason, message):
+        self._add(path, reason, message, 'warning')
+
+    def error(self, path, reason, message, exception=None):
+        """记录一个错误；策略为 fail 时抛出 exception（默认为以 message 为消息的 ConversionError），
+        错误数达到 max_errors 时抛出 ConversionError 停止转换"""
+        self._add(path, reason, message, 'error')
+        if self.policy == 'fail':
+            raise exception if exception is not None else ConversionError(message)
+        if self.max_errors is not None and self.errors >= self.max_errors:
+            raise ConversionError(f"出错的文件已达到 {self.max_errors} 个，转换已停止。")
+
+    def summary(self, files=SUMMARY_FILES):
+        """按严重程度与原因汇总，每类列出前 files 个文件"""
+        if not self.items:
+            return "没有警告或错误。"
+        lines = [f"共 {self.errors} 个错误，{self.warnings} 个警告"]
+        by_reason = {}
+        for item in self.items:
+            by_reason.setdefault((item.severity, item.reason), []).append(item)
+        for (severity, reason), items in sorted(by_reason.items(), key=lambda x: SEVERITIES.index(x[0][0])):
+            kind = "错误" if severity == 'error' else "警告"
+            lines.append(f"[{kind}] {REASONS.get(reason, reason)}：{len(items)} 个文件")
+            lines.extend(f"    {item.message}" for item in items[:files])
+            if len(items) > files:
+                lines.append(f"    ……等共 {len(items)} 个")
+        return "\n".join(lines)
+
+    def report(self):
+        return {
+            'errors': self.errors,
+            'warnings': self.warnings,
+            'counts': [{'severity': severity, 'reason': reason, 'count': count}
+                       for (severity, reason), count in sorted(self.counts.items())],
+            'items': [item.as_dict() for item in self.items],
+        }
+
+    def write(self, path):
+        """写出全部诊断：后缀为 .csv 时每条一行（path, reason, severity, message），否则为 JSON"""
+        if path.lower().endswith('.csv'):
+            with open(path, 'w', encoding='utf-8', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['path', 'reason', 'severity', 'message'])
+                writer.writerows((item.path, item.reason, item.severity, item.message) for item in self.items)
+        else:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(self.report(), f, ensure_ascii=False, indent=2)
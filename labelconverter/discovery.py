@@ -0,0 +1,47 @@
+"""数据集文件发现：用 os.scandir 逐个文件夹遍历（可递归），按 include/exclude 通配符过滤，边遍历边产出
+
+不预先列出整个文件夹，也不按后缀建立完整列表，遍历数百万个文件时内存占用只与当前文件夹有关，
+转换可以在遍历结束之前开始。
+"""
+import os
+from fnmatch import fnmatchcase
+
+
+def matches(relative, patterns):
+    """相对路径（以 / 分隔）或其文件名是否匹配任一通配符"""
+    name = relative.rpartition('/')[2]
+    return any(fnmatchcase(relative, pattern) or fnmatchcase(name, pattern) for pattern in patterns)
+
+
+def walk_files(folder_path, suffixes=None, recursive=False, include=(), exclude=()):
+    """依次产出 folder_path 下文件的相对路径（以 / 分隔）
+
+    suffixes 不为 None 时只产出以其中之一结尾的文件；recursive 为 True 时进入子文件夹。
+    include 非空时只产出相对路径或文件名匹配其中任一通配符的文件；
+    相对路径或文件名匹配 exclude 的文件不产出，匹配的子文件夹（如 "val" 或 "val/*"）整个跳过。
+    每个文件夹内按名称排序，先产出文件再进入子文件夹，因此顺序是确定的。
+    """
+    suffixes = tuple(suffixes) if suffixes is not None else None
+    include, exclude = tuple(include or ()), tuple(exclude or ())
+    pending = ['']
+    while pending:
+        relative_dir = pending.pop()
+        with os.scandir(os.path.join(folder_path, relative_dir) if relative_dir else folder_path) as entries:
+            entries = sorted(entries, key=lambda entry: entry.name)
+        subfolders = []
+        for entry in entries:
+            relative = relative_dir + entry.name
+            if entry.is_file():
+                if suffixes is not None and not entry.name.endswith(suffixes):
+                    continue
+                if include and not matches(relative, include):
+                    continue
+                if exclude and matches(relative, exclude):
+                    continue
+                yield relative
+            elif recursive and entry.is_dir():
+                if exclude and (matches(relative, exclude) or matches(relative + '/', exclude)):
+                    continue
+                subfolders.append(relative + '/')
+        # 倒序压栈，按名称顺序进入子文件夹
+        pending.extend(reversed(subfolders))
@@ -0,0 +1,965 @@
+"""无界面的转换引擎，不依赖 PyQt5，可在命令行或脚本中直接调用"""
+import base64
+import json
+import logging
+import os
+import posixpath
+import re
+from contextlib import nullcontext
+from itertools import chain
+
+from .archive import (SHARD_FORMATS, Captured, ShardWriter, discard_outputs, is_archive, open_binary, open_output,
+                      split_member)
+from .coco import COCO_FILE_NAME, CocoWriter, category_ids, read_coco
+from .dataset import (DatasetIndex, iter_source_tasks, list_source_tasks, read_annotation, read_json, read_xml,
+                      read_yolo, task_size)
+from .diagnostics import Diagnostics
+from .errors import ConversionCancelled, ConversionError, NonNumericLabelError  # noqa: F401
+from .imageindex import ImageIndex
+from .imagesize import get_image_info, get_image_size, open_cache
+from .instrument import Instrumented, count, phase, recording, timed
+from .labelmap import CLASSES_FILE_NAME, LabelTable, auto_assign, compile_mapping, save_mapping
+from .manifest import Manifest
+from .options import ConvertOptions
+from .parallel import run_tasks_paired
+from .pipeline import WriteBehind, prefetch
+from .progress import ProgressReporter, check_cancelled
+from .sharding import check_shard, in_shard, select_shard, shard_report_path, write_shard_report
+from .voc import write_voc
+
+logger = logging.getLogger(__name__)
+
+# 界面中提供的转换格式
+FORMAT_OPTIONS = ["YOLO检测", "YOLO分割", "JSON 转 XML", "XML 转 JSON", "YOLO 转 XML", "YOLO 转 JSON",
+                  "导出数据集存储", "转为 COCO"]
+# 将整个数据集写为一个可内存映射的列式存储（见 store 模块），而不是逐个文件转换
+STORE_FORMAT = "导出数据集存储"
+# 将整个数据集写为一个 COCO 文件（见 coco 模块）
+COCO_FORMAT = "转为 COCO"
+# 读取 COCO 文件时需要多边形（而不只是 bbox）的转换格式
+_COCO_POLYGON_FORMATS = ("YOLO分割", STORE_FORMAT, COCO_FORMAT)
+# 各转换格式输出文件的后缀
+OUTPUT_SUFFIXES = {"YOLO检测": '.txt', "YOLO分割": '.txt', "JSON 转 XML": '.xml',
+                   "XML 转 JSON": '.json', "YOLO 转 XML": '.xml', "YOLO 转 JSON": '.json'}
+# 要求标签为数字的格式
+YOLO_FORMATS = ["YOLO检测", "YOLO分割", "JSON 转 YOLO", "XML 转 YOLO", STORE_FORMAT]
+# LabelMe JSON 中 imageData 的写法：嵌入 Base64、写 null 并引用相对路径、写 null 且只保留文件名
+IMAGE_DATA_MODES = ['embed', 'reference', 'omit']
+# 流式 Base64 编码每次读取的字节数，须为 3 的倍数才能逐块拼接
+BASE64_CHUNK_SIZE = 3 * 256 * 1024
+# 先以占位符生成 JSON 文本，写入时再替换为流式编码的图像数据
+_IMAGE_DATA_TOKEN = "__labelconverter_image_data__"
+# 压缩包中的图像没有可供引用的文件路径（相对路径会指向压缩包内部）
+_ARCHIVE_REFERENCE_MESSAGE = "图像来自压缩包时不能引用图像路径，请改用 embed 或 omit 写法。"
+# 预先格式化好的多边形顶点同样以占位符（后接序号）生成，再替换为按 indent=4 排版的文本
+_POINTS_TOKEN = "__labelconverter_points_"
+_POINTS_TOKEN_PATTERN = re.compile(f'"{_POINTS_TOKEN}(\\d+)"')
+# LabelMe JSON 中 shapes[i].points 的缩进：points 键、每个顶点、顶点坐标
+_POINTS_INDENT = (" " * 12, " " * 16, " " * 20)
+
+
+def is_numeric_label(label):
+    """检查标签是否为数字"""
+    try:
+        float(label)  # 尝试将标签转换为浮点数
+        return True
+    except ValueError:
+        return False
+
+
+def is_class_id(label):
+    """检查标签是否为整数类别编号（如 "3" 或 "3.0"，"1.5" 不是）"""
+    try:
+        return float(label).is_integer()
+    except (TypeError, ValueError, OverflowError):
+        return False
+
+
+@timed('image_data')
+def write_image_base64(image_path, out_file):
+    """将图像文件按块进行 Base64 编码并写入 out_file，内存占用与图像大小无关"""
+    with open_binary(image_path) as img_file:
+        while True:
+            chunk = img_file.read(BASE64_CHUNK_SIZE)
+            if not chunk:
+                break
+            count('bytes_read', len(chunk))
+            out_file.write(base64.b64encode(chunk).decode('ascii'))
+
+
+def missing_images_message(names, limit=20):
+    """汇总未找到图像的标注文件，只列出前 limit 个"""
+    shown = "\n".join(names[:limit])
+    more = f"\n……等共 {len(names)} 个文件" if len(names) > limit else ""
+    return f"未找到以下 {len(names)} 个标注文件对应的图像文件：\n{shown}{more}"
+
+
+def validate(format_choice, json_files, xml_files, yolo_files):
+    """检查已加载的文件是否可以执行所选转换，不可以时抛出 ConversionError"""
+    if format_choice not in FORMAT_OPTIONS:
+        raise ConversionError(f"不支持的转换格式: {format_choice}")
+    if format_choice == "XML 转 JSON" and json_files:
+        raise ConversionError("已加载 JSON 文件，无法执行 XML 转 JSON 转换。")
+    if format_choice == "JSON 转 XML" and xml_files:
+        raise ConversionError("已加载 XML 文件，无法执行 JSON 转 XML 转换。")
+    if format_choice == "YOLO 转 XML" and (xml_files or json_files):
+        raise ConversionError("已加载 XML 或 JSON 文件，无法执行 YOLO 转 XML 转换。")
+    if format_choice == "YOLO 转 JSON" and json_files:
+        raise ConversionError("已加载 JSON 文件，无法执行 YOLO 转 JSON 转换。")
+    if format_choice in ("YOLO检测", "YOLO分割") and yolo_files:
+        raise ConversionError("已加载 YOLO 文件，无法执行 YOLO 转换。")
+    if format_choice == "YOLO分割" and xml_files:
+        raise ConversionError("无法将xml文件转为YOLO分割格式。")
+    if format_choice in ("YOLO 转 XML", "YOLO 转 JSON") and xml_files:
+        raise ConversionError("错误加载了xml文件。")
+
+
+def relative_stem(source_path, source_root):
+    """源文件相对 source_root 的路径（不含后缀，以 / 分隔），用于在子文件夹中匹配图像与命名输出"""
+    return os.path.relpath(os.path.splitext(source_path)[0], source_root).replace(os.sep, '/')
+
+
+def output_folder_for(source_path, output_folder, source_root=None):
+    """source_root 不为 None 时，在输出文件夹中保持源文件相对 source_root 的子文件夹结构"""
+    if source_root is None:
+        return output_folder
+    relative = os.path.relpath(os.path.dirname(source_path), source_root)
+    return output_folder if relative == os.curdir else os.path.join(output_folder, relative)
+
+
+def output_path(source_path, output_folder, suffix):
+    """输出文件路径：与标注文件同名，后缀替换为 suffix"""
+    return os.path.join(output_folder, os.path.splitext(os.path.basename(source_path))[0] + suffix)
+
+
+def convert_task(context, annotation):
+    """转换单个标注文件，返回 (级别, 消息)
+
+    级别为 None 表示成功，'missing_image' 表示找不到图像而跳过（消息为文件名），'error' 表示失败。
+    """
+    format_choice = context['format_choice']
+    output_folder = context['output_folder']
+    label_mapping = context['label_mapping']
+    size_cache = open_cache(context['size_cache'])
+    source_root = context['source_root']
+    relative = relative_stem(annotation.path, source_root) if source_root is not None else None
+    try:
+        if source_root is not None:
+            output_folder = output_folder_for(annotation.path, output_folder, source_root)
+            if context['output_archive'] is None:
+                os.makedirs(output_folder, exist_ok=True)
+        if format_choice == "JSON 转 XML":
+            write_xml(annotation, output_folder)
+        elif format_choice in ("YOLO检测", "YOLO分割"):
+            write_txt(annotation, format_choice, output_folder, label_mapping,
+                      context['precision'], context['clip'])
+        elif format_choice == "YOLO 转 XML":
+            image_file = context['image_index'].find(annotation.path, relative) if context['image_index'] else None
+            write_xml(annotation, output_folder, label_mapping, image_file, size_cache)
+        elif format_choice in ("XML 转 JSON", "YOLO 转 JSON"):
+            image_file = context['image_index'].find(annotation.path, relative)
+            if not image_file:
+                return 'missing_image', annotation.name
+            write_json(annotation, output_folder, image_file, size_cache, context['image_data_mode'])
+    except ConversionError as e:
+        return 'error', str(e)
+    except Exception as e:
+        return 'error', f"文件 {annotation.path} 转换失败: {e}"
+    return None, None
+
+
+def stream_task(context, task):
+    """边发现边转换时的任务：读取单个 (类型, 路径[, 内容]) 并逐文件检查标签后转换，返回值同 convert_task
+
+    级别为 'parse_error' 表示源文件解析失败，'non_numeric' 表示 YOLO 格式下映射后仍有非数字标签，消息为这些标签。
+    """
+    kind, path = task[:2]
+    try:
+        annotation = read_annotation(kind, path, task[2] if len(task) > 2 else None)
+    except Exception as e:
+        return 'parse_error', f"文件 {path} 解析失败: {e}"
+    if context['format_choice'] in YOLO_FORMATS and kind != 'yolo':
+        label_mapping = context['label_mapping']
+        labels = {label_mapping[shape.label] for shape in annotation.shapes}
+        non_numeric_labels = sorted(label for label in labels if not is_numeric_label(label))
+        if non_numeric_labels:
+            return 'non_numeric', non_numeric_labels
+    return convert_task(context, annotation)
+
+
+def select_changed(manifest, tasks, format_choice, output_folder, progress=None, cancel=None, source_root=None):
+    """从 (类型, 路径) 列表中选出自上次转换后变化、新增或输出缺失的文件"""
+    suffix = OUTPUT_SUFFIXES[format_choice]
+    changed = []
+    reporter = ProgressReporter(progress, "检查", len(tasks))
+    for kind, path in tasks:
+        if manifest.needs_conversion(path, output_path(path, output_folder_for(path, output_folder, source_root),
+                                                       suffix)):
+            changed.append((kind, path))
+        reporter.advance()
+        check_cancelled(cancel)
+    return changed
+
+
+def convert_files(folder_path, format_choice, image_folder_path, output_folder, options=None, index=None,
+                  warn=None, progress=None, cancel=None, metrics=None, diagnostics=None):
+    """转换主逻辑，返回成功转换的文件数
+
+    options 为 ConvertOptions（未提供时全部使用默认设置），各项设置与可选功能见 options 模块；
+    index 为已构建的 DatasetIndex，未提供时在此解析一次文件夹，之后的校验与转换都不再读取标注文件；
+    warn 用于接收不影响整体流程的警告，默认写入日志；找不到图像的文件会被跳过，结束时汇总为一条警告；
+    image_folder_path 只扫描一次建立索引；
+    progress 接收各阶段的 ProgressEvent；cancel.is_set() 为真时在文件之间停止并抛出 ConversionCancelled；
+    metrics 为 RunMetrics 时记录各步骤与各阶段的耗时、读写字节数、最慢的文件与跳过原因（见 instrument 模块）。
+    diagnostics 为 Diagnostics 时逐文件记录解析或转换失败、找不到图像等问题，出错的文件按其策略跳过或停止；
+    未提供时遇到第一个解析或转换失败的文件（按文件顺序）抛出 ConversionError。
+    folder_path 与 image_folder_path 也可以是 zip/tar 压缩包，成员按与文件夹相同的规则读取，不解压到磁盘。
+    增量转换中断后再次运行从中断处继续。
+    流水线的写出队列最多等待 read_ahead 个文件、合计 64 MB 的文本；流水线与输出分片都先在内存中收集
+    每个文件的输出，超过 archive.CAPTURE_SPILL_SIZE 的输出（如嵌入图像数据的 LabelMe JSON）转存到
+    系统临时文件夹，内存占用不随图像大小增长，但需要临时磁盘空间。
+    多机分片转换结束时在输出文件夹中写入该分片的报告，全部分片完成后用 sharding.merge_reports 合并。
+    """
+    options = options if options is not None else ConvertOptions()
+    _check_options(options, format_choice, folder_path, image_folder_path, index)
+    diagnostics = diagnostics if diagnostics is not None else Diagnostics()
+    warn = warn or logger.warning
+    source_format = options.source_format
+    incremental = options.incremental
+    shard = options.shard
+    source_archive = _source_archive(options, folder_path, index)
+    # 共享上下文（包括之后建立的图像索引）只传给每个工作进程一次
+    context = {
+        'format_choice': format_choice,
+        'output_folder': output_folder,
+        'image_index': None,
+        'label_mapping': compile_mapping(options.label_mapping),
+        'size_cache': options.size_cache,
+        'image_data_mode': options.image_data_mode,
+        'precision': options.precision,
+        'clip': options.clip,
+        # 不为 None 时输出文件夹中保持源文件相对该文件夹的子文件夹结构；
+        # COCO 来源总是保持 file_name 中的子文件夹，不同子文件夹中的同名图像不会输出到同一个文件
+        'source_root': _source_root(folder_path, source_format, options.recursive),
+        # 不为 None 时输出写入内存，由主进程写入该格式的输出分片
+        'output_archive': options.output_archive.archive_format if options.output_archive is not None else None,
+    }
+    tracker = None
+    if incremental is not None:
+        # 影响输出内容的设置，变化后清单中的全部记录失效
+        settings = {key: context[key] for key in
+                    ('format_choice', 'label_mapping', 'image_data_mode', 'precision', 'clip')}
+        settings.update(source_format=source_format, recursive_images=options.recursive_images,
+                        recursive=options.recursive,
+                        image_folder=os.path.abspath(image_folder_path) if image_folder_path else None)
+        tracker = Manifest(incremental.manifest, settings, incremental.hash_sources)
+    if metrics is not None:
+        metrics.info.update(folder=folder_path, format_choice=format_choice, source_format=source_format,
+                            output_folder=output_folder, workers=options.workers,
+                            incremental=incremental is not None, recursive=options.recursive,
+                            stream=options.stream, output_archive=context['output_archive'],
+                            pipeline=options.pipeline is not None)
+    run = _Run(context, options, image_folder_path, warn, progress, cancel, tracker, metrics, diagnostics)
+    if options.output_archive is not None:
+        # 多个分片可以写入同一个输出文件夹
+        prefix = f"part-{shard.index:05d}-" if shard is not None else ''
+        run.shards = ShardWriter(output_folder, options.output_archive.archive_format,
+                                 options.output_archive.shard_size, prefix)
+    elif options.pipeline is not None and format_choice in OUTPUT_SUFFIXES:
+        run.writer = WriteBehind(options.pipeline.read_ahead)
+    try:
+        with recording(metrics) if metrics is not None else nullcontext():
+            if options.stream:
+                tasks = iter_source_tasks(folder_path, source_format, options.recursive, options.include,
+                                          options.exclude)
+                converted, tasks = _stream_convert(tasks, run)
+            else:
+                index, tasks = _build_index(folder_path, index, run, source_archive)
+                if options.auto_ids:
+                    context['label_mapping'], names = assign_class_ids(index, context['label_mapping'])
+                    os.makedirs(output_folder, exist_ok=True)
+                    save_mapping(auto_assign(names), os.path.join(output_folder, CLASSES_FILE_NAME))
+                if tracker is not None:
+                    logger.info("增量转换：%d 个文件未变化，已跳过；%d 个文件需要转换",
+                                len(tasks) - len(index), len(index))
+                    if metrics is not None:
+                        metrics.skip('unchanged', len(tasks) - len(index))
+
+                converted = _convert_index(index, run)
+                if shard is not None:
+                    _write_shard_report(index, run, converted)
+            if tracker is not None and incremental.delete_orphans:
+                for removed in tracker.remove_orphans(path for _, path in tasks):
+                    logger.info("源文件已不存在，删除输出文件 %s", removed)
+            if options.mapping_file:
+                save_mapping(context['label_mapping'], options.mapping_file)
+            return converted
+    finally:
+        if run.writer is not None:
+            run.writer.close()
+        if run.shards is not None:
+            paths = run.shards.close()
+            logger.info("已将 %d 个输出文件写入 %d 个分片", run.shards.members, len(paths))
+        if tracker is not None:
+            tracker.close()
+
+
+def _source_root(folder_path, source_format, recursive):
+    """输出中保持子文件夹结构时源文件的根文件夹：COCO 来源为 COCO 文件所在的文件夹"""
+    if source_format == 'coco':
+        return os.path.dirname(folder_path)
+    return folder_path if recursive else None
+
+
+def _source_archive(options, folder_path, index):
+    """标注是否从压缩包 folder_path 中读取"""
+    return options.source_format != 'coco' and index is None and is_archive(folder_path)
+
+
+def _check_options(options, format_choice, folder_path, image_folder_path, index):
+    """检查各项设置能否一起用于这次转换，不能时抛出 ConversionError"""
+    source_format = options.source_format
+    whole_dataset = format_choice in (STORE_FORMAT, COCO_FORMAT)
+    incremental = options.incremental is not None
+    if options.image_data_mode not in IMAGE_DATA_MODES:
+        raise ConversionError(f"不支持的 imageData 写法: {options.image_data_mode}")
+    if (options.image_data_mode == 'reference' and format_choice in ("XML 转 JSON", "YOLO 转 JSON")
+            and image_folder_path and is_archive(image_folder_path)):
+        raise ConversionError(_ARCHIVE_REFERENCE_MESSAGE)
+    if incremental and format_choice not in FORMAT_OPTIONS:
+        raise ConversionError(f"不支持的转换格式: {format_choice}")
+    if incremental and (whole_dataset or source_format == 'coco'):
+        raise ConversionError("数据集存储与 COCO 文件每次都包含全部标注，不支持增量转换。")
+    if options.stream and (format_choice not in OUTPUT_SUFFIXES or source_format in (None, 'coco')
+                           or index is not None):
+        raise ConversionError("边遍历边转换需要指定 JSON、XML 或 YOLO 源格式，且只支持逐文件输出的转换格式。")
+    if options.output_archive is not None:
+        if options.output_archive.archive_format not in SHARD_FORMATS:
+            raise ConversionError(f"不支持的分片格式: {options.output_archive.archive_format}")
+        if whole_dataset:
+            raise ConversionError("数据集存储与 COCO 文件不能写入输出分片。")
+    if incremental and (_source_archive(options, folder_path, index) or options.output_archive is not None):
+        raise ConversionError("压缩包来源或输出分片不支持增量转换。")
+    if options.auto_ids and (incremental or options.stream):
+        raise ConversionError("自动编号需要全部标签，不能与增量转换或边遍历边转换一起使用。")
+    if options.shard is not None:
+        check_shard(options.shard.index, options.shard.count)
+        if whole_dataset:
+            raise ConversionError("数据集存储与 COCO 文件包含全部标注，不支持分片转换。")
+        if incremental or options.stream or options.auto_ids:
+            raise ConversionError("分片转换不支持增量转换、边遍历边转换与自动编号（可用 --map-file 固定类别编号）。")
+
+
+class _Run:
+    """一次转换中各步骤共用的状态：共享上下文、设置、回调与清单，以及逐文件的输出交给谁写出"""
+    __slots__ = ('context', 'options', 'image_folder_path', 'warn', 'progress', 'cancel', 'tracker', 'metrics',
+                 'diagnostics', 'shards', 'writer')
+
+    def __init__(self, context, options, image_folder_path, warn, progress, cancel, tracker, metrics, diagnostics):
+        self.context = context
+        self.options = options
+        self.image_folder_path = image_folder_path
+        self.warn = warn
+        self.progress = progress
+        self.cancel = cancel
+        self.tracker = tracker
+        self.metrics = metrics
+        self.diagnostics = diagnostics
+        # 不为 None 时逐文件的输出写入输出分片（archive.ShardWriter）或交给写出线程（pipeline.WriteBehind）
+        self.shards = None
+        self.writer = None
+
+    def prefetch(self, tasks):
+        """启用流水线时用 pipeline.prefetch 包装任务，提前读入文件内容"""
+        pipeline = self.options.pipeline
+        if pipeline is None:
+            return tasks
+        return prefetch(tasks, pipeline.threads, pipeline.read_ahead)
+
+    def in_shard(self, path, folder_path):
+        return in_shard(path, folder_path, self.options.shard.index, self.options.shard.count)
+
+
+def _build_index(folder_path, index, run, source_archive):
+    """解析（或筛选已有的）index，返回 (要转换的 DatasetIndex, 全部源文件的 (类型, 路径))
+
+    增量转换时只保留需要转换的文件；多机分片时只保留属于该分片的文件。
+    """
+    options, metrics, tracker = run.options, run.metrics, run.tracker
+    source_format, shard = options.source_format, options.shard
+    format_choice, output_folder = run.context['format_choice'], run.context['output_folder']
+    if index is None and source_format == 'coco':
+        # folder_path 为 COCO 文件，按图像拆分为与 LabelMe JSON 相同的像素坐标标注
+        with phase(metrics, 'parse'):
+            select = (lambda path: run.in_shard(path, os.path.dirname(folder_path))) if shard is not None else None
+            annotations = read_coco(folder_path, format_choice in _COCO_POLYGON_FORMATS, select)
+        return DatasetIndex(os.path.dirname(folder_path), annotations), []
+    if source_archive:
+        # 按成员顺序边读出边解析，解析后再按文件夹相同的顺序排列
+        tasks = iter_source_tasks(folder_path, source_format, options.recursive, options.include, options.exclude)
+        if shard is not None:
+            tasks = select_shard(tasks, folder_path, shard.index, shard.count)
+        with phase(metrics, 'parse'):
+            index = DatasetIndex.parse(folder_path, run.prefetch(tasks), options.workers, options.chunksize,
+                                       run.progress, run.cancel, metrics, sort=True, diagnostics=run.diagnostics)
+        return index, []
+    if index is None:
+        with phase(metrics, 'list'):
+            tasks = list_source_tasks(folder_path, source_format, options.recursive, options.include,
+                                      options.exclude)
+            if shard is not None:
+                tasks = list(select_shard(tasks, folder_path, shard.index, shard.count))
+        selected = tasks
+        if tracker is not None:
+            with phase(metrics, 'check'):
+                selected = select_changed(tracker, tasks, format_choice, output_folder,
+                                          run.progress, run.cancel, run.context['source_root'])
+        with phase(metrics, 'parse'):
+            index = DatasetIndex.parse(folder_path, run.prefetch(selected), options.workers, options.chunksize,
+                                       run.progress, run.cancel, metrics, diagnostics=run.diagnostics)
+        return index, tasks
+    if source_format is not None:
+        index = index.only(source_format)
+    if shard is not None:
+        index = DatasetIndex(index.folder_path, [annotation for annotation in index.annotations
+                                                 if run.in_shard(annotation.path, index.folder_path)])
+    tasks = [(annotation.kind, annotation.path) for annotation in index.annotations]
+    if tracker is not None:
+        with phase(metrics, 'check'):
+            selected = {path for _, path in select_changed(tracker, tasks, format_choice, output_folder,
+                                                           run.progress, run.cancel, run.context['source_root'])}
+        index = DatasetIndex(index.folder_path, [a for a in index.annotations if a.path in selected])
+    return index, tasks
+
+
+def _write_shard_report(index, run, converted):
+    """在输出文件夹中写入分片报告：各分片相同的转换设置、该分片实际使用的标签映射、统计与诊断"""
+    from .stats import compute_stats
+    context, options, diagnostics = run.context, run.options, run.diagnostics
+    label_mapping = context['label_mapping']
+    parse_errors = [item.path for item in diagnostics.items if item.reason == 'parse']
+    info = {'format_choice': context['format_choice'], 'source_format': options.source_format,
+            'recursive': options.recursive}
+    write_shard_report(shard_report_path(context['output_folder'], options.shard.index, options.shard.count),
+                       options.shard.index, options.shard.count, info, converted,
+                       compile_mapping(label_mapping, index.labels),
+                       compute_stats(index, label_mapping, parse_errors=parse_errors), diagnostics)
+
+
+def assign_class_ids(index, label_mapping):
+    """为 index 中 JSON/XML 标注的（映射后）标签按名称分配连续编号
+
+    返回 (原标签 -> 编号 的 LabelTable, 按编号排列的类别名)；多个原标签映射为同一个名称时共用一个编号。
+    """
+    names = sorted(index.labels_of(('json', 'xml'), label_mapping))
+    class_ids = auto_assign(names)
+    labels = {shape.label for kind in ('json', 'xml') for annotation in index.by_kind[kind]
+              for shape in annotation.shapes}
+    return LabelTable({label: class_ids[label_mapping[label]] for label in labels}), names
+
+
+def _with_image_index(context, run):
+    """需要图像时（转为 JSON，或提供了图像文件夹的 YOLO 转 XML、数据集存储与 COCO）扫描图像文件夹建立索引"""
+    format_choice = context['format_choice']
+    image_folder_path = run.image_folder_path
+    if format_choice in ("XML 转 JSON", "YOLO 转 JSON") or \
+            (format_choice in ("YOLO 转 XML", STORE_FORMAT, COCO_FORMAT) and image_folder_path):
+        with phase(run.metrics, 'image_index'):
+            return dict(context, image_index=ImageIndex(image_folder_path, run.options.recursive_images))
+    return context
+
+
+def _convert_index(index, run):
+    """校验并转换 index 中的全部标注文件，清单不为 None 时在其中记录转换成功的文件，
+    run.shards 或 run.writer 不为 None 时输出交给它们写出，逐文件的问题记入 run.diagnostics"""
+    context, metrics = run.context, run.metrics
+    format_choice = context['format_choice']
+    label_mapping = context['label_mapping']
+    with phase(metrics, 'validate'):
+        # 检查 YOLO 格式转换时标签是否为数字；数据集存储的类别编号来自全部类型的标注（包括 YOLO），且须为整数
+        if format_choice in YOLO_FORMATS:
+            kinds = ('json', 'xml', 'yolo') if format_choice == STORE_FORMAT else ('json', 'xml')
+            all_labels = index.labels_of(kinds, label_mapping)
+            non_numeric_labels = [label for label in all_labels if not is_numeric_label(label)]
+            if non_numeric_labels:
+                raise NonNumericLabelError(non_numeric_labels, all_labels)
+            if format_choice == STORE_FORMAT:
+                fractional_labels = sorted(label for label in all_labels if not is_class_id(label))
+                if fractional_labels:
+                    raise ConversionError(f"数据集存储的类别编号必须为整数: {', '.join(fractional_labels)}")
+
+        validate(format_choice, index.by_kind['json'], index.by_kind['xml'], index.by_kind['yolo'])
+
+        # 如果选择了 "JSON 转 XML"，先检查所有 JSON 文件是否包含非 rectangle 的 shape_type
+        if format_choice == "JSON 转 XML" and not index.json_all_rectangle():
+            raise ConversionError("文件夹中包含非矩形标注 (shape_type 不是 rectangle)，无法进行转换！")
+
+    context = _with_image_index(context, run)
+    # 查找表中包含全部标签，转换时每个标签只做一次字典查找
+    context = dict(context, label_mapping=compile_mapping(label_mapping, index.labels))
+
+    if format_choice in (STORE_FORMAT, COCO_FORMAT):
+        with phase(metrics, 'write'):
+            if format_choice == STORE_FORMAT:
+                written = write_store(index.annotations, context, run.progress, run.cancel)
+                outputs = [entry.path for entry in os.scandir(context['output_folder'])]
+            else:
+                written = write_coco(index.annotations, context, run.progress, run.cancel)
+                outputs = [os.path.join(context['output_folder'], COCO_FILE_NAME)]
+        if metrics is not None:
+            for path in outputs:
+                metrics.add_written(path)
+        return written
+
+    os.makedirs(context['output_folder'], exist_ok=True)
+    task_func = _task_func(convert_task, metrics, run.shards or run.writer)
+    reporter = ProgressReporter(run.progress, "转换", len(index))
+    with phase(metrics, 'convert'):
+        results = run_tasks_paired(task_func, index.annotations, context, run.options.workers,
+                                   run.options.chunksize)
+        return _collect_results(((annotation.path, result) for annotation, result in results), run, reporter)
+
+
+def _task_func(func, metrics, capture):
+    """按需包装逐文件任务：输出由主进程写出时收集输出（Captured），记录统计时计时（Instrumented）"""
+    if capture is not None:
+        func = Captured(func)
+    if metrics is not None:
+        func = Instrumented(func)
+    return func
+
+
+def _stream_convert(tasks, run):
+    """边遍历边解析并转换 iter_source_tasks 产出的文件，返回 (成功转换的文件数, 遍历到的全部 (类型, 路径))
+
+    遍历到的文件只在启用增量转换时记录（用于删除已不存在的源文件的输出）；
+    启用流水线时提前读入跳过未变化文件后的任务的内容（见 pipeline.prefetch）。
+    """
+    context, tracker, metrics = run.context, run.tracker, run.metrics
+    format_choice = context['format_choice']
+    source_format = run.options.source_format
+    validate(format_choice, *[[True] if kind == source_format else [] for kind in ('json', 'xml', 'yolo')])
+    context = _with_image_index(context, run)
+    os.makedirs(context['output_folder'], exist_ok=True)
+    suffix = OUTPUT_SUFFIXES[format_choice]
+    seen = []
+
+    def discovered():
+        for task in tasks:
+            kind, path = task[:2]
+            if tracker is not None:
+                seen.append((kind, path))
+                output_file = output_path(path, output_folder_for(path, context['output_folder'],
+                                                                  context['source_root']), suffix)
+                if not tracker.needs_conversion(path, output_file):
+                    if metrics is not None:
+                        metrics.skip('unchanged')
+                    continue
+            yield task
+
+    task_func = _task_func(stream_task, metrics, run.shards or run.writer)
+    reporter = ProgressReporter(run.progress, "转换", None)
+    with phase(metrics, 'convert'):
+        results = run_tasks_paired(task_func, run.prefetch(discovered()), context, run.options.workers,
+                                   run.options.chunksize)
+        converted = _collect_results(results, run, reporter, read=True)
+    reporter.finish()
+    return converted, seen
+
+
+def _collect_results(results, run, reporter, read=False):
+    """按顺序处理逐文件任务的 (源文件路径, 结果)，返回成功转换的文件数
+
+    read 为 True 时任务中同时解析了源文件（边遍历边转换），源文件为对应的 (类型, 路径[, 内容]) 任务，
+    统计读取的字节数；run.shards 不为 None 时将任务收集的输出写入其中；run.writer 不为 None 时将输出交给
+    写出线程，写出完成后才在清单中记录。
+    失败的文件记入 run.diagnostics，按其策略跳过或停止。
+    """
+    context, tracker, metrics, diagnostics = run.context, run.tracker, run.metrics, run.diagnostics
+    shards, writer = run.shards, run.writer
+    source_root = context['source_root']
+    suffix = OUTPUT_SUFFIXES[context['format_choice']]
+    converted = 0
+    missing_images = []
+    for path, result in results:
+        if read:
+            task, path = path, path[1]
+        if metrics is not None:
+            result, seconds, snapshot = result
+            metrics.add_file('convert', path, seconds, snapshot)
+            if read:
+                metrics.add_read(path, task_size(task))
+        if shards is not None or writer is not None:
+            result, outputs = result
+            if result[0] is not None:
+                discard_outputs(outputs)
+        level, message = result
+        if level == 'non_numeric':
+            diagnostics.error(path, 'non_numeric', f"文件 {path} 映射后仍有非数字标签: {', '.join(message)}",
+                              NonNumericLabelError(message, message))
+        elif level in ('error', 'parse_error'):
+            if metrics is not None:
+                metrics.error(path, message)
+            diagnostics.error(path, 'parse' if level == 'parse_error' else 'convert', message)
+        elif level == 'missing_image':
+            missing_images.append(message)
+            diagnostics.warning(path, 'missing_image', f"文件 {path} 找不到对应的图像")
+            if metrics is not None:
+                metrics.skip('missing_image')
+        elif writer is not None:
+            converted += 1
+            writer.add(path, outputs)
+        else:
+            converted += 1
+            if tracker is not None:
+                tracker.record(path)
+            if shards is not None:
+                for output_file, text in outputs:
+                    name = os.path.relpath(output_file, context['output_folder']).replace(os.sep, '/')
+                    size = shards.add_output(name, text)
+                    if metrics is not None:
+                        metrics.add_written(output_file, size)
+            elif metrics is not None:
+                output_folder = output_folder_for(path, context['output_folder'], source_root)
+                metrics.add_written(output_path(path, output_folder, suffix))
+        if writer is not None:
+            _record_written(writer.completed(), tracker, metrics)
+        reporter.advance()
+        check_cancelled(run.cancel)
+    if writer is not None:
+        writer.close()
+        _record_written(writer.completed(), tracker, metrics)
+        if metrics is not None and writer.files:
+            metrics.add('write_behind', writer.seconds, writer.files)
+    if missing_images:
+        run.warn(missing_images_message(missing_images))
+    return converted
+
+
+def _record_written(completed, tracker, metrics):
+    """写出线程完成的 (源文件, [输出路径, ...])：在清单中记录并统计写入的字节数"""
+    for source, output_files in completed:
+        if tracker is not None:
+            tracker.record(source)
+        if metrics is not None:
+            for output_file in output_files:
+                metrics.add_written(output_file)
+
+
+@timed('write_txt')
+def write_txt(annotation, format_choice, output_folder, label_mapping=None, precision=None, clip=False):
+    """将标注写为 YOLO检测/分割格式的 TXT 文件
+
+    YOLO检测只输出矩形（像素坐标的中心点与宽高），YOLO分割只输出多边形（顶点按图像宽高归一化）。
+    一个文件中的全部框或顶点合并为一个数组一次计算，每行只拼接一次；
+    precision 为保留的小数位数，None 时与 str() 的输出相同；clip 为 True 时先将坐标限制在图像范围内。
+    """
+    from . import geometry  # 用到时才导入 NumPy，import labelconverter 不加载它
+    output_file = output_path(annotation.path, output_folder, '.txt')
+    image_width = annotation.image_width or 1
+    image_height = annotation.image_height or 1
+    # 未映射的标签直接使用原始的标签名
+    label_mapping = compile_mapping(label_mapping)
+
+    lines = []
+    if format_choice == "YOLO检测":
+        shapes = [shape for shape in annotation.shapes if shape.shape_type == 'rectangle']
+        if shapes:
+            values = list(chain.from_iterable(chain.from_iterable(shape.points[:2] for shape in shapes)))
+            boxes = geometry.as_boxes(values)
+            if clip:
+                boxes = geometry.clip_boxes(boxes, image_width, image_height)
+            centers, sizes = geometry.xyxy_to_center_size(boxes)
+            if not clip and boxes.dtype.kind == 'f' and int in set(map(type, values)):
+                # 整数与浮点坐标混用时逐框相减，两端都是整数的宽高仍输出为整数
+                sizes = geometry.as_objects([[xmax - xmin, ymax - ymin]
+                                             for xmin, ymin, xmax, ymax in zip(*[iter(values)] * 4)])
+            # 输出为 YOLO 格式：class_id center_x center_y width height
+            rows = geometry.format_rows((centers, sizes), precision)
+            lines = [f"{label_mapping[shape.label]} {row}\n" for shape, row in zip(shapes, rows)]
+    elif format_choice == "YOLO分割":
+        shapes = [shape for shape in annotation.shapes if shape.shape_type == 'polygon']
+        lengths = [len(shape.points) for shape in shapes]
+        if sum(lengths):
+            points = geometry.as_points([point for shape in shapes for point in shape.points])
+            points = geometry.normalize(points, image_width, image_height)
+            if clip:
+                points = geometry.clip(points, 1, 1)
+            groups = geometry.format_groups(points, lengths, precision)
+        else:
+            groups = [''] * len(shapes)
+        # 每行为 class_id x1 y1 x2 y2 ...，行尾保留一个空格
+        for shape, group in zip(shapes, groups):
+            class_id = label_mapping[shape.label]
+            lines.append(f"{class_id} {group} \n" if group else f"{class_id} \n")
+
+    with open_output(output_file) as out_file:
+        out_file.write(''.join(lines))
+
+
+@timed('write_xml')
+def write_xml(annotation, output_folder, label_mapping=None, image_file=None, size_cache=None):
+    """将矩形标注写为 VOC XML 文件
+
+    图像文件名与尺寸取自标注本身，缺少时取自 image_file（只读取文件头或 size_cache），
+    两者都没有时省略 filename 与 size 块；depth 为从 image_file 文件头读出的通道数，未知时为 3。
+    """
+    # 只支持 rectangle 转换
+    if any(shape.shape_type != 'rectangle' for shape in annotation.shapes):
+        if annotation.kind == 'yolo':
+            raise ConversionError(f"文件 {annotation.path} 包含分割格式，无法转换为 XML。")
+        raise ConversionError("JSON 文件中包含非矩形标注 (shape_type 不是 rectangle)，无法进行转换！")
+
+    objects = []
+    label_mapping = compile_mapping(label_mapping)
+    for shape in annotation.shapes:
+        (xmin, ymin), (xmax, ymax) = shape.points[:2]
+        # 使用用户提供的标签映射
+        label = label_mapping[shape.label]
+        objects.append((label, xmin, ymin, xmax, ymax))
+
+    filename = size = depth = None
+    if annotation.image_path:
+        filename = os.path.basename(annotation.image_path.replace('\\', '/'))
+    elif image_file:
+        filename = os.path.basename(image_file)
+    if annotation.image_width and annotation.image_height:
+        size = (annotation.image_width, annotation.image_height)
+    elif image_file:
+        width, height, depth = get_image_info(image_file, size_cache)
+        size = (width, height)
+
+    # 保存为 XML 文件
+    xml_file = output_path(annotation.path, output_folder, '.xml')
+    write_voc(xml_file, objects, filename, size, depth)
+    logger.info("文件 %s 已成功转换为 %s", annotation.path, xml_file)
+
+
+def format_points_json(points, lengths):
+    """将合并在一起的 (N, 2) 顶点数组按 lengths 拆分，每组格式化为与 json.dumps(indent=4) 相同的 points 文本"""
+    from . import geometry
+    key_indent, point_indent, value_indent = _POINTS_INDENT
+    point_format = f"{point_indent}[\n{value_indent}%s,\n{value_indent}%s\n{point_indent}]"
+    return [f"[\n{group}\n{key_indent}]" if group else "[]"
+            for group in geometry.format_groups(points, lengths, point_format=point_format, separator=",\n")]
+
+
+@timed('write_json')
+def write_json(annotation, output_folder, image_file, size_cache=None, image_data_mode='embed'):
+    """将标注写为 LabelMe JSON 文件，图像尺寸只从文件头读取（或取自 size_cache）
+
+    image_data_mode 为 'embed' 时将图像按块编码为 Base64 直接写入文件；
+    为 'reference' 时 imageData 为 null，imagePath 为相对输出文件夹的路径（图像不能来自压缩包）；
+    为 'omit' 时 imageData 为 null，imagePath 只保留文件名。
+    XML 的矩形坐标取整；YOLO 多边形的归一化顶点按图像宽高还原。
+    """
+    from . import geometry
+    image_width, image_height = get_image_size(image_file, size_cache)
+
+    # YOLO 多边形的归一化顶点合并为一个数组，一次还原为像素坐标；
+    # 顶点直接格式化为 JSON 文本，不经过 json.dumps 带缩进时逐个元素的纯 Python 编码
+    polygons = {}
+    if annotation.kind == 'yolo':
+        polygon_shapes = [shape for shape in annotation.shapes if shape.shape_type == 'polygon']
+        lengths = [len(shape.points) for shape in polygon_shapes]
+        if sum(lengths):
+            points = geometry.as_points([point for shape in polygon_shapes for point in shape.points])
+            points = geometry.denormalize(points, image_width, image_height)
+            if geometry.all_finite(points):
+                groups = format_points_json(points, lengths)
+            else:  # NaN 与无穷大交给 json.dumps 按其约定输出
+                groups = geometry.split_points(points, lengths)
+            polygons = dict(zip(map(id, polygon_shapes), groups))
+    formatted_points = []
+
+    shapes = []
+    for shape in annotation.shapes:
+        if annotation.kind == 'xml':
+            points = [[int(x), int(y)] for x, y in shape.points]
+        elif annotation.kind == 'yolo' and shape.shape_type == 'polygon':
+            points = polygons.get(id(shape), [])
+            if isinstance(points, str):
+                formatted_points.append(points)
+                points = f"{_POINTS_TOKEN}{len(formatted_points) - 1}"
+        else:
+            points = shape.points
+        shapes.append({
+            "label": str(shape.label),
+            "points": points,
+            "group_id": None,
+            "shape_type": shape.shape_type,
+            "flags": {}
+        })
+
+    if image_data_mode == 'reference':
+        if split_member(image_file) is not None:
+            raise ConversionError(_ARCHIVE_REFERENCE_MESSAGE)
+        image_path = os.path.relpath(image_file, output_folder)
+    else:
+        image_path = os.path.basename(image_file)  # 从图像文件路径中提取文件名
+    embed = image_data_mode == 'embed'
+
+    # 创建符合 LabelMe 的 JSON 数据
+    json_data = {
+        "version": "5.0.2.1",
+        "flags": {},
+        "shapes": shapes,  # 包含所有形状
+        "imagePath": image_path,
+        "imageData": _IMAGE_DATA_TOKEN if embed else None,
+        "imageHeight": image_height,
+        "imageWidth": image_width,
+    }
+    text = json.dumps(json_data, indent=4)
+    if formatted_points:
+        text = _POINTS_TOKEN_PATTERN.sub(lambda match: formatted_points[int(match.group(1))], text)
+
+    # 将数据写入 JSON 文件，Base64 编码后的图像数据在写入时流式生成
+    json_file = output_path(annotation.path, output_folder, '.json')
+    with open_output(json_file) as f:
+        if embed:
+            # imageData 位于 shapes 之后，取最后一个占位符即可
+            head, _, tail = text.rpartition(json.dumps(_IMAGE_DATA_TOKEN))
+            f.write(head + '"')
+            write_image_base64(image_file, f)
+            f.write('"' + tail)
+        else:
+            f.write(text)
+
+    logger.info("文件 %s 已成功转换为 %s", annotation.path, json_file)
+
+
+def write_store(annotations, context, progress=None, cancel=None):
+    """将全部标注写入输出文件夹中的列式数据集存储，返回写入的图像数
+
+    标签经映射后作为整数类别编号；矩形框保存为像素坐标的 xyxy，多边形顶点按图像宽高归一化
+    （YOLO 多边形本身已归一化）。标注中没有图像尺寸时，从图像索引中对应图像的文件头读取。
+    递归转换子文件夹时，图像名称为标注文件的相对路径（不含后缀）。
+    """
+    from . import geometry
+    from .store import StoreWriter
+    label_mapping = context['label_mapping']
+    image_index = context['image_index']
+    source_root = context['source_root']
+    size_cache = open_cache(context['size_cache'])
+    # 每个标签只转换一次整数类别编号
+    class_ids = {label: int(float(label_mapping[label]))
+                 for label in {shape.label for annotation in annotations for shape in annotation.shapes}}
+    writer = StoreWriter(context['output_folder'])
+    reporter = ProgressReporter(progress, "写入", len(annotations))
+    for annotation in annotations:
+        width, height = annotation.image_width, annotation.image_height
+        relative = relative_stem(annotation.path, source_root) if source_root is not None else None
+        if not (width and height) and image_index is not None:
+            image_file = image_index.find(annotation.path, relative)
+            if image_file:
+                width, height = get_image_size(image_file, size_cache)
+
+        boxes = []
+        polygons = []
+        for shape in annotation.shapes:
+            class_id = class_ids[shape.label]
+            if shape.shape_type == 'rectangle':
+                (xmin, ymin), (xmax, ymax) = shape.points[:2]
+                boxes.append((class_id, xmin, ymin, xmax, ymax))
+            elif shape.shape_type == 'polygon' and shape.points:
+                points = geometry.as_points(shape.points)
+                if annotation.kind != 'yolo':
+                    points = geometry.normalize(points, width or 1, height or 1)
+                polygons.append((class_id, points))
+        writer.add(relative or os.path.splitext(annotation.name)[0], width, height, boxes, polygons)
+        reporter.advance()
+        check_cancelled(cancel)
+    writer.close()
+    logger.info("已将 %d 个标注文件写入数据集存储 %s", len(annotations), context['output_folder'])
+    return len(annotations)
+
+
+def write_coco(annotations, context, progress=None, cancel=None):
+    """将全部标注写为输出文件夹中的一个 COCO 文件，返回写入的图像数
+
+    标签经映射后作为类别名，类别编号见 coco.category_ids；图像尺寸与文件名取自标注本身，
+    缺少时取自图像索引中对应的图像。YOLO 多边形按图像宽高还原为像素坐标，图像尺寸未知时跳过这些多边形并警告。
+    """
+    from . import geometry
+    label_mapping = context['label_mapping']
+    image_index = context['image_index']
+    source_root = context['source_root']
+    size_cache = open_cache(context['size_cache'])
+    categories = category_ids({label_mapping[shape.label]
+                               for annotation in annotations for shape in annotation.shapes})
+    writer = CocoWriter(os.path.join(context['output_folder'], COCO_FILE_NAME))
+    reporter = ProgressReporter(progress, "写入", len(annotations))
+    written = 0
+    no_size = []
+    try:
+        for annotation in annotations:
+            width, height = annotation.image_width, annotation.image_height
+            relative = relative_stem(annotation.path, source_root) if source_root is not None else None
+            image_file = image_index.find(annotation.path, relative) if image_index is not None else None
+            if not (width and height) and image_file:
+                width, height = get_image_size(image_file, size_cache)
+            if annotation.image_path:
+                file_name = os.path.basename(annotation.image_path.replace('\\', '/'))
+            elif image_file:
+                file_name = os.path.basename(image_file)
+            else:
+                file_name = os.path.basename(relative or os.path.splitext(annotation.name)[0])
+            if relative is not None:
+                # 保持标注文件的子文件夹，不同子文件夹中的同名图像在 COCO 文件中不重名
+                file_name = posixpath.join(posixpath.dirname(relative), file_name)
+
+            # YOLO 多边形为归一化坐标，图像尺寸未知时无法还原
+            skip_polygons = annotation.kind == 'yolo' and not (width and height)
+            if skip_polygons and any(shape.shape_type == 'polygon' for shape in annotation.shapes):
+                no_size.append(annotation.name)
+            objects = []
+            for shape in annotation.shapes:
+                category_id = categories[label_mapping[shape.label]]
+                if shape.shape_type == 'rectangle':
+                    objects.append((category_id, 'rectangle', [value for point in shape.points[:2] for value in point]))
+                elif shape.shape_type == 'polygon' and len(shape.points) >= 3 and not skip_polygons:
+                    points = geometry.as_points(shape.points)
+                    if annotation.kind == 'yolo':
+                        points = geometry.denormalize(points, width, height)
+                    objects.append((category_id, 'polygon', points.ravel().tolist()))
+            writer.add_image(file_name, width, height, objects)
+            written += 1
+            reporter.advance()
+            check_cancelled(cancel)
+    finally:
+        writer.close(categories)
+    if no_size:
+        logger.warning("%d 个 YOLO 文件找不到图像尺寸（可指定图像文件夹），其中的多边形已跳过：%s",
+                       len(no_size), ", ".join(no_size[:20]))
+    logger.info("已将 %d 个标注文件写入 COCO 文件 %s", written, writer.path)
+    return written
+
+
+def convert_xml_to_yolo(xml_file, output_folder, label_mapping=None):
+    """将 XML 文件转换为 YOLO 格式 TXT 文件"""
+    write_txt(read_xml(xml_file), "YOLO检测", output_folder, label_mapping)
+
+
+def convert_json_to_txt(json_file, format_choice, output_folder, label_mapping=None):
+    """将 JSON 文件转换为 YOLO检测/分割格式的 TXT 文件"""
+    write_txt(read_json(json_file), format_choice, output_folder, label_mapping)
+
+
+def convert_json_to_xml(json_file, output_folder):
+    """将包含矩形标注的 JSON 转换为 XML"""
+    write_xml(read_json(json_file), output_folder)
+
+
+def convert_xml_to_json(xml_file, output_folder, image_file, image_data_mode='embed'):
+    """将包含矩形标注的 XML 转换为 LabelMe JSON 格式"""
+    write_json(read_xml(xml_file), output_folder, image_file, image_data_mode=image_data_mode)
+
+
+def convert_yolo_to_xml(yolo_file, output_folder, label_mapping=None):
+    """将 YOLO 矩形框格式转换为 XML 格式"""
+    write_xml(read_yolo(yolo_file), output_folder, label_mapping)
+
+
+def convert_yolo_to_json(yolo_file, output_folder, image_file, image_data_mode='embed'):
+    """将 YOLO 格式转换为 LabelMe JSON 格式，并从图像文件中读取信息"""
+    write_json(read_yolo(yolo_file), output_folder, image_file, image_data_mode=image_data_mode)
@@ -0,0 +1,21 @@
+"""转换过程中抛出的异常"""
+
+
+class ConversionError(Exception):
+    """转换无法继续时抛出，消息可直接展示给用户"""
+
+
+class NonNumericLabelError(ConversionError):
+    """YOLO 格式要求标签为数字，但数据中存在非数字标签"""
+
+    def __init__(self, labels, all_labels):
+        super().__init__("YOLO 格式要求标签为数字。请修改标签。")
+        self.labels = labels
+        self.all_labels = all_labels
+
+
+class ConversionCancelled(ConversionError):
+    """用户取消了正在进行的扫描或转换"""
+
+    def __init__(self):
+        super().__init__("转换已取消。")
@@ -0,0 +1,112 @@
+"""批量坐标变换：一个文件中的全部矩形框或多边形顶点合并为一个 NumPy 数组，一次完成计算
+
+点数组形状为 (N, 2)，每行 (x, y)；框数组形状为 (N, 4)，每行 (xmin, ymin, xmax, ymax) 或 (cx, cy, w, h)。
+全部为整数的坐标保持整数类型，因此宽高等差值的输出与逐点计算时相同。
+"""
+from itertools import chain
+
+import numpy as np
+
+
+def as_points(points):
+    """将 [[x, y], ...] 转为 (N, 2) 浮点数组"""
+    return np.fromiter(chain.from_iterable(points), np.float64, count=2 * len(points)).reshape(-1, 2)
+
+
+def as_boxes(values):
+    """将扁平的 [xmin, ymin, xmax, ymax, ...] 转为 (N, 4) 数组，全部为整数时保持整数类型"""
+    return np.array(values).reshape(-1, 4)
+
+
+def as_objects(rows):
+    """保留 Python 数值原样的二维数组（dtype=object），用于需要区分整数与浮点数的输出"""
+    return np.array(rows, dtype=object)
+
+
+def normalize(points, width, height):
+    """按图像宽高将像素坐标归一化到 [0, 1]"""
+    return points / np.array([width, height])
+
+
+def denormalize(points, width, height):
+    """将归一化坐标按图像宽高还原为像素坐标"""
+    return points * np.array([width, height])
+
+
+def clip(points, width, height):
+    """将点坐标限制在 [0, width] x [0, height] 内；归一化坐标传入 width = height = 1"""
+    return np.clip(points, 0, np.array([width, height]))
+
+
+def clip_boxes(boxes, width, height):
+    """将 xyxy 框的坐标限制在图像范围内"""
+    return np.clip(boxes, 0, np.array([width, height, width, height]))
+
+
+def xyxy_to_center_size(boxes):
+    """(xmin, ymin, xmax, ymax) -> ((cx, cy), (w, h)) 两个 (N, 2) 数组，整数坐标的宽高保持整数类型"""
+    mins, maxs = boxes[:, :2], boxes[:, 2:]
+    return (mins + maxs) / 2, maxs - mins
+
+
+def xyxy_to_cxcywh(boxes):
+    """(xmin, ymin, xmax, ymax) -> (cx, cy, w, h)"""
+    return np.concatenate(xyxy_to_center_size(boxes), axis=1)
+
+
+def cxcywh_to_xyxy(boxes):
+    """(cx, cy, w, h) -> (xmin, ymin, xmax, ymax)"""
+    centers, half = boxes[:, :2], boxes[:, 2:] / 2
+    return np.concatenate((centers - half, centers + half), axis=1)
+
+
+def value_format(precision=None):
+    """单个数值的 % 格式：precision 为 None 时为 %r（与 str() 相同），否则保留 precision 位小数"""
+    return '%r' if precision is None else f'%.{int(precision)}f'
+
+
+def format_rows(arrays, precision=None):
+    """将行数相同的若干二维数组按行拼接，每行格式化为以空格分隔的文本
+
+    分开传入而不是先合并，类型不同时各自保留原类型（整数不会被转为浮点数）。
+    每行只做一次 % 格式化，不逐个数值调用 str()。
+    """
+    if len({array.dtype for array in arrays}) > 1:
+        arrays = [array.astype(object) for array in arrays]
+    rows = np.concatenate(arrays, axis=1).tolist()
+    template = ' '.join([value_format(precision)] * sum(array.shape[1] for array in arrays))
+    return [template % tuple(row) for row in rows]
+
+
+def format_groups(points, lengths, precision=None, point_format='%s %s', separator=' '):
+    """将合并在一起的 (N, 2) 点数组按 lengths 拆分，每组格式化为一段文本
+
+    默认每组为 "x1 y1 x2 y2 ..."；point_format 为单个点的格式（两个 %s 分别代表 x 与 y），
+    separator 为点之间的分隔符。每组只做一次 % 格式化。
+    """
+    values = points.ravel().tolist()
+    fmt = value_format(precision)
+    point_template = point_format % (fmt, fmt)
+    groups = []
+    start = 0
+    for length in lengths:
+        end = start + 2 * length
+        groups.append(separator.join([point_template] * length) % tuple(values[start:end]))
+        start = end
+    return groups
+
+
+def all_finite(array):
+    """数组中是否没有 NaN 与无穷大"""
+    return bool(np.isfinite(array).all())
+
+
+def split_points(points, lengths):
+    """将合并在一起的 (N, 2) 点数组按 lengths 拆分为若干 [[x, y], ...] 列表"""
+    values = points.tolist()
+    groups = []
+    start = 0
+    for length in lengths:
+        groups.append(values[start:start + length])
+        start += length
+    return groups
@@ -0,0 +1,70 @@
+"""图像索引：扫描一次图像文件夹，之后按标注文件名直接查表找到对应图像"""
+import os
+
+from .archive import is_archive, open_reader
+
+# 支持的图像后缀（不区分大小写），同名图像按此顺序优先
+IMAGE_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff', '.webp']
+_EXTENSION_PRIORITY = {ext: i for i, ext in enumerate(IMAGE_EXTENSIONS)}
+
+
+class ImageIndex:
+    """文件名（不含后缀）-> 图像路径 的索引
+
+    recursive 为 True 时同时扫描子文件夹；同名图像优先选择后缀靠前的，其次是路径较短、字典序较小的。
+    递归扫描时另外按相对路径（不含后缀，以 / 分隔）建立索引，子文件夹中的同名图像可按相对路径区分。
+    folder_path 为压缩包时索引其中的图像成员，路径为 "压缩包路径/成员名"（见 archive 模块）。
+    """
+
+    def __init__(self, folder_path, recursive=False):
+        self.folder_path = folder_path
+        self.recursive = recursive
+        self.paths = {}
+        self.relative_paths = {}
+        ranks = {}
+        relative_ranks = {}
+        for path in self._scan(folder_path):
+            stem, ext = os.path.splitext(path)
+            base_name = os.path.basename(stem)
+            rank = (_EXTENSION_PRIORITY[ext.lower()], len(path), path)
+            if base_name not in ranks or rank < ranks[base_name]:
+                ranks[base_name] = rank
+                self.paths[base_name] = path
+            if recursive:
+                relative = os.path.relpath(stem, folder_path).replace(os.sep, '/')
+                if relative not in relative_ranks or rank < relative_ranks[relative]:
+                    relative_ranks[relative] = rank
+                    self.relative_paths[relative] = path
+
+    def _scan(self, folder_path):
+        if is_archive(folder_path):
+            for name in open_reader(folder_path).names():
+                if (self.recursive or '/' not in name) and \
+                        os.path.splitext(name)[1].lower() in _EXTENSION_PRIORITY:
+                    yield os.path.join(folder_path, name.replace('/', os.sep))
+            return
+        if not folder_path or not os.path.isdir(folder_path):
+            return
+        with os.scandir(folder_path) as entries:
+            subfolders = []
+            for entry in entries:
+                if entry.is_file():
+                    if os.path.splitext(entry.name)[1].lower() in _EXTENSION_PRIORITY:
+                        yield entry.path
+                elif self.recursive and entry.is_dir():
+                    subfolders.append(entry.path)
+        for subfolder in subfolders:
+            yield from self._scan(subfolder)
+
+    def __len__(self):
+        return len(self.paths)
+
+    def find(self, annotation_file, relative=None):
+        """根据标注文件找到对应的图像文件，找不到时返回 None
+
+        relative 为标注文件相对其数据文件夹的路径（不含后缀，以 / 分隔）时，优先查找相对路径相同的图像。
+        """
+        if relative is not None and relative in self.relative_paths:
+            return self.relative_paths[relative]
+        base_name = os.path.splitext(os.path.basename(annotation_file))[0]
+        return self.paths.get(base_name)
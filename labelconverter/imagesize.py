@@ -0,0 +1,195 @@
+"""只读取文件头获取图像尺寸（与通道数），并提供按 (路径, 大小, 修改时间) 持久缓存尺寸的磁盘缓存"""
+import io
+import os
+import sqlite3
+import struct
+import threading
+
+from .archive import open_binary
+from .instrument import timed
+
+# 带有图像尺寸的 JPEG 帧起始标记（SOF0-SOF15，不含 DHT、JPG 与 DAC）
+_JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+# 没有长度字段的 JPEG 标记
+_JPEG_STANDALONE_MARKERS = frozenset(range(0xD0, 0xD8)) | {0x01, 0xD8}
+# PNG 颜色类型 -> 通道数（与 Pillow 打开后的波段数相同）
+_PNG_CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+
+
+def _jpeg_info(f):
+    f.seek(2)
+    while True:
+        byte = f.read(1)
+        while byte and byte != b'\xff':
+            byte = f.read(1)
+        while byte == b'\xff':
+            byte = f.read(1)
+        if not byte:
+            return None
+        marker = byte[0]
+        if marker in _JPEG_SOF_MARKERS:
+            header = f.read(8)
+            if len(header) < 8:
+                return None
+            height, width = struct.unpack('>HH', header[3:7])
+            return width, height, header[7]
+        if marker in _JPEG_STANDALONE_MARKERS:
+            continue
+        if marker in (0xD9, 0xDA):  # 在 SOF 之前遇到 EOI 或扫描数据
+            return None
+        length = f.read(2)
+        if len(length) < 2:
+            return None
+        f.seek(struct.unpack('>H', length)[0] - 2, io.SEEK_CUR)
+
+
+def _bmp_channels(bit_count):
+    """BMP 每像素位数对应的通道数；32 位是否带 alpha 取决于后面的位掩码，视为未知"""
+    if bit_count <= 8:
+        return 1
+    return 3 if bit_count in (16, 24) else None
+
+
+def _header_info(head):
+    """由文件开头的字节解析 PNG、GIF、BMP 与 WebP 的 (宽, 高, 通道数)，通道数未知时为 None，无法识别时返回 None"""
+    if head.startswith(b'\x89PNG\r\n\x1a\n') and head[12:16] == b'IHDR':
+        return struct.unpack('>II', head[16:24]) + (_PNG_CHANNELS.get(head[25]),)
+    if head[:6] in (b'GIF87a', b'GIF89a'):
+        return struct.unpack('<HH', head[6:10]) + (1,)
+    if head.startswith(b'BM') and len(head) >= 26:
+        if struct.unpack('<I', head[14:18])[0] == 12:
+            return struct.unpack('<HH', head[18:22]) + (_bmp_channels(struct.unpack('<H', head[24:26])[0]),)
+        width, height = struct.unpack('<ii', head[18:26])
+        channels = _bmp_channels(struct.unpack('<H', head[28:30])[0]) if len(head) >= 30 else None
+        return width, abs(height), channels
+    if head.startswith(b'RIFF') and head[8:12] == b'WEBP' and len(head) >= 30:
+        chunk = head[12:16]
+        if chunk == b'VP8 ':
+            width, height = struct.unpack('<HH', head[26:30])
+            return width & 0x3FFF, height & 0x3FFF, 3
+        if chunk == b'VP8L':
+            b0, b1, b2, b3 = head[21:25]
+            return (1 + (((b1 & 0x3F) << 8) | b0), 1 + (((b3 & 0x0F) << 10) | (b2 << 2) | ((b1 & 0xC0) >> 6)),
+                    4 if b3 & 0x10 else 3)
+        if chunk == b'VP8X':
+            return (1 + int.from_bytes(head[24:27], 'little'), 1 + int.from_bytes(head[27:30], 'little'),
+                    4 if head[20] & 0x10 else 3)
+    return None
+
+
+def probe_stream(f):
+    """从可 seek 的二进制流读取图像的 (宽, 高, 通道数)，只读取文件头；其他格式交给 Pillow
+
+    通道数与 Pillow 打开后的波段数相同（灰度与调色板为 1，RGB 为 3，带 alpha 时加 1），文件头中没有时为 None。
+    """
+    head = f.read(32)
+    if head.startswith(b'\xff\xd8'):
+        info = _jpeg_info(f)
+    else:
+        info = _header_info(head)
+    if info is None:
+        from PIL import Image  # 仅在无法解析文件头时导入
+
+        f.seek(0)
+        with Image.open(f) as img:
+            info = img.size + (len(img.getbands()),)
+    return tuple(info)
+
+
+def probe_file(image_path):
+    """读取图像文件头（或压缩包中图像成员的头部），返回 (宽, 高, 通道数)"""
+    with open_binary(image_path) as f:
+        return probe_stream(f)
+
+
+def probe_bytes(data):
+    """从已读入内存的图像数据中解析 (宽, 高, 通道数)"""
+    return probe_stream(io.BytesIO(data))
+
+
+def default_cache_path():
+    """默认缓存文件位置：$XDG_CACHE_HOME/labelconverter/image_sizes.sqlite3"""
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_home, 'labelconverter', 'image_sizes.sqlite3')
+
+
+class ImageSizeCache:
+    """(绝对路径, 文件大小, 修改时间) -> (宽, 高, 通道数) 的 SQLite 缓存
+
+    文件大小或修改时间变化后旧记录自动失效。使用 WAL 模式，多个进程可同时读写同一个缓存文件。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS image_sizes (path TEXT PRIMARY KEY, "
+                          "size INTEGER, mtime_ns INTEGER, width INTEGER, height INTEGER, depth INTEGER)")
+        if 'depth' not in {row[1] for row in self.conn.execute("PRAGMA table_info(image_sizes)")}:
+            # 旧版本的缓存没有通道数，已有记录的通道数视为未知
+            try:
+                self.conn.execute("ALTER TABLE image_sizes ADD COLUMN depth INTEGER")
+            except sqlite3.OperationalError:
+                pass  # 其他进程已经添加
+
+    def get(self, image_path, stat):
+        with self.lock:
+            row = self.conn.execute("SELECT size, mtime_ns, width, height, depth FROM image_sizes WHERE path = ?",
+                                    (os.path.abspath(image_path),)).fetchone()
+        if row is None or row[0] != stat.st_size or row[1] != stat.st_mtime_ns:
+            return None
+        return row[2:]
+
+    def put(self, image_path, stat, info):
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO image_sizes VALUES (?, ?, ?, ?, ?, ?)",
+                              (os.path.abspath(image_path), stat.st_size, stat.st_mtime_ns) + tuple(info))
+
+    def close(self):
+        self.conn.close()
+
+
+# 每个进程各自打开的缓存连接（SQLite 连接不能跨 fork 使用）
+_open_caches = {}
+
+
+def open_cache(path):
+    """返回当前进程中该缓存文件的共享实例，path 为空时返回 None"""
+    if not path:
+        return None
+    key = (os.path.abspath(path), os.getpid())
+    cache = _open_caches.get(key)
+    if cache is None:
+        cache = _open_caches[key] = ImageSizeCache(path)
+    return cache
+
+
+def get_image_size(image_path, cache=None, data=None):
+    """返回图像 (宽, 高)，参数见 get_image_info"""
+    return get_image_info(image_path, cache, data)[:2]
+
+
+@timed('image_size')
+def get_image_info(image_path, cache=None, data=None):
+    """返回图像 (宽, 高, 通道数)，通道数未知时为 None
+
+    cache 命中时不读取图像；data 为已读入内存的图像字节时直接解析，否则只读取文件头。
+    """
+    stat = None
+    if cache is not None:
+        try:
+            stat = os.stat(image_path)
+        except (FileNotFoundError, NotADirectoryError):
+            cache = None  # 压缩包中的图像不使用缓存
+    if cache is not None:
+        info = cache.get(image_path, stat)
+        if info is not None:
+            return info
+    info = probe_bytes(data) if data is not None else probe_file(image_path)
+    if cache is not None:
+        cache.put(image_path, stat, info)
+    return info
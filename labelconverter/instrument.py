@@ -0,0 +1,221 @@
+"""转换过程的计时与计数：各阶段耗时、调用次数、读写字节数、最慢的文件与跳过/失败原因
+
+默认不启用。启用时（convert_files 传入 RunMetrics）：
+    phases  主进程中各步骤（列出文件、解析、校验、转换……）的墙钟时间；
+    stages  用 timed 标记的函数（读取、图像尺寸、Base64 编码、写入……）的累计耗时与调用次数，
+            多进程时为各进程之和，外层函数的耗时包含其中调用的函数；
+逐文件任务由 Instrumented 包装，在工作进程中计时后随结果一起返回，因此单进程与多进程的统计方式相同。
+未启用时 timed 只多一次全局变量判断，Instrumented 不参与任务分发。
+"""
+import cProfile
+import heapq
+import json
+import os
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+
+REPORT_VERSION = 1
+# 默认报告中列出的最慢文件数
+DEFAULT_SLOWEST = 10
+# tracemalloc 报告中列出的分配位置数
+TRACEMALLOC_TOP = 20
+
+# 当前进程中正在记录的 Recorder，未启用时为 None
+_recorder = None
+
+
+class Recorder:
+    """阶段 -> [调用次数, 累计秒数]，以及任意计数器（如读取的字节数）"""
+
+    def __init__(self):
+        self.stages = {}
+        self.counters = Counter()
+
+    def add(self, stage, seconds, calls=1):
+        entry = self.stages.get(stage)
+        if entry is None:
+            self.stages[stage] = [calls, seconds]
+        else:
+            entry[0] += calls
+            entry[1] += seconds
+
+    def snapshot(self):
+        """可在进程间传递的 (stages, counters)"""
+        return self.stages, dict(self.counters)
+
+    def merge(self, snapshot):
+        stages, counters = snapshot
+        for stage, (calls, seconds) in stages.items():
+            self.add(stage, seconds, calls)
+        self.counters.update(counters)
+
+
+@contextmanager
+def recording(recorder):
+    """在 with 块内将 timed 与 count 的数据记录到 recorder 中，结束后恢复之前的记录器"""
+    global _recorder
+    previous, _recorder = _recorder, recorder
+    try:
+        yield recorder
+    finally:
+        _recorder = previous
+
+
+def timed(stage):
+    """函数装饰器：启用记录时累计函数的耗时与调用次数"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            recorder = _recorder
+            if recorder is None:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                recorder.add(stage, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def count(name, amount=1):
+    """启用记录时累加计数器"""
+    if _recorder is not None:
+        _recorder.counters[name] += amount
+
+
+class Instrumented:
+    """包装 run_tasks 的任务函数：返回 (原结果, 耗时, 记录快照)
+
+    每个任务使用单独的 Recorder，快照随结果一起传回主进程合并。须包装模块级函数以便在进程间传递。
+    """
+
+    def __init__(self, func):
+        self.func = func
+
+    def __call__(self, context, task):
+        with recording(Recorder()) as recorder:
+            start = time.perf_counter()
+            result = self.func(context, task)
+            seconds = time.perf_counter() - start
+        return result, seconds, recorder.snapshot()
+
+
+def phase(metrics, name):
+    """主进程中一个步骤的计时上下文；metrics 为 None 时不做任何事"""
+    return nullcontext() if metrics is None else metrics.phase(name)
+
+
+class RunMetrics(Recorder):
+    """一次转换的统计，结束后用 report() 生成报告或 write() 写为 JSON
+
+    slowest 为报告中保留的最慢文件数。
+    """
+
+    def __init__(self, slowest=DEFAULT_SLOWEST):
+        super().__init__()
+        self.slowest = slowest
+        self.phases = {}
+        self.files = Counter()
+        self.skipped = Counter()
+        self.errors = []
+        self.info = {}
+        self.memory = None
+        self._slowest = []
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def add_file(self, kind, path, seconds, snapshot):
+        """合并一个文件任务的记录；kind 为 'parse' 或 'convert'"""
+        self.merge(snapshot)
+        self.files[kind] += 1
+        entry = (seconds, kind, path)
+        if len(self._slowest) < self.slowest:
+            heapq.heappush(self._slowest, entry)
+        elif self.slowest and entry > self._slowest[0]:
+            heapq.heapreplace(self._slowest, entry)
+
+    def add_read(self, path, size=None):
+        """size 为 None 时取文件大小（压缩包成员等不在磁盘上的文件须给出 size）"""
+        self.counters['bytes_read'] += os.path.getsize(path) if size is None else size
+
+    def add_written(self, path, size=None):
+        if size is not None:
+            self.counters['bytes_written'] += size
+        elif os.path.isfile(path):
+            self.counters['bytes_written'] += os.path.getsize(path)
+
+    def skip(self, reason, amount=1):
+        self.skipped[reason] += amount
+
+    def error(self, path, message):
+        self.errors.append({'path': path, 'message': message})
+
+    def report(self, status=None, message=None):
+        """可序列化为 JSON 的报告；status 与 message 为调用方给出的运行结果（如 'ok'、'error' 与错误信息）"""
+        report = {
+            'version': REPORT_VERSION,
+            'status': status,
+            'message': message,
+            'wall_seconds': time.perf_counter() - self._start,
+            'info': self.info,
+            'files': dict(self.files),
+            'phases': self.phases,
+            'stages': {stage: {'calls': calls, 'seconds': seconds}
+                       for stage, (calls, seconds) in sorted(self.stages.items(), key=lambda x: -x[1][1])},
+            'bytes_read': self.counters.get('bytes_read', 0),
+            'bytes_written': self.counters.get('bytes_written', 0),
+            'counters': {name: value for name, value in self.counters.items()
+                         if name not in ('bytes_read', 'bytes_written')},
+            'slowest_files': [{'path': path, 'kind': kind, 'seconds': seconds}
+                              for seconds, kind, path in sorted(self._slowest, reverse=True)],
+            'skipped': dict(self.skipped),
+            'errors': self.errors,
+        }
+        if self.memory is not None:
+            report['memory'] = self.memory
+        return report
+
+    def write(self, path, status=None, message=None):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(status, message), f, ensure_ascii=False, indent=2)
+
+
+@contextmanager
+def profiling(metrics=None, profile_path=None, trace_memory=False):
+    """可选的深入分析：profile_path 不为空时用 cProfile 分析主进程并保存统计文件（可用 pstats 或 snakeviz 查看）；
+    trace_memory 为 True 时用 tracemalloc 跟踪内存分配，峰值与分配最多的位置写入 metrics 的报告。
+    只覆盖当前进程，分析多进程转换时请使用单进程运行。
+    """
+    profiler = cProfile.Profile() if profile_path else None
+    if trace_memory:
+        tracemalloc.start()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(profile_path)
+        if trace_memory:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            if metrics is not None:
+                metrics.memory = {
+                    'current_bytes': current,
+                    'peak_bytes': peak,
+                    'top_allocations': [{'location': str(stat.traceback), 'bytes': stat.size, 'count': stat.count}
+                                        for stat in snapshot.statistics('lineno')[:TRACEMALLOC_TOP]],
+                }
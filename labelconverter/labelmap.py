@@ -0,0 +1,119 @@
+"""标签映射：自动分配连续的类别编号、读写映射文件，以及转换时使用的查找表
+
+映射文件按后缀区分：
+    .json          {"原标签": "新标签", ...}，可表示任意映射（包括将多个标签合并为同一个）；
+    .txt           classes.txt，每行一个类别名，行号（从 0 开始）为类别编号；
+    .yaml / .yml   YOLO 数据集配置中的 names（列表或 {编号: 类别名}），其他字段忽略。
+"""
+import json
+import os
+
+from .errors import ConversionError
+
+# 自动编号时写入输出文件夹的类别列表
+CLASSES_FILE_NAME = 'classes.txt'
+
+
+class LabelTable(dict):
+    """原标签 -> 新标签 的查找表，未映射的标签原样返回，转换时每个标签只需一次 table[label]"""
+
+    def __missing__(self, label):
+        return label
+
+
+def compile_mapping(label_mapping, labels=()):
+    """将标签映射字典编译为 LabelTable；labels 中未映射的标签以自身加入表中，查找时不再经过 __missing__
+
+    已是 LabelTable 且不需要加入标签时原样返回。
+    """
+    label_mapping = label_mapping or {}
+    missing = [label for label in labels if label not in label_mapping]
+    if isinstance(label_mapping, LabelTable) and not missing:
+        return label_mapping
+    table = LabelTable(label_mapping)
+    table.update(zip(missing, missing))
+    return table
+
+
+def auto_assign(labels, start=0):
+    """按名称排序为标签分配从 start 开始的连续编号，返回 {标签: 编号字符串}"""
+    return {label: str(i) for i, label in enumerate(sorted(labels), start)}
+
+
+def class_names(label_mapping):
+    """映射为连续编号 0..N-1 且每个编号只对应一个标签时，返回按编号排列的类别名列表，否则返回 None"""
+    names = {}
+    for label, new in label_mapping.items():
+        try:
+            class_id = int(new)
+        except (TypeError, ValueError):
+            return None
+        if str(class_id) != str(new).strip() or class_id in names:
+            return None
+        names[class_id] = label
+    if sorted(names) != list(range(len(names))):
+        return None
+    return [names[i] for i in range(len(names))]
+
+
+def _mapping_from_names(names):
+    return {name: str(i) for i, name in enumerate(names)}
+
+
+def _parse_yaml_names(text):
+    """读取 YAML 中的 names（列表或 {编号: 名称}）"""
+    import yaml
+    try:
+        data = yaml.safe_load(text)
+    except yaml.YAMLError as e:
+        raise ValueError(str(e)) from None
+    names = data.get('names') if isinstance(data, dict) else None
+    if isinstance(names, dict):
+        names = [names[class_id] for class_id in sorted(names, key=int)]
+    if not isinstance(names, list):
+        raise ValueError("没有 names 字段")
+    return [str(name) for name in names]
+
+
+def load_mapping(path):
+    """读取映射文件（格式见模块说明），返回 {原标签: 新标签}"""
+    ext = os.path.splitext(path)[1].lower()
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            if ext == '.json':
+                mapping = json.load(f)
+                if not isinstance(mapping, dict):
+                    raise ValueError("应为 {原标签: 新标签} 对象")
+                return {str(label): str(new) for label, new in mapping.items()}
+            if ext == '.txt':
+                return _mapping_from_names([line.strip() for line in f if line.strip()])
+            if ext in ('.yaml', '.yml'):
+                return _mapping_from_names(_parse_yaml_names(f.read()))
+    except (OSError, ValueError) as e:
+        raise ConversionError(f"无法读取标签映射文件 {path}: {e}") from None
+    raise ConversionError(f"不支持的标签映射文件: {path}（应为 .json、.txt、.yaml 或 .yml）")
+
+
+def _yaml_quote(name):
+    return json.dumps(name, ensure_ascii=False)
+
+
+def save_mapping(label_mapping, path):
+    """保存映射文件（格式见模块说明）；.txt 与 .yaml 要求映射为连续编号 0..N-1，否则请使用 .json"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.json':
+        text = json.dumps(dict(sorted(label_mapping.items())), ensure_ascii=False, indent=4) + '\n'
+    elif ext in ('.txt', '.yaml', '.yml'):
+        names = class_names(label_mapping)
+        if names is None:
+            raise ConversionError("只有连续编号 0..N-1 且编号不重复的映射才能保存为 classes.txt 或 YAML，"
+                                  "其他映射请保存为 .json")
+        if ext == '.txt':
+            text = ''.join(f"{name}\n" for name in names)
+        else:
+            text = f"nc: {len(names)}\nnames:\n" + ''.join(f"  {i}: {_yaml_quote(name)}\n"
+                                                           for i, name in enumerate(names))
+    else:
+        raise ConversionError(f"不支持的标签映射文件: {path}（应为 .json、.txt、.yaml 或 .yml）")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
@@ -0,0 +1,132 @@
+"""增量转换清单：记录每个源文件转换时的大小、修改时间（可选内容哈希）与输出文件
+
+清单与转换设置（目标格式、标签映射等）绑定，设置变化后全部记录失效；
+每转换完一批文件就提交一次，中断后再次运行会跳过已完成的文件，从中断处继续。
+"""
+import hashlib
+import json
+import os
+import sqlite3
+
+# 默认清单文件名，位于输出文件夹中
+MANIFEST_NAME = '.labelconverter_manifest.sqlite3'
+# 每记录多少个文件提交一次；中断时最多重新转换这么多文件
+COMMIT_INTERVAL = 256
+# 计算内容哈希时每次读取的字节数
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def default_manifest_path(output_folder):
+    """默认清单位置：输出文件夹中的 .labelconverter_manifest.sqlite3"""
+    return os.path.join(output_folder, MANIFEST_NAME)
+
+
+def file_digest(path):
+    """文件内容的 SHA-256 十六进制摘要"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(HASH_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Manifest:
+    """源文件绝对路径 -> (大小, 修改时间, 内容哈希, 输出文件) 的 SQLite 清单
+
+    settings 为可序列化为 JSON 的转换设置，与上次记录的不同时清空全部记录；
+    hash_sources 为 True 时，大小或修改时间变化但内容哈希相同的文件也视为未变化。
+    """
+
+    def __init__(self, path, settings, hash_sources=False):
+        self.path = path
+        self.hash_sources = hash_sources
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS files (source TEXT PRIMARY KEY, "
+                          "size INTEGER, mtime_ns INTEGER, digest TEXT, output TEXT)")
+        settings = json.dumps(settings, sort_keys=True, ensure_ascii=False)
+        row = self.conn.execute("SELECT value FROM settings WHERE key = 'settings'").fetchone()
+        if row is None or row[0] != settings:
+            self.conn.execute("BEGIN")
+            self.conn.execute("DELETE FROM files")
+            self.conn.execute("INSERT OR REPLACE INTO settings VALUES ('settings', ?)", (settings,))
+            self.conn.execute("COMMIT")
+        self.records = {row[0]: row[1:] for row in
+                        self.conn.execute("SELECT source, size, mtime_ns, digest, output FROM files")}
+        # 本次检查过、等待转换完成后写入的 (stat, 哈希, 输出文件)
+        self.pending = {}
+        self.uncommitted = 0
+
+    def needs_conversion(self, source_path, output_file):
+        """源文件自上次转换后是否变化，或输出文件是否缺失"""
+        source = os.path.abspath(source_path)
+        stat = os.stat(source_path)
+        record = self.records.get(source)
+        digest = None
+        if record is not None and record[3] == os.path.abspath(output_file) and os.path.isfile(output_file):
+            size, mtime_ns, old_digest = record[:3]
+            if size == stat.st_size and mtime_ns == stat.st_mtime_ns:
+                return False
+            if self.hash_sources and old_digest:
+                digest = file_digest(source_path)
+                if digest == old_digest:
+                    # 内容未变，只更新记录中的大小与修改时间
+                    self.pending[source] = (stat, digest, output_file)
+                    self.record(source_path)
+                    return False
+        if self.hash_sources and digest is None:
+            digest = file_digest(source_path)
+        self.pending[source] = (stat, digest, output_file)
+        return True
+
+    def record(self, source_path):
+        """标记源文件已转换完成，记录 needs_conversion 检查时的状态"""
+        source = os.path.abspath(source_path)
+        stat, digest, output_file = self.pending.pop(source)
+        output = os.path.abspath(output_file)
+        if not self.uncommitted:
+            self.conn.execute("BEGIN")
+        self.conn.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)",
+                          (source, stat.st_size, stat.st_mtime_ns, digest, output))
+        self.records[source] = (stat.st_size, stat.st_mtime_ns, digest, output)
+        self.uncommitted += 1
+        if self.uncommitted >= COMMIT_INTERVAL:
+            self.commit()
+
+    def commit(self):
+        if self.uncommitted:
+            self.conn.execute("COMMIT")
+            self.uncommitted = 0
+
+    def remove_orphans(self, source_paths):
+        """删除源文件已不在 source_paths 中的记录及其输出文件，返回删除的输出文件列表
+
+        仍被其他源文件使用的输出文件不会被删除。
+        """
+        live = {os.path.abspath(path) for path in source_paths}
+        live_outputs = {record[3] for source, record in self.records.items() if source in live}
+        removed = []
+        orphans = [source for source in self.records if source not in live]
+        if not orphans:
+            return removed
+        self.commit()
+        self.conn.execute("BEGIN")
+        for source in orphans:
+            output = self.records.pop(source)[3]
+            self.conn.execute("DELETE FROM files WHERE source = ?", (source,))
+            if output not in live_outputs and os.path.isfile(output):
+                os.remove(output)
+                removed.append(output)
+        self.conn.execute("COMMIT")
+        return removed
+
+    def close(self):
+        self.commit()
+        self.conn.close()
@@ -0,0 +1,94 @@
+"""convert_files 的选项：ConvertOptions 汇总影响输出与执行方式的设置，可选功能各用一个小的选项类
+
+可选功能（增量转换、流水线、输出分片、多机分片）的选项为 None 时不启用；
+各选项能否与目标格式一起使用由 convert_files 检查。
+"""
+from .archive import DEFAULT_SHARD_SIZE
+from .pipeline import DEFAULT_IO_THREADS, DEFAULT_READ_AHEAD
+
+
+class IncrementalOptions:
+    """增量转换（见 manifest.Manifest）：manifest 为清单文件路径；hash_sources 为 True 时按内容哈希判断
+    修改时间变化的文件是否真的改变；delete_orphans 为 True 时删除源文件已不存在的输出文件"""
+    __slots__ = ('manifest', 'hash_sources', 'delete_orphans')
+
+    def __init__(self, manifest, hash_sources=False, delete_orphans=False):
+        self.manifest = manifest
+        self.hash_sources = hash_sources
+        self.delete_orphans = delete_orphans
+
+
+class PipelineOptions:
+    """读取、转换与写出重叠执行（见 pipeline 模块）：threads 个线程最多提前读入 read_ahead 个标注文件，
+    逐文件的输出由后台线程延后写出，最多等待 read_ahead 个文件"""
+    __slots__ = ('threads', 'read_ahead')
+
+    def __init__(self, threads=DEFAULT_IO_THREADS, read_ahead=DEFAULT_READ_AHEAD):
+        self.threads = threads
+        self.read_ahead = read_ahead
+
+
+class OutputArchiveOptions:
+    """逐文件的输出依次写入输出文件夹中每个不超过 shard_size 字节的 zip/tar 分片（见 archive.ShardWriter）"""
+    __slots__ = ('archive_format', 'shard_size')
+
+    def __init__(self, archive_format='zip', shard_size=DEFAULT_SHARD_SIZE):
+        self.archive_format = archive_format
+        self.shard_size = shard_size
+
+
+class ShardOptions:
+    """多机分片转换：只转换按相对路径哈希属于第 index 个（共 count 个）分片的文件（见 sharding 模块）"""
+    __slots__ = ('index', 'count')
+
+    def __init__(self, index, count):
+        self.index = index
+        self.count = count
+
+
+class ConvertOptions:
+    """convert_files 的设置
+
+    label_mapping 为 原标签 -> 新标签，转换前编译为查找表（见 labelmap.LabelTable）；
+    source_format 为 'json'、'xml'、'yolo' 时只处理该类文件，为 'coco' 时来源为一个 COCO 文件；
+    recursive 为 True 时包括子文件夹中的标注文件，输出文件夹中保持相同的子文件夹结构；
+    include/exclude 为相对路径或文件名的通配符（见 discovery.walk_files）；
+    recursive_images 为 True 时图像索引包括图像文件夹的子文件夹；
+    image_data_mode 决定输出 LabelMe JSON 时 imageData 的写法，见 IMAGE_DATA_MODES 与 engine.write_json；
+    precision 为输出 YOLO 坐标保留的小数位数（None 表示完整精度），clip 为 True 时将坐标限制在图像范围内；
+    size_cache 为图像尺寸缓存文件路径，重复转换同一批图像时不再解析图像尺寸；
+    auto_ids 为 True 时为 JSON/XML 中（映射后）的标签按名称分配连续编号 0..N-1，类别列表写入输出文件夹中的
+    classes.txt；mapping_file 不为 None 时将最终使用的标签映射保存到该文件（格式见 labelmap 模块）；
+    workers 大于 1 时使用多进程并行转换（0 表示使用全部 CPU 核心），chunksize 为每次分发的文件数；
+    stream 为 True 时边遍历边解析并转换，不等待整个文件夹列出和解析完，需要指定 source_format，
+    只支持逐文件输出的格式；标签检查改为逐文件进行，总数未知，进度中不显示剩余时间。
+    incremental、pipeline、output_archive、shard 分别为 IncrementalOptions、PipelineOptions、
+    OutputArchiveOptions、ShardOptions，为 None 时不启用对应的功能。
+    """
+    __slots__ = ('label_mapping', 'source_format', 'recursive', 'include', 'exclude', 'recursive_images',
+                 'image_data_mode', 'precision', 'clip', 'size_cache', 'auto_ids', 'mapping_file',
+                 'workers', 'chunksize', 'stream', 'incremental', 'pipeline', 'output_archive', 'shard')
+
+    def __init__(self, label_mapping=None, source_format=None, recursive=False, include=None, exclude=None,
+                 recursive_images=False, image_data_mode='embed', precision=None, clip=False, size_cache=None,
+                 auto_ids=False, mapping_file=None, workers=1, chunksize=None, stream=False,
+                 incremental=None, pipeline=None, output_archive=None, shard=None):
+        self.label_mapping = label_mapping
+        self.source_format = source_format
+        self.recursive = recursive
+        self.include = include
+        self.exclude = exclude
+        self.recursive_images = recursive_images
+        self.image_data_mode = image_data_mode
+        self.precision = precision
+        self.clip = clip
+        self.size_cache = size_cache
+        self.auto_ids = auto_ids
+        self.mapping_file = mapping_file
+        self.workers = workers
+        self.chunksize = chunksize
+        self.stream = stream
+        self.incremental = incremental
+        self.pipeline = pipeline
+        self.output_archive = output_archive
+        self.shard = shard
@@ -0,0 +1,100 @@
+"""多进程并行执行：共享上下文只在进程启动时传递一次，任务按块分发"""
+import multiprocessing
+import os
+from collections import deque
+from itertools import islice
+
+# 工作进程中的共享上下文与任务函数，由 _init_worker 设置
+_worker_func = None
+_worker_context = None
+
+
+def _init_worker(func, context):
+    """进程池初始化：保存任务函数与共享上下文（如标签映射、图像索引）"""
+    global _worker_func, _worker_context
+    _worker_func = func
+    _worker_context = context
+
+
+def _call_chunk(chunk):
+    return [_worker_func(_worker_context, task) for task in chunk]
+
+
+def resolve_workers(workers):
+    """workers 为 0 或 None 时使用全部 CPU 核心"""
+    if not workers:
+        return os.cpu_count() or 1
+    return max(1, int(workers))
+
+
+# 默认块大小上限，使取消或出错时需要等待的在途文件数有界
+MAX_CHUNKSIZE = 32
+
+
+def default_chunksize(num_tasks, workers):
+    """每个进程大约分到 4 块，减少逐文件的进程间通信开销"""
+    chunksize, extra = divmod(num_tasks, workers * 4)
+    return max(1, min(MAX_CHUNKSIZE, chunksize + bool(extra)))
+
+
+def _plan(tasks, workers, chunksize):
+    """任务数已知时，进程数不超过任务数，并按任务数确定块大小"""
+    workers = resolve_workers(workers)
+    if hasattr(tasks, '__len__'):
+        workers = min(workers, max(1, len(tasks)))
+        chunksize = chunksize or default_chunksize(len(tasks), workers)
+    return workers, chunksize
+
+
+def run_tasks(func, tasks, context, workers=1, chunksize=None):
+    """依次产出 func(context, task) 的结果，顺序与 tasks 一致
+
+    workers 为 1 时在当前进程中执行；否则使用进程池，结果仍按任务顺序返回，
+    因此输出与报告都是确定的。func 必须是模块级函数以便在进程间传递。
+    同时在途的块数有上限，调用方提前停止迭代（取消或出错）时，
+    只等待已分发的块完成，不会在文件写到一半时终止进程。
+    tasks 可以是生成器：只在需要分发时才取出下一块，因此可以边产生任务边处理。
+    """
+    workers, chunksize = _plan(tasks, workers, chunksize)
+    if workers == 1:
+        for task in tasks:
+            yield func(context, task)
+        return
+
+    # 任务数未知时使用默认块大小上限
+    chunksize = chunksize or MAX_CHUNKSIZE
+    tasks = iter(tasks)
+    chunks = iter(lambda: list(islice(tasks, chunksize)), [])
+    pool = multiprocessing.Pool(workers, initializer=_init_worker, initargs=(func, context))
+    try:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.apply_async(_call_chunk, (chunk,)))
+            if len(pending) >= workers * 2:
+                break
+        while pending:
+            results = pending.popleft().get()
+            chunk = next(chunks, None)
+            if chunk is not None:
+                pending.append(pool.apply_async(_call_chunk, (chunk,)))
+            yield from results
+    finally:
+        pool.close()
+        pool.join()
+
+
+def run_tasks_paired(func, tasks, context, workers=1, chunksize=None):
+    """与 run_tasks 相同，但依次产出 (task, 结果)
+
+    tasks 可以是生成器：run_tasks 按顺序返回结果，每个结果对应最早分发、尚未配对的任务，
+    因此只保留已分发、等待结果的任务，而不是全部任务。
+    """
+    workers, chunksize = _plan(tasks, workers, chunksize)
+    pending = deque()
+
+    def dispatched():
+        for task in tasks:
+            pending.append(task)
+            yield task
+
+    return ((pending.popleft(), result) for result in run_tasks(func, dispatched(), context, workers, chunksize))
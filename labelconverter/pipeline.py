@@ -0,0 +1,172 @@
+"""流水线转换：预读标注文件、转换、延后写出三个阶段重叠执行，读写等待不再阻塞 CPU
+
+    prefetch     用若干线程提前读入后续标注文件的内容，最多领先 read_ahead 个文件；
+    转换          在主进程（或工作进程）中只处理内存中的数据，输出经 archive.Captured 收集在内存中；
+    WriteBehind  由单独的线程按批写出输出文件，队列已满时转换阶段等待。
+内存占用的上限：预读最多 read_ahead 个标注文件的内容；写出队列最多 max_pending 个源文件的输出，
+且其中留在内存里的文本合计不超过 max_size（默认 64 MB）。嵌入图像数据的 LabelMe JSON 等超过
+archive.CAPTURE_SPILL_SIZE 的输出转存到系统临时文件夹，不计入 max_size，但需要相应的临时磁盘空间，
+且写出时多复制一遍。读写在线程中进行（文件 I/O 期间释放 GIL），
+因此单进程时也能在高延迟的存储（如网络文件系统）上重叠 I/O 与计算。
+"""
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from .archive import SpilledOutput, discard_outputs, pending_size
+from .errors import ConversionError
+
+# 默认预读线程数
+DEFAULT_IO_THREADS = 4
+# 默认最多预读（以及等待写出）的文件数
+DEFAULT_READ_AHEAD = 64
+# 写出队列中留在内存里的输出文本的默认总长度上限（字符）
+DEFAULT_WRITE_BEHIND_SIZE = 64 * 1024 * 1024
+# 写出线程每批最多写出的文件数
+WRITE_BATCH = 32
+
+
+def _read_task_data(task):
+    """(类型, 路径) -> (类型, 路径, 内容字节)；已带内容的任务（如压缩包成员）原样返回"""
+    if len(task) > 2:
+        return task
+    kind, path = task
+    with open(path, 'rb') as f:
+        return kind, path, f.read()
+
+
+class Prefetch:
+    """按顺序产出带内容的任务，后台线程最多提前读入 read_ahead 个文件，只能迭代一次"""
+
+    def __init__(self, tasks, threads=DEFAULT_IO_THREADS, read_ahead=DEFAULT_READ_AHEAD):
+        self.tasks = tasks
+        self.threads = max(1, threads)
+        self.read_ahead = max(1, read_ahead)
+
+    def __iter__(self):
+        tasks = iter(self.tasks)
+        pending = deque()
+        with ThreadPoolExecutor(self.threads) as executor:
+            try:
+                for task in tasks:
+                    pending.append(executor.submit(_read_task_data, task))
+                    if len(pending) >= self.read_ahead:
+                        break
+                while pending:
+                    task = pending.popleft().result()
+                    next_task = next(tasks, None)
+                    if next_task is not None:
+                        pending.append(executor.submit(_read_task_data, next_task))
+                    yield task
+            finally:
+                # 提前停止（取消或出错）时不再读取尚未开始的文件
+                for future in pending:
+                    future.cancel()
+
+
+class _SizedPrefetch(Prefetch):
+    """任务数已知的 Prefetch，用于显示进度"""
+
+    def __len__(self):
+        return len(self.tasks)
+
+
+def prefetch(tasks, threads=DEFAULT_IO_THREADS, read_ahead=DEFAULT_READ_AHEAD):
+    """用 Prefetch 包装任务，tasks 有长度时结果也有长度"""
+    cls = _SizedPrefetch if hasattr(tasks, '__len__') else Prefetch
+    return cls(tasks, threads, read_ahead)
+
+
+class WriteBehind:
+    """在后台线程中写出 (源文件, [(输出路径, 文本), ...])，已写出的 (源文件, [输出路径, ...]) 可用 completed() 取回
+
+    队列最多容纳 max_pending 个源文件的输出，且其中的文本合计不超过 max_size（单个更大的输出在队列为空时
+    仍可加入）；写出线程每次取出一批（最多 WRITE_BATCH 个）连续写出。
+    文本也可以是 archive.SpilledOutput，此时从临时文件复制。
+    写出失败时，之后的 add 或 close 抛出 ConversionError（只抛出一次），此后不再写出。
+    """
+
+    def __init__(self, max_pending=DEFAULT_READ_AHEAD, max_size=DEFAULT_WRITE_BEHIND_SIZE):
+        self.queue = queue.Queue(max(1, max_pending))
+        self.max_size = max_size
+        self.size = 0
+        self.size_changed = threading.Condition()
+        self.done = deque()
+        self.error = None
+        self.failed = False
+        self.files = 0
+        self.seconds = 0.0
+        self.thread = threading.Thread(target=self._run, name='labelconverter-writer', daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < WRITE_BATCH:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = batch[-1] is None
+            if stop:
+                batch.pop()
+            if not self.failed:
+                start = time.perf_counter()
+                try:
+                    while batch:
+                        source, outputs, size = batch[0]
+                        for output_file, text in outputs:
+                            if isinstance(text, SpilledOutput):
+                                text.write_to(output_file)
+                            else:
+                                with open(output_file, 'w') as f:
+                                    f.write(text)
+                            self.files += 1
+                        self.done.append((source, [output_file for output_file, _ in outputs]))
+                        batch.pop(0)
+                        self._release(size)
+                except Exception as e:
+                    self.error = ConversionError(f"写入 {output_file} 失败: {e}")
+                    self.failed = True
+                self.seconds += time.perf_counter() - start
+            # 出错后不再写出：删除剩余输出的临时文件，并唤醒等待中的 add
+            for source, outputs, size in batch:
+                discard_outputs(outputs)
+                self._release(size)
+            if stop:
+                return
+
+    def _release(self, size):
+        with self.size_changed:
+            self.size -= size
+            self.size_changed.notify_all()
+
+    def _check(self):
+        # 抛出后清除，close 在 add 出错后（或第二次）调用时不再重复抛出同一个错误
+        error, self.error = self.error, None
+        if error is not None:
+            raise error
+
+    def add(self, source, outputs):
+        """排队写出一个源文件的全部输出，队列已满或内存中的文本超过 max_size 时等待"""
+        self._check()
+        size = pending_size(outputs)
+        with self.size_changed:
+            while self.size and self.size + size > self.max_size and not self.failed:
+                self.size_changed.wait()
+            self.size += size
+        self.queue.put((source, outputs, size))
+
+    def completed(self):
+        """取出自上次调用以来已写出的 (源文件, [输出路径, ...])"""
+        while self.done:
+            yield self.done.popleft()
+
+    def close(self):
+        """等待已排队的输出全部写出"""
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+        self._check()
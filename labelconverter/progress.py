@@ -0,0 +1,74 @@
+"""进度事件：已完成/总数、速度与预计剩余时间，供界面或命令行显示"""
+import time
+
+from .errors import ConversionCancelled
+
+
+class ProgressEvent:
+    """某一阶段的进度快照"""
+    __slots__ = ('stage', 'done', 'total', 'elapsed')
+
+    def __init__(self, stage, done, total, elapsed):
+        self.stage = stage
+        self.done = done
+        self.total = total
+        self.elapsed = elapsed
+
+    @property
+    def rate(self):
+        """每秒处理的文件数"""
+        return self.done / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def eta(self):
+        """预计剩余秒数，无法估计时为 None"""
+        rate = self.rate
+        if self.total is None or rate <= 0:
+            return None
+        return (self.total - self.done) / rate
+
+    def __str__(self):
+        if self.total is None:
+            return f"{self.stage} {self.done}  {self.rate:.1f} 文件/秒"
+        eta = f"{self.eta:.0f}s" if self.eta is not None else "--"
+        return f"{self.stage} {self.done}/{self.total}  {self.rate:.1f} 文件/秒  剩余 {eta}"
+
+
+class ProgressReporter:
+    """按阶段计时并向回调发送 ProgressEvent；回调为 None 时不做任何事
+
+    两次事件之间至少间隔 interval 秒，阶段开始与结束时总会发送；
+    total 为 None 表示总数未知（边发现边处理），此时不估计剩余时间。
+    """
+
+    def __init__(self, callback, stage, total, interval=0.1):
+        self.callback = callback
+        self.stage = stage
+        self.total = total
+        self.interval = interval
+        self.done = 0
+        self.start = self.last = time.perf_counter()
+        self.report(self.start)
+
+    def advance(self, count=1):
+        self.done += count
+        if self.callback is None:
+            return
+        now = time.perf_counter()
+        if now - self.last >= self.interval or (self.total is not None and self.done >= self.total):
+            self.report(now)
+
+    def finish(self):
+        """总数未知时在处理完后发送最后一次事件"""
+        self.report(time.perf_counter())
+
+    def report(self, now):
+        if self.callback is not None:
+            self.last = now
+            self.callback(ProgressEvent(self.stage, self.done, self.total, now - self.start))
+
+
+def check_cancelled(cancel):
+    """cancel 为带 is_set() 的对象（如 threading.Event），已设置时抛出 ConversionCancelled"""
+    if cancel is not None and cancel.is_set():
+        raise ConversionCancelled()
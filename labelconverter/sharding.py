@@ -0,0 +1,123 @@
+"""多机分片转换：按相对路径的稳定哈希将标注文件确定地分给 num_shards 个分片，各分片独立转换，最后合并分片报告
+
+每个标注文件（按相对数据文件夹、以 / 分隔的路径）总是属于同一个分片，与机器、进程和遍历顺序无关，
+因此 N 个分片的输出合起来与单进程转换的输出相同。每个分片结束时在输出文件夹中写入一个分片报告
+（转换数、标签映射、统计与诊断），merge_reports 检查分片是否齐全、标签编号是否一致，并合并为一个结果。
+"""
+import glob
+import hashlib
+import json
+import os
+
+from .errors import ConversionError
+from .stats import merge_stats
+
+SHARD_REPORT_VERSION = 1
+# 分片报告的文件名：分片序号与分片数
+SHARD_REPORT_NAME = 'shard-report-{:05d}-of-{:05d}.json'
+_SHARD_REPORT_PATTERN = 'shard-report-*-of-*.json'
+
+
+def shard_of(relative, num_shards):
+    """相对路径（以 / 分隔）所属的分片序号，使用 BLAKE2b 哈希，不受 PYTHONHASHSEED 影响"""
+    digest = hashlib.blake2b(relative.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') % num_shards
+
+
+def check_shard(shard_index, num_shards):
+    if num_shards < 1 or not 0 <= shard_index < num_shards:
+        raise ConversionError(f"分片序号应在 0 到 {num_shards - 1} 之间，分片数应大于 0")
+
+
+def in_shard(path, folder_path, shard_index, num_shards):
+    """path（可以是压缩包中的虚拟路径）是否属于该分片，按相对 folder_path 的路径计算"""
+    relative = os.path.relpath(path, folder_path).replace(os.sep, '/')
+    return shard_of(relative, num_shards) == shard_index
+
+
+def select_shard(tasks, folder_path, shard_index, num_shards):
+    """从 (类型, 路径[, 内容]) 任务中选出属于该分片的任务，保持原有顺序；tasks 可以是生成器"""
+    return (task for task in tasks if in_shard(task[1], folder_path, shard_index, num_shards))
+
+
+def shard_report_path(output_folder, shard_index, num_shards):
+    return os.path.join(output_folder, SHARD_REPORT_NAME.format(shard_index, num_shards))
+
+
+def write_shard_report(path, shard_index, num_shards, info, converted, label_mapping, stats, diagnostics):
+    """写出一个分片的报告；label_mapping 为该分片中全部标签实际使用的映射"""
+    report = {
+        'version': SHARD_REPORT_VERSION,
+        'shard_index': shard_index,
+        'num_shards': num_shards,
+        'info': info,
+        'converted': converted,
+        'label_mapping': dict(label_mapping),
+        'stats': stats,
+        'diagnostics': diagnostics.report(),
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def find_shard_reports(paths):
+    """paths 中的分片报告文件，以及其中文件夹下的全部分片报告"""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            found.extend(sorted(glob.glob(os.path.join(glob.escape(path), _SHARD_REPORT_PATTERN))))
+        else:
+            found.append(path)
+    return found
+
+
+def load_shard_report(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            report = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ConversionError(f"无法读取分片报告 {path}: {e}") from None
+    if report.get('version') != SHARD_REPORT_VERSION:
+        raise ConversionError(f"不支持的分片报告版本: {path}")
+    return report
+
+
+def merge_reports(reports):
+    """合并全部分片的报告：检查分片齐全且转换设置相同，合并标签映射、统计与诊断
+
+    同一个标签在不同分片中映射为不同的新标签（编号）时抛出 ConversionError。
+    """
+    if not reports:
+        raise ConversionError("没有找到分片报告")
+    num_shards = reports[0]['num_shards']
+    info = reports[0]['info']
+    by_index = {}
+    for report in reports:
+        if report['num_shards'] != num_shards or report['info'] != info:
+            raise ConversionError("分片报告来自分片数或转换设置不同的运行，无法合并")
+        if report['shard_index'] in by_index:
+            raise ConversionError(f"分片 {report['shard_index']} 的报告重复")
+        by_index[report['shard_index']] = report
+    missing = [i for i in range(num_shards) if i not in by_index]
+    if missing:
+        raise ConversionError(f"缺少分片 {', '.join(map(str, missing))} 的报告")
+    reports = [by_index[i] for i in range(num_shards)]
+
+    label_mapping = {}
+    for report in reports:
+        for label, new in report['label_mapping'].items():
+            if label_mapping.setdefault(label, new) != new:
+                raise ConversionError(f"标签 '{label}' 在不同分片中映射为 '{label_mapping[label]}' 与 '{new}'")
+    items = [item for report in reports for item in report['diagnostics']['items']]
+    return {
+        'num_shards': num_shards,
+        'info': info,
+        'converted': sum(report['converted'] for report in reports),
+        'label_mapping': dict(sorted(label_mapping.items())),
+        'stats': merge_stats([report['stats'] for report in reports]),
+        'diagnostics': {
+            'errors': sum(report['diagnostics']['errors'] for report in reports),
+            'warnings': sum(report['diagnostics']['warnings'] for report in reports),
+            'items': items,
+        },
+    }
@@ -0,0 +1,263 @@
+"""数据集统计与完整性检查：各类别的实例数、框大小与宽高比分布，以及越界、退化、未归一化的坐标和缺失的图像
+
+全部形状的顶点先追加到一个扁平的 array 缓冲区中，再一次转为 NumPy 数组，
+按形状用 reduceat 求外接框后整体计算，百万个框也只需数秒（主要耗时在解析标注文件）。
+矩形与多边形都按外接框统计；point、line、circle 等其他形状只计入 shape_types。
+像素坐标的标注在图像尺寸未知时不检查越界，也不计入框大小分布（计入 unknown_image_size）；
+YOLO 的宽高比按归一化坐标计算。
+"""
+import math
+import os
+from array import array
+from collections import Counter
+from itertools import chain
+
+from .archive import is_archive
+from .coco import read_coco
+from .dataset import DatasetIndex, iter_source_tasks, list_source_tasks
+from .diagnostics import Diagnostics
+from .errors import ConversionError
+from .imageindex import ImageIndex
+
+# 检查项：解析失败、找不到图像、越界、退化（宽或高不大于 0、顶点不足）、YOLO 坐标看起来未归一化
+PROBLEMS = ['parse_error', 'missing_image', 'out_of_bounds', 'degenerate', 'unnormalized']
+PROBLEM_NAMES = {
+    'parse_error': "解析失败",
+    'missing_image': "找不到对应的图像",
+    'out_of_bounds': "超出图像范围的形状",
+    'degenerate': "宽或高不大于 0 或顶点不足的退化形状",
+    'unnormalized': "坐标看起来未归一化的 YOLO 形状",
+}
+# 框大小（sqrt(框面积 / 图像面积)，即相对图像边长的比例）分布的区间边界
+SIZE_EDGES = [0, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, math.inf]
+# 宽高比（宽 / 高）分布的区间边界
+ASPECT_EDGES = [0, 1 / 8, 1 / 4, 1 / 2, 1, 2, 4, 8, math.inf]
+# 每个检查项列出的示例文件数
+DEFAULT_EXAMPLES = 20
+# 判断越界与归一化时允许的误差（相对图像宽高）
+TOLERANCE = 1e-6
+# 按外接框统计的形状及其最少顶点数
+_MIN_POINTS = {'rectangle': 2, 'polygon': 3}
+
+
+def _shape_kind(annotation, shape):
+    """统计时的形状类型；LabelMe 中 shape_type 缺省为多边形"""
+    shape_type = shape.shape_type
+    if shape_type is None and annotation.kind == 'json':
+        return 'polygon'
+    return shape_type
+
+
+def _problem(file_ids, mask, paths, examples):
+    import numpy as np
+    mask = np.asarray(mask, dtype=bool)
+    files = np.unique(file_ids[mask])
+    return {'count': int(mask.sum()), 'files': [paths[i] for i in files[:examples]]}
+
+
+def _histogram(values, edges):
+    import numpy as np
+    counts, _ = np.histogram(values[np.isfinite(values)], bins=edges)
+    return {'edges': [float(edge) for edge in edges], 'counts': counts.tolist()}
+
+
+def compute_stats(index, label_mapping=None, image_index=None, source_root=None, parse_errors=(),
+                  examples=DEFAULT_EXAMPLES):
+    """统计 DatasetIndex 中的全部标注，返回可序列化为 JSON 的报告
+
+    label_mapping 不为 None 时按映射后的标签统计类别；image_index 为 ImageIndex 时检查每个标注文件是否有对应的图像
+    （source_root 不为 None 时优先按相对该文件夹的路径匹配）；parse_errors 为解析失败的文件路径，计入 parse_error；
+    每个检查项最多列出 examples 个文件。
+    """
+    import numpy as np  # 只在统计时导入，读取检查项与合并报告不需要 NumPy
+    label_mapping = label_mapping or {}
+    paths = []
+    shape_types = Counter()
+    # 每个文件一项：按外接框统计的形状数、图像宽高（YOLO 为 1，未知为 NaN）、是否为 YOLO
+    file_boxes = array('q')
+    file_sizes = array('d')
+    file_normalized = array('b')
+    # 每个（按外接框统计的）形状一项
+    class_ids = array('i')
+    min_points = array('i')
+    n_points = array('q')
+    coords = array('d')
+    classes = {}
+    missing_images = []
+    for file_id, annotation in enumerate(index.annotations):
+        paths.append(annotation.path)
+        if image_index is not None:
+            relative = None
+            if source_root is not None:
+                relative = os.path.relpath(os.path.splitext(annotation.path)[0], source_root).replace(os.sep, '/')
+            if image_index.find(annotation.path, relative) is None:
+                missing_images.append(file_id)
+        is_yolo = annotation.kind == 'yolo'
+        file_sizes.extend((1, 1) if is_yolo else (annotation.image_width or np.nan, annotation.image_height or np.nan))
+        file_normalized.append(is_yolo)
+        boxes = 0
+        for shape in annotation.shapes:
+            kind = _shape_kind(annotation, shape)
+            shape_types[kind] += 1
+            required = _MIN_POINTS.get(kind)
+            if required is None:
+                continue
+            label = label_mapping.get(shape.label, shape.label)
+            class_id = classes.get(label)
+            if class_id is None:
+                class_id = classes[label] = len(classes)
+            class_ids.append(class_id)
+            min_points.append(required)
+            n_points.append(len(shape.points))
+            coords.extend(chain.from_iterable(shape.points))
+            boxes += 1
+        file_boxes.append(boxes)
+
+    file_ids = np.repeat(np.arange(len(paths)), np.frombuffer(file_boxes, dtype=np.int64))
+    counts = np.bincount(np.frombuffer(class_ids, dtype=np.int32), minlength=len(classes))
+    sizes = np.frombuffer(file_sizes, dtype=np.float64).reshape(-1, 2)[file_ids]
+    normalized = np.frombuffer(file_normalized, dtype=np.int8).astype(bool)[file_ids]
+    n_points = np.frombuffer(n_points, dtype=np.int64)
+    offsets = np.concatenate(([0], np.cumsum(n_points)))
+    points = np.frombuffer(coords, dtype=np.float64).reshape(-1, 2)
+    # 每个形状的外接框；没有顶点的形状为 NaN
+    mins = np.full((len(n_points), 2), np.nan)
+    maxs = np.full((len(n_points), 2), np.nan)
+    has_points = n_points > 0
+    if has_points.any():
+        starts = offsets[:-1][has_points]
+        mins[has_points] = np.minimum.reduceat(points, starts, axis=0)
+        maxs[has_points] = np.maximum.reduceat(points, starts, axis=0)
+    box_sizes = maxs - mins
+    degenerate = (n_points < np.frombuffer(min_points, dtype=np.int32)) | ~(box_sizes > 0).all(axis=1)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # YOLO：中心或宽高超出 [0, 1] 时看起来是像素坐标，否则边缘超出 [0, 1] 为越界
+        centers = (mins + maxs) / 2
+        unnormalized = normalized & ((centers < -TOLERANCE) | (centers > 1 + TOLERANCE) |
+                                     (box_sizes > 1 + TOLERANCE)).any(axis=1)
+        known_size = np.isfinite(sizes).all(axis=1)
+        tolerance = sizes * TOLERANCE
+        out_of_bounds = known_size & ~unnormalized & ((mins < -tolerance) | (maxs > sizes + tolerance)).any(axis=1)
+        valid = known_size & ~degenerate & ~unnormalized
+        relative_sizes = np.where(valid, np.sqrt(box_sizes.prod(axis=1) / sizes.prod(axis=1)), np.nan)
+        aspect_ratios = np.where(~degenerate, box_sizes[:, 0] / box_sizes[:, 1], np.nan)
+
+    labels = sorted(classes, key=lambda label: (-counts[classes[label]], label))
+    missing = np.zeros(len(paths), dtype=bool)
+    missing[missing_images] = True
+    parse_errors = list(parse_errors)
+    return {
+        'files': len(paths) + len(parse_errors),
+        'empty_files': sum(1 for annotation in index.annotations if not annotation.shapes),
+        'shapes': sum(shape_types.values()),
+        'boxes': len(file_ids),
+        'shape_types': dict(shape_types),
+        'classes': {label: int(counts[classes[label]]) for label in labels},
+        'box_size': _histogram(relative_sizes, SIZE_EDGES),
+        'aspect_ratio': _histogram(aspect_ratios, ASPECT_EDGES),
+        'unknown_image_size': int((~known_size).sum()),
+        'problems': {
+            'parse_error': {'count': len(parse_errors), 'files': parse_errors[:examples]},
+            'missing_image': _problem(np.arange(len(paths)), missing, paths, examples) if image_index is not None
+            else {'count': 0, 'files': []},
+            'out_of_bounds': _problem(file_ids, out_of_bounds, paths, examples),
+            'degenerate': _problem(file_ids, degenerate, paths, examples),
+            'unnormalized': _problem(file_ids, unnormalized, paths, examples),
+        },
+    }
+
+
+def collect_stats(folder_path, source_format=None, image_folder_path=None, label_mapping=None, recursive=False,
+                  recursive_images=False, include=None, exclude=None, workers=1, chunksize=None, progress=None,
+                  cancel=None, examples=DEFAULT_EXAMPLES):
+    """解析标注文件夹（或压缩包、COCO 文件）并统计，参数与 engine.convert_files 相同，返回 compute_stats 的报告
+
+    解析失败的文件跳过并计入 parse_error；image_folder_path 不为空时检查缺失的图像。
+    """
+    if source_format == 'coco':
+        index = DatasetIndex(os.path.dirname(folder_path), read_coco(folder_path, segmentation=True))
+        parse_errors = []
+    else:
+        diagnostics = Diagnostics('skip')
+        if is_archive(folder_path):
+            tasks = iter_source_tasks(folder_path, source_format, recursive, include, exclude)
+        else:
+            tasks = list_source_tasks(folder_path, source_format, recursive, include, exclude)
+        index = DatasetIndex.parse(folder_path, tasks, workers, chunksize, progress, cancel, sort=True,
+                                   diagnostics=diagnostics)
+        parse_errors = [item.path for item in diagnostics.items]
+    image_index = ImageIndex(image_folder_path, recursive_images) if image_folder_path else None
+    if source_format == 'coco':
+        source_root = os.path.dirname(folder_path)
+    else:
+        source_root = folder_path if recursive else None
+    return compute_stats(index, label_mapping, image_index, source_root, parse_errors, examples)
+
+
+def _add_histograms(histograms):
+    edges = histograms[0]['edges']
+    if any(histogram['edges'] != edges for histogram in histograms):
+        raise ConversionError("统计报告中分布的区间边界不同，无法合并")
+    return {'edges': edges, 'counts': [sum(counts) for counts in zip(*(h['counts'] for h in histograms))]}
+
+
+def merge_stats(reports, examples=DEFAULT_EXAMPLES):
+    """合并多个 compute_stats 报告（如各分片的统计），计数相加，每个检查项最多保留 examples 个示例文件"""
+    shape_types = Counter()
+    classes = Counter()
+    for report in reports:
+        shape_types.update(report['shape_types'])
+        classes.update(report['classes'])
+    problems = {}
+    for check in PROBLEMS:
+        entries = [report['problems'][check] for report in reports]
+        problems[check] = {'count': sum(entry['count'] for entry in entries),
+                           'files': [path for entry in entries for path in entry['files']][:examples]}
+    return {
+        'files': sum(report['files'] for report in reports),
+        'empty_files': sum(report['empty_files'] for report in reports),
+        'shapes': sum(report['shapes'] for report in reports),
+        'boxes': sum(report['boxes'] for report in reports),
+        'shape_types': dict(shape_types),
+        'classes': dict(sorted(classes.items(), key=lambda item: (-item[1], item[0]))),
+        'box_size': _add_histograms([report['box_size'] for report in reports]),
+        'aspect_ratio': _add_histograms([report['aspect_ratio'] for report in reports]),
+        'unknown_image_size': sum(report['unknown_image_size'] for report in reports),
+        'problems': problems,
+    }
+
+
+def failed_checks(report, checks=PROBLEMS):
+    """报告中计数不为 0 的检查项，返回 {检查项: 计数}"""
+    return {check: report['problems'][check]['count'] for check in checks if report['problems'][check]['count']}
+
+
+def _format_histogram(histogram):
+    edges = histogram['edges']
+    return [f"    [{edges[i]:g}, {edges[i + 1]:g}): {count}" for i, count in enumerate(histogram['counts'])]
+
+
+def format_stats(report, max_classes=50):
+    """将报告格式化为多行文字，类别按实例数从多到少最多列出 max_classes 个"""
+    lines = [f"文件 {report['files']} 个（无标注 {report['empty_files']} 个），形状 {report['shapes']} 个，"
+             f"其中按外接框统计 {report['boxes']} 个"]
+    lines.append("形状类型: " + ", ".join(f"{shape_type}: {count}"
+                                        for shape_type, count in sorted(report['shape_types'].items(), key=str)))
+    classes = list(report['classes'].items())
+    lines.append(f"类别 {len(classes)} 个:")
+    lines.extend(f"    {label}: {count}" for label, count in classes[:max_classes])
+    if len(classes) > max_classes:
+        lines.append(f"    ……共 {len(classes)} 个类别")
+    lines.append("框大小（相对图像边长）:")
+    lines.extend(_format_histogram(report['box_size']))
+    lines.append("宽高比（宽 / 高）:")
+    lines.extend(_format_histogram(report['aspect_ratio']))
+    if report['unknown_image_size']:
+        lines.append(f"图像尺寸未知、未检查越界的形状: {report['unknown_image_size']}")
+    for check in PROBLEMS:
+        problem = report['problems'][check]
+        if problem['count']:
+            lines.append(f"{PROBLEM_NAMES[check]}: {problem['count']}")
+            lines.extend(f"    {path}" for path in problem['files'])
+    return "\n".join(lines)
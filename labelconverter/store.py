@@ -0,0 +1,140 @@
+"""紧凑的列式数据集存储：整个数据集写为若干连续的 .npy 数组加一个小的 header.json
+
+训练时用 DatasetStore 以内存映射方式打开，不再逐个打开数十万个小标注文件。
+
+数组（N 为图像数）：
+    image_sizes      (N, 2) int32     图像宽高，未知时为 0
+    name_offsets     (N + 1,) int64   第 i 张图像的名称为 names[name_offsets[i]:name_offsets[i + 1]]（UTF-8）
+    names            (总字节数,) uint8
+    box_offsets      (N + 1,) int64   第 i 张图像的矩形框为 boxes[box_offsets[i]:box_offsets[i + 1]]
+    box_classes      (框数,) int32
+    boxes            (框数, 4) float32    (xmin, ymin, xmax, ymax)，像素坐标
+    polygon_offsets  (N + 1,) int64   第 i 张图像的多边形为 polygon_classes[polygon_offsets[i]:...]
+    polygon_classes  (多边形数,) int32
+    vertex_offsets   (多边形数 + 1,) int64    第 j 个多边形的顶点为 vertices[vertex_offsets[j]:vertex_offsets[j + 1]]
+    vertices         (顶点数, 2) float32  按图像宽高归一化的顶点坐标
+
+header.json 记录版本与各数组的类型和形状，最后写入，存在即表示存储完整。
+"""
+import json
+import os
+from array import array
+
+import numpy as np
+
+from .errors import ConversionError
+
+STORE_VERSION = 1
+HEADER_NAME = 'header.json'
+# 数组名 -> (dtype, 每行的列数，None 表示一维)
+ARRAYS = {
+    'image_sizes': ('int32', 2),
+    'name_offsets': ('int64', None),
+    'names': ('uint8', None),
+    'box_offsets': ('int64', None),
+    'box_classes': ('int32', None),
+    'boxes': ('float32', 4),
+    'polygon_offsets': ('int64', None),
+    'polygon_classes': ('int32', None),
+    'vertex_offsets': ('int64', None),
+    'vertices': ('float32', 2),
+}
+
+
+class StoreWriter:
+    """逐个添加图像的标注，最后一次写出全部数组
+
+    数值先追加到紧凑的 array 缓冲区中，不为每个框或顶点保留 Python 对象。
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.image_sizes = array('i')
+        self.names = bytearray()
+        self.name_offsets = array('q', [0])
+        self.box_offsets = array('q', [0])
+        self.box_classes = array('i')
+        self.boxes = array('d')
+        self.polygon_offsets = array('q', [0])
+        self.polygon_classes = array('i')
+        self.vertex_offsets = array('q', [0])
+        self.vertices = array('d')
+
+    def add(self, name, width, height, boxes, polygons):
+        """添加一张图像：boxes 为 [(类别, xmin, ymin, xmax, ymax), ...]，
+        polygons 为 [(类别, (M, 2) 顶点数组或 [[x, y], ...]), ...]，顶点已归一化"""
+        self.image_sizes.extend((int(width or 0), int(height or 0)))
+        self.names += name.encode('utf-8')
+        self.name_offsets.append(len(self.names))
+        for class_id, xmin, ymin, xmax, ymax in boxes:
+            self.box_classes.append(class_id)
+            self.boxes.extend((xmin, ymin, xmax, ymax))
+        self.box_offsets.append(len(self.box_classes))
+        for class_id, points in polygons:
+            self.polygon_classes.append(class_id)
+            self.vertices.frombytes(np.asarray(points, dtype=np.float64).reshape(-1, 2).tobytes())
+            self.vertex_offsets.append(len(self.vertices) // 2)
+        self.polygon_offsets.append(len(self.polygon_classes))
+
+    def close(self):
+        """写出全部数组，最后写入 header.json"""
+        os.makedirs(self.folder, exist_ok=True)
+        header_file = os.path.join(self.folder, HEADER_NAME)
+        if os.path.exists(header_file):
+            os.remove(header_file)  # 写入过程中中断时，不留下看似完整的旧存储
+        arrays = {}
+        for name, (dtype, columns) in ARRAYS.items():
+            buffer = self.names if name == 'names' else getattr(self, name)
+            data = np.frombuffer(buffer, dtype=np.uint8 if name == 'names' else buffer.typecode)
+            data = data.astype(dtype, copy=False)
+            if columns is not None:
+                data = data.reshape(-1, columns)
+            np.save(os.path.join(self.folder, name + '.npy'), data)
+            arrays[name] = {'dtype': dtype, 'shape': list(data.shape)}
+        header = {
+            'format': 'labelconverter-store',
+            'version': STORE_VERSION,
+            'num_images': len(self.name_offsets) - 1,
+            'num_boxes': len(self.box_classes),
+            'num_polygons': len(self.polygon_classes),
+            'num_vertices': len(self.vertices) // 2,
+            'boxes': 'xyxy, pixels',
+            'vertices': 'xy, normalized',
+            'arrays': arrays,
+        }
+        with open(header_file, 'w') as f:
+            json.dump(header, f, indent=4)
+
+
+class DatasetStore:
+    """以内存映射方式打开 StoreWriter 写出的存储，数组按需从磁盘分页读入，不做复制"""
+
+    def __init__(self, folder):
+        self.folder = folder
+        header_file = os.path.join(folder, HEADER_NAME)
+        if not os.path.isfile(header_file):
+            raise ConversionError(f"{folder} 不是完整的数据集存储（缺少 {HEADER_NAME}）")
+        with open(header_file, 'r') as f:
+            self.header = json.load(f)
+        if self.header.get('format') != 'labelconverter-store' or self.header.get('version') != STORE_VERSION:
+            raise ConversionError(f"不支持的数据集存储版本: {self.header.get('version')}")
+        for name in ARRAYS:
+            setattr(self, name, np.load(os.path.join(folder, name + '.npy'), mmap_mode='r'))
+
+    def __len__(self):
+        return self.header['num_images']
+
+    def name(self, i):
+        """第 i 张图像的名称（标注文件名去掉后缀）"""
+        return bytes(self.names[self.name_offsets[i]:self.name_offsets[i + 1]]).decode('utf-8')
+
+    def boxes_of(self, i):
+        """第 i 张图像的 (类别数组, 框数组)，均为存储的视图"""
+        start, end = self.box_offsets[i], self.box_offsets[i + 1]
+        return self.box_classes[start:end], self.boxes[start:end]
+
+    def polygons_of(self, i):
+        """第 i 张图像的 [(类别, 顶点数组), ...]，顶点数组为存储的视图"""
+        start, end = self.polygon_offsets[i], self.polygon_offsets[i + 1]
+        return [(int(self.polygon_classes[j]), self.vertices[self.vertex_offsets[j]:self.vertex_offsets[j + 1]])
+                for j in range(start, end)]
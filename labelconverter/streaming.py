@@ -0,0 +1,135 @@
+"""流式读取顶层 JSON 对象：逐个成员解码，可跳过体积很大的字段（如 imageData）而不构造它"""
+import json
+
+# 每次读取的字符数；解码较长的值时按缓冲区大小成倍增加，总读取量仍与文件大小成线性关系
+CHUNK_SIZE = 64 * 1024
+# 跳过字符串时每次读取的字符数，内存占用以此为上限
+SKIP_CHUNK_SIZE = 1024 * 1024
+_WHITESPACE = ' \t\n\r'
+# 数字中可能出现的字符；数字被截断时末尾最多剩下 2 个这样的字符（如 "1e-"）
+_NUMBER_CHARS = frozenset('0123456789.eE+-')
+_NUMBER_TAIL = 3
+_decoder = json.JSONDecoder()
+
+
+class _Reader:
+    def __init__(self, f):
+        self.f = f
+        self.buf = ''
+        self.pos = 0
+
+    def fill(self, size=CHUNK_SIZE):
+        """丢弃已处理的内容并读入更多数据，文件结束时返回 False"""
+        chunk = self.f.read(max(size, CHUNK_SIZE))
+        if not chunk:
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """跳过空白，返回下一个字符，文件结束时返回空字符串"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ''
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"JSON 格式错误：应为 {char!r}，实际为 {found!r}")
+        self.pos += 1
+
+    def value(self):
+        """解码下一个完整的 JSON 值"""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self.fill(len(self.buf)):
+                    raise
+                continue
+            # 数字可能在缓冲区末尾被截断（如 "1.5" 只读入了 "1."），读入更多后重新解码
+            if self.truncated_number(value, end) and self.fill():
+                continue
+            self.pos = end
+            return value
+
+    def truncated_number(self, value, end):
+        """value 为数字且其后直到缓冲区末尾只有数字字符时，数字可能没有读完"""
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return False
+        tail = self.buf[end:end + _NUMBER_TAIL]
+        return len(tail) < _NUMBER_TAIL and all(char in _NUMBER_CHARS for char in tail)
+
+    def skip_value(self):
+        """跳过下一个值；字符串只扫描到结束引号，不在内存中构造"""
+        if self.peek() != '"':
+            self.value()
+            return
+        self.pos += 1
+        while True:
+            quote = self.buf.find('"', self.pos)
+            end = quote if quote >= 0 else len(self.buf)
+            backslash = self.buf.find('\\', self.pos, end)
+            if backslash >= 0:
+                if backslash + 1 < len(self.buf):
+                    self.pos = backslash + 2  # 跳过转义字符
+                    continue
+                self.pos = backslash  # 转义符在缓冲区末尾，保留后继续读
+            elif quote >= 0:
+                self.pos = quote + 1
+                return
+            else:
+                self.pos = len(self.buf)  # 丢弃已扫描部分
+            if not self.fill(SKIP_CHUNK_SIZE):
+                raise ValueError("JSON 格式错误：字符串未结束")
+
+    def iter_array(self):
+        """逐个解码下一个 JSON 数组中的元素"""
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            separator = self.peek()
+            self.pos += 1
+            if separator == ']':
+                return
+            if separator != ',':
+                raise ValueError(f"JSON 格式错误：应为 ',' 或 ']'，实际为 {separator!r}")
+
+
+def iter_object_members(f, skip_keys=(), stream_keys=()):
+    """依次产出文本文件 f 中顶层 JSON 对象的 (键, 值)，skip_keys 中的键被跳过且不产出
+
+    stream_keys 中的键对应的值须为数组，产出的值是逐个解码其元素的迭代器，
+    须在继续迭代之前使用（未用完的元素会被跳过）。
+    """
+    reader = _Reader(f)
+    reader.expect('{')
+    if reader.peek() == '}':
+        return
+    while True:
+        key = reader.value()
+        reader.expect(':')
+        if key in skip_keys:
+            reader.skip_value()
+        elif key in stream_keys:
+            items = reader.iter_array()
+            yield key, items
+            for _ in items:  # 跳过调用方未读取的元素
+                pass
+        else:
+            yield key, reader.value()
+        separator = reader.peek()
+        if separator == '}':
+            return
+        if separator != ',':
+            raise ValueError(f"JSON 格式错误：应为 ',' 或 '}}'，实际为 {separator!r}")
+        reader.pos += 1
@@ -0,0 +1,54 @@
+"""VOC XML 写入：一次遍历直接生成带缩进的 XML 文本，不再经过 ElementTree 与 minidom"""
+from .archive import open_output
+from .instrument import timed
+
+INDENT = "   "
+# 图像通道数未知时写入的 depth
+DEFAULT_DEPTH = 3
+
+
+def escape(text):
+    """转义 XML 文本中的特殊字符（与 minidom 的输出一致）"""
+    return (str(text).replace("&", "&amp;").replace("<", "&lt;")
+            .replace("\"", "&quot;").replace(">", "&gt;"))
+
+
+def format_voc(objects, filename=None, size=None, depth=None):
+    """生成 VOC XML 文本
+
+    objects 为 (标签, xmin, ymin, xmax, ymax) 序列，坐标取整写入；
+    filename 与 size=(宽, 高) 已知时写入 filename 与 size 块，depth 为图像通道数，未知（None）时写 3。
+    输出与 ElementTree 序列化后再用 minidom.toprettyxml(indent="   ") 格式化的结果相同。
+    """
+    i1, i2, i3 = INDENT, INDENT * 2, INDENT * 3
+    lines = ['<?xml version="1.0" ?>', '<annotation>']
+    if filename is not None:
+        lines.append(f'{i1}<filename>{escape(filename)}</filename>')
+    if size is not None:
+        width, height = size
+        lines += [f'{i1}<size>',
+                  f'{i2}<width>{int(width)}</width>',
+                  f'{i2}<height>{int(height)}</height>',
+                  f'{i2}<depth>{int(depth or DEFAULT_DEPTH)}</depth>',
+                  f'{i1}</size>']
+    for label, xmin, ymin, xmax, ymax in objects:
+        lines += [f'{i1}<object>',
+                  f'{i2}<name>{escape(label)}</name>',
+                  f'{i2}<bndbox>',
+                  f'{i3}<xmin>{int(xmin)}</xmin>',
+                  f'{i3}<ymin>{int(ymin)}</ymin>',
+                  f'{i3}<xmax>{int(xmax)}</xmax>',
+                  f'{i3}<ymax>{int(ymax)}</ymax>',
+                  f'{i2}</bndbox>',
+                  f'{i1}</object>']
+    if len(lines) == 2:
+        return '<?xml version="1.0" ?>\n<annotation/>\n'
+    lines.append('</annotation>')
+    return '\n'.join(lines) + '\n'
+
+
+@timed('write_voc')
+def write_voc(xml_file, objects, filename=None, size=None, depth=None):
+    """将 VOC XML 写入 xml_file，参数见 format_voc"""
+    with open_output(xml_file) as f:
+        f.write(format_voc(objects, filename, size, depth))
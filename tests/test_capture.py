@@ -0,0 +1,90 @@
+"""流水线与输出分片收集大输出（嵌入图像的 JSON）时转存到临时文件"""
+import os
+import tempfile
+import unittest
+import zipfile
+from unittest import mock
+
+from PIL import Image
+
+from labelconverter import archive
+from labelconverter.engine import convert_files
+from labelconverter.errors import ConversionError
+from labelconverter.options import ConvertOptions, OutputArchiveOptions, PipelineOptions
+from labelconverter.pipeline import WriteBehind
+
+XML = ("<annotation><object><name>cat</name><bndbox><xmin>1</xmin><ymin>2</ymin><xmax>30</xmax>"
+       "<ymax>40</ymax></bndbox></object></annotation>")
+
+
+class SpilledOutputTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp = tempfile.TemporaryDirectory()
+        root = self.temp.name
+        self.source = os.path.join(root, 'xml')
+        self.images = os.path.join(root, 'images')
+        self.spill = os.path.join(root, 'spill')
+        for folder in (self.source, self.images, self.spill):
+            os.makedirs(folder)
+        for i in range(3):
+            with open(os.path.join(self.source, f'img{i}.xml'), 'w') as f:
+                f.write(XML)
+            Image.new('RGB', (64, 48), (i, 2 * i, 3 * i)).save(os.path.join(self.images, f'img{i}.png'))
+        self.expected = self.convert('direct')
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def convert(self, name, **options):
+        output = os.path.join(self.temp.name, name)
+        convert_files(self.source, "XML 转 JSON", self.images, output, ConvertOptions(**options))
+        return output
+
+    def convert_spilled(self, name, **options):
+        # 极小的阈值使每个 JSON 都转存到临时文件，临时文件夹替换为 self.spill 以检查是否清理干净
+        with mock.patch.object(archive, 'CAPTURE_SPILL_SIZE', 16), mock.patch.object(tempfile, 'tempdir', self.spill):
+            output = self.convert(name, **options)
+        self.assertEqual(os.listdir(self.spill), [])
+        return output
+
+    def read_expected(self, name):
+        with open(os.path.join(self.expected, name), 'rb') as f:
+            return f.read()
+
+    def test_pipeline(self):
+        output = self.convert_spilled('pipeline', pipeline=PipelineOptions())
+        for name in sorted(os.listdir(self.expected)):
+            with open(os.path.join(output, name), 'rb') as f:
+                self.assertEqual(f.read(), self.read_expected(name))
+
+    def test_output_archive(self):
+        output = self.convert_spilled('shards', output_archive=OutputArchiveOptions('zip'))
+        with zipfile.ZipFile(os.path.join(output, 'shard-00000.zip')) as shard:
+            self.assertEqual(sorted(shard.namelist()), sorted(os.listdir(self.expected)))
+            for name in shard.namelist():
+                self.assertEqual(shard.read(name), self.read_expected(name))
+
+    def test_write_behind_bounded_by_size(self):
+        writer = WriteBehind(max_size=10)
+        paths = [os.path.join(self.spill, f'out{i}.txt') for i in range(5)]
+        for i, path in enumerate(paths):
+            writer.add(i, [(path, 'x' * 8)])
+            self.assertLessEqual(writer.size, 10)
+        writer.close()
+        self.assertEqual([source for source, _ in writer.completed()], list(range(5)))
+        for path in paths:
+            with open(path) as f:
+                self.assertEqual(f.read(), 'x' * 8)
+
+    def test_write_behind_error_raised_once(self):
+        writer = WriteBehind()
+        writer.add(0, [(os.path.join(self.spill, 'missing', 'out.txt'), 'x')])
+        with self.assertRaises(ConversionError):
+            writer.close()
+        writer.close()
+        self.assertEqual(list(writer.completed()), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
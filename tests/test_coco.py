@@ -0,0 +1,126 @@
+"""COCO 读写：经 COCO 中转的转换结果与直接转换相同，file_name 中的子文件夹得到保留"""
+import json
+import os
+import tempfile
+import unittest
+
+from labelconverter.coco import COCO_FILE_NAME, read_coco
+from labelconverter.engine import COCO_FORMAT, convert_files
+from labelconverter.errors import ConversionError
+from labelconverter.options import ConvertOptions
+
+
+def labelme(shapes):
+    return {"version": "5.0.1", "flags": {}, "shapes": shapes, "imagePath": "img.jpg", "imageData": None,
+            "imageHeight": 80, "imageWidth": 100}
+
+
+def shape(label, shape_type, points):
+    return {"label": label, "points": points, "group_id": None, "shape_type": shape_type, "flags": {}}
+
+
+class CocoRoundTripTest(unittest.TestCase):
+    """COCO 中每个标注都有 bbox 与多边形，只用对应目标格式所用的形状类型比较"""
+
+    SHAPES = {
+        'polygon': [[[10.5, 20], [60, 22.75], [40.125, 70]], [[1, 1], [99, 1], [99, 79], [1.5, 79]]],
+        'rectangle': [[[5, 6], [50, 44]], [[20, 30], [90, 75]]],
+    }
+
+    def setUp(self):
+        self.temp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def write_sources(self, shape_type):
+        # 两个子文件夹中有同名的标注与图像
+        source = os.path.join(self.temp.name, shape_type)
+        for folder, offset in (('a', 0), ('b', 3)):
+            os.makedirs(os.path.join(source, folder))
+            shapes = [shape(label, shape_type, [[x + offset, y] for x, y in points])
+                      for label, points in zip(('cat', 'dog'), self.SHAPES[shape_type])]
+            with open(os.path.join(source, folder, 'img.json'), 'w') as f:
+                json.dump(labelme(shapes), f)
+        return source
+
+    def convert(self, source, format_choice, name, **options):
+        output = os.path.join(self.temp.name, name)
+        convert_files(source, format_choice, '', output, ConvertOptions(**options))
+        return output
+
+    def read_outputs(self, folder):
+        files = {}
+        for root, _, names in os.walk(folder):
+            for name in names:
+                with open(os.path.join(root, name)) as f:
+                    files[os.path.relpath(os.path.join(root, name), folder)] = f.read()
+        return files
+
+    def check_round_trip(self, shape_type, format_choice):
+        source = self.write_sources(shape_type)
+        mapping = {'cat': '0', 'dog': '1'}
+        coco = self.convert(source, COCO_FORMAT, 'coco', label_mapping=mapping, source_format='json',
+                            recursive=True)
+        coco_file = os.path.join(coco, COCO_FILE_NAME)
+        with open(coco_file) as f:
+            self.assertEqual([image['file_name'] for image in json.load(f)['images']], ['a/img.jpg', 'b/img.jpg'])
+        direct = self.convert(source, format_choice, 'direct', label_mapping=mapping, source_format='json',
+                              recursive=True)
+        via_coco = self.convert(coco_file, format_choice, 'via_coco', source_format='coco')
+        expected = self.read_outputs(direct)
+        self.assertEqual(sorted(expected), [os.path.join('a', 'img.txt'), os.path.join('b', 'img.txt')])
+        self.assertEqual(self.read_outputs(via_coco), expected)
+
+    def test_segmentation(self):
+        self.check_round_trip('polygon', "YOLO分割")
+
+    def test_detection(self):
+        self.check_round_trip('rectangle', "YOLO检测")
+
+
+class ReadCocoTest(unittest.TestCase):
+
+    IMAGES = [{"id": 1, "file_name": "x/1.jpg", "width": 10, "height": 10},
+              {"id": 2, "file_name": "y/1.jpg", "width": 10, "height": 10}]
+    ANNOTATIONS = [{"id": 1, "image_id": 2, "category_id": 3, "bbox": [1, 2, 3, 4]},
+                   {"id": 2, "image_id": 1, "category_id": 4, "bbox": [0, 0, 1, 1]},
+                   {"id": 3, "image_id": 2, "category_id": 4, "bbox": [2, 2, 1, 1]},
+                   {"id": 4, "image_id": 9, "category_id": 4, "bbox": [2, 2, 1, 1]}]
+    CATEGORIES = [{"id": 3, "name": "cat"}, {"id": 4, "name": "dog"}]
+
+    def setUp(self):
+        self.temp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp.name, 'coco.json')
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def read(self, members, **kwargs):
+        with open(self.path, 'w') as f:
+            json.dump(dict(members), f)
+        return [(os.path.relpath(annotation.path, self.temp.name), [shape.label for shape in annotation.shapes])
+                for annotation in read_coco(self.path, **kwargs)]
+
+    def test_member_order(self):
+        members = {'images': self.IMAGES, 'annotations': self.ANNOTATIONS, 'categories': self.CATEGORIES}
+        expected = [(os.path.join('x', '1.jpg'), ['dog']), (os.path.join('y', '1.jpg'), ['cat', 'dog'])]
+        for order in (('images', 'annotations', 'categories'), ('categories', 'images', 'annotations'),
+                      ('annotations', 'categories', 'images'), ('annotations', 'images', 'categories')):
+            with self.subTest(order=order):
+                self.assertEqual(self.read((key, members[key]) for key in order), expected)
+
+    def test_select(self):
+        members = [('images', self.IMAGES), ('annotations', self.ANNOTATIONS), ('categories', self.CATEGORIES)]
+        selected = self.read(members, select=lambda path: path.endswith(os.path.join('y', '1.jpg')))
+        self.assertEqual(selected, [(os.path.join('y', '1.jpg'), ['cat', 'dog'])])
+
+    def test_invalid_file_names(self):
+        for file_names in (['x/1.jpg', 'x/./1.jpg'], ['../1.jpg'], ['/tmp/1.jpg']):
+            images = [{"id": i, "file_name": name} for i, name in enumerate(file_names)]
+            with self.subTest(file_names=file_names), self.assertRaises(ConversionError):
+                self.read([('images', images), ('annotations', []), ('categories', [])])
+
+
+if __name__ == '__main__':
+    unittest.main()
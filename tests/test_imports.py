@@ -0,0 +1,26 @@
+"""import labelconverter 与命令行入口不加载 NumPy，NumPy 只在转换或统计用到时导入"""
+import subprocess
+import sys
+import unittest
+
+CHECK = """
+import sys
+import labelconverter, labelconverter.cli
+print(sorted(name for name in ('numpy', 'labelconverter.geometry', 'labelconverter.store') if name in sys.modules))
+"""
+
+
+class LazyImportTest(unittest.TestCase):
+
+    def test_numpy_not_imported(self):
+        output = subprocess.run([sys.executable, '-c', CHECK], capture_output=True, text=True, check=True).stdout
+        self.assertEqual(output.strip(), '[]')
+
+    def test_dataset_store_export(self):
+        import labelconverter
+        from labelconverter.store import DatasetStore
+        self.assertIs(labelconverter.DatasetStore, DatasetStore)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+"""读取 YOLO 数据集配置（.yaml）中的类别列表作为标签映射"""
+import os
+import tempfile
+import unittest
+
+from labelconverter.errors import ConversionError
+from labelconverter.labelmap import load_mapping, save_mapping
+
+
+class YamlMappingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp.name, 'data.yaml')
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def load(self, text):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return load_mapping(self.path)
+
+    def test_block_list(self):
+        mapping = self.load("path: ../data\nnames:\n  - cat\n  - 'dog, small'  # 注释\n  - \"bird\"\nnc: 3\n")
+        self.assertEqual(mapping, {'cat': '0', 'dog, small': '1', 'bird': '2'})
+
+    def test_flow_list(self):
+        mapping = self.load("nc: 3\nnames: [cat, 'dog, small', \"a: b\"]\n")
+        self.assertEqual(mapping, {'cat': '0', 'dog, small': '1', 'a: b': '2'})
+
+    def test_id_to_name(self):
+        mapping = self.load("names:\n  1: dog\n  0: cat\n  2: 'bird, large'\n")
+        self.assertEqual(mapping, {'cat': '0', 'dog': '1', 'bird, large': '2'})
+
+    def test_flow_id_to_name(self):
+        self.assertEqual(self.load("names: {0: a, 1: b}\n"), {'a': '0', 'b': '1'})
+
+    def test_round_trip(self):
+        mapping = {'cat': '0', 'dog, small': '1', '猫': '2'}
+        save_mapping(mapping, self.path)
+        self.assertEqual(load_mapping(self.path), mapping)
+
+    def test_invalid(self):
+        for text in ("nc: 2\n", "names: [a, b\n", "names: cat\n"):
+            with self.subTest(text=text), self.assertRaises(ConversionError):
+                self.load(text)
+
+
+if __name__ == '__main__':
+    unittest.main()
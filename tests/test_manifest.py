@@ -0,0 +1,142 @@
+"""增量转换：未变化的文件被跳过，修改或删除的文件重新处理，转换设置变化时清单失效"""
+import os
+import tempfile
+import unittest
+
+from PIL import Image
+
+from labelconverter.engine import convert_files
+from labelconverter.manifest import Manifest
+from labelconverter.options import ConvertOptions, IncrementalOptions
+
+XML = ("<annotation><size><width>100</width><height>80</height><depth>3</depth></size>"
+       "<object><name>{}</name><bndbox><xmin>1</xmin><ymin>2</ymin><xmax>30</xmax>"
+       "<ymax>40</ymax></bndbox></object></annotation>")
+
+
+class IncrementalConversionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.temp.name, 'xml')
+        self.output = os.path.join(self.temp.name, 'out')
+        self.images = os.path.join(self.temp.name, 'images')
+        self.manifest = os.path.join(self.temp.name, 'manifest.sqlite3')
+        os.makedirs(self.source)
+        os.makedirs(self.images)
+        for i in range(3):
+            self.write_source(f'img{i}.xml', 'cat')
+            Image.new('RGB', (100, 80)).save(os.path.join(self.images, f'img{i}.png'))
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def write_source(self, name, label, mtime_ns=None):
+        path = os.path.join(self.source, name)
+        with open(path, 'w') as f:
+            f.write(XML.format(label))
+        if mtime_ns is not None:
+            os.utime(path, ns=(mtime_ns, mtime_ns))
+        return path
+
+    def convert(self, format_choice="YOLO检测", label_mapping=None, precision=None, hash_sources=False,
+                delete_orphans=False):
+        options = ConvertOptions(label_mapping=label_mapping or {'cat': '0', 'dog': '1'}, source_format='xml',
+                                 precision=precision,
+                                 incremental=IncrementalOptions(self.manifest, hash_sources, delete_orphans))
+        return convert_files(self.source, format_choice, self.images, self.output, options)
+
+    def read_output(self, name):
+        with open(os.path.join(self.output, name)) as f:
+            return f.read()
+
+    def test_unchanged_files_are_skipped(self):
+        self.assertEqual(self.convert(), 3)
+        self.assertEqual(self.convert(), 0)
+
+    def test_modified_file_is_reprocessed(self):
+        self.convert()
+        stat = os.stat(os.path.join(self.source, 'img1.xml'))
+        self.write_source('img1.xml', 'dog', stat.st_mtime_ns + 10 ** 9)
+        self.assertEqual(self.convert(), 1)
+        self.assertTrue(self.read_output('img1.txt').startswith('1 '))
+        self.assertTrue(self.read_output('img0.txt').startswith('0 '))
+
+    def test_removed_output_is_reprocessed(self):
+        self.convert()
+        os.remove(os.path.join(self.output, 'img2.txt'))
+        self.assertEqual(self.convert(), 1)
+        self.assertTrue(os.path.isfile(os.path.join(self.output, 'img2.txt')))
+
+    def test_removed_source_deletes_orphan_output(self):
+        self.convert(delete_orphans=True)
+        os.remove(os.path.join(self.source, 'img0.xml'))
+        self.assertEqual(self.convert(delete_orphans=True), 0)
+        self.assertEqual(sorted(os.listdir(self.output)), ['img1.txt', 'img2.txt'])
+
+    def test_touched_file_with_same_content(self):
+        self.convert(hash_sources=True)
+        stat = os.stat(os.path.join(self.source, 'img0.xml'))
+        self.write_source('img0.xml', 'cat', stat.st_mtime_ns + 10 ** 9)
+        self.assertEqual(self.convert(hash_sources=True), 0)
+        self.write_source('img0.xml', 'dog', stat.st_mtime_ns + 2 * 10 ** 9)
+        self.assertEqual(self.convert(hash_sources=True), 1)
+
+    def test_changed_mapping_invalidates_manifest(self):
+        self.convert()
+        self.assertEqual(self.convert(label_mapping={'cat': '5'}), 3)
+        self.assertTrue(self.read_output('img0.txt').startswith('5 '))
+        self.assertEqual(self.convert(label_mapping={'cat': '5'}), 0)
+
+    def test_changed_precision_invalidates_manifest(self):
+        self.convert()
+        self.assertEqual(self.convert(precision=2), 3)
+        self.assertEqual(self.convert(precision=2), 0)
+
+    def test_changed_format_invalidates_manifest(self):
+        self.convert()
+        self.assertEqual(self.convert("XML 转 JSON"), 3)
+        self.assertTrue(os.path.isfile(os.path.join(self.output, 'img0.json')))
+        self.assertEqual(self.convert("XML 转 JSON"), 0)
+        self.assertEqual(self.convert(), 3)
+
+
+class ManifestTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp.name, 'manifest.sqlite3')
+        self.source = os.path.join(self.temp.name, 'a.xml')
+        self.output = os.path.join(self.temp.name, 'a.txt')
+        for path in (self.source, self.output):
+            with open(path, 'w') as f:
+                f.write('x')
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def record(self, settings):
+        manifest = Manifest(self.path, settings)
+        self.assertTrue(manifest.needs_conversion(self.source, self.output))
+        manifest.record(self.source)
+        manifest.close()
+
+    def needs_conversion(self, settings):
+        manifest = Manifest(self.path, settings)
+        try:
+            return manifest.needs_conversion(self.source, self.output)
+        finally:
+            manifest.close()
+
+    def test_records_persist(self):
+        self.record({'precision': 3})
+        self.assertFalse(self.needs_conversion({'precision': 3}))
+
+    def test_changed_settings_clear_records(self):
+        self.record({'precision': 3})
+        self.assertTrue(self.needs_conversion({'precision': 4}))
+        self.assertTrue(self.needs_conversion({'precision': 3}))
+
+
+if __name__ == '__main__':
+    unittest.main()
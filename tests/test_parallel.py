@@ -0,0 +1,28 @@
+"""run_tasks_paired：结果与任务按顺序配对，tasks 可以是生成器"""
+import unittest
+
+from labelconverter.parallel import run_tasks_paired
+
+
+def _square(context, task):
+    return task * task + context
+
+
+class RunTasksPairedTest(unittest.TestCase):
+
+    def check(self, tasks, workers):
+        pairs = list(run_tasks_paired(_square, tasks, 1, workers, chunksize=3))
+        self.assertEqual(pairs, [(task, task * task + 1) for task in range(20)])
+
+    def test_list(self):
+        self.check(list(range(20)), 1)
+
+    def test_generator(self):
+        self.check((task for task in range(20)), 1)
+
+    def test_generator_with_workers(self):
+        self.check((task for task in range(20)), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+"""多机分片转换：N 个分片的输出与合并后的报告应与单次转换相同"""
+import os
+import tempfile
+import unittest
+
+from labelconverter.engine import convert_files
+from labelconverter.errors import ConversionError
+from labelconverter.options import ConvertOptions, ShardOptions
+from labelconverter.sharding import find_shard_reports, load_shard_report, merge_reports
+
+XML = ("<annotation><size><width>100</width><height>80</height><depth>3</depth></size>"
+       "<object><name>{}</name><bndbox><xmin>{}</xmin><ymin>2</ymin><xmax>30</xmax>"
+       "<ymax>40</ymax></bndbox></object></annotation>")
+LABELS = ('cat', 'dog', 'bird')
+
+
+def read_tree(folder):
+    """文件夹中除分片报告外全部文件的 相对路径 -> 内容"""
+    files = {}
+    for root, _, names in os.walk(folder):
+        for name in names:
+            if name.startswith('shard-report-'):
+                continue
+            path = os.path.join(root, name)
+            with open(path, 'rb') as f:
+                files[os.path.relpath(path, folder)] = f.read()
+    return files
+
+
+class ShardedConversionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.temp.name, 'xml')
+        for i in range(24):
+            folder = os.path.join(self.source, f'part{i % 3}')
+            os.makedirs(folder, exist_ok=True)
+            with open(os.path.join(folder, f'img{i}.xml'), 'w') as f:
+                f.write(XML.format(LABELS[i % len(LABELS)], i + 1))
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def convert(self, output, shard=None):
+        options = ConvertOptions(label_mapping={'cat': '0', 'dog': '1', 'bird': '2'}, source_format='xml',
+                                 recursive=True, shard=shard)
+        return convert_files(self.source, "YOLO检测", '', output, options)
+
+    def test_shards_match_single_run(self):
+        single = os.path.join(self.temp.name, 'single')
+        self.assertEqual(self.convert(single), 24)
+        sharded = os.path.join(self.temp.name, 'sharded')
+        for index in range(3):
+            self.convert(sharded, ShardOptions(index, 3))
+        self.assertEqual(read_tree(sharded), read_tree(single))
+
+        reports = [load_shard_report(path) for path in find_shard_reports([sharded])]
+        self.assertEqual(len(reports), 3)
+        merged = merge_reports(reports)
+        self.assertEqual(merged['converted'], 24)
+        self.assertEqual(merged['label_mapping'], {'bird': '2', 'cat': '0', 'dog': '1'})
+        self.assertEqual(merged['diagnostics']['errors'], 0)
+
+    def test_missing_shard(self):
+        output = os.path.join(self.temp.name, 'sharded')
+        self.convert(output, ShardOptions(0, 2))
+        reports = [load_shard_report(path) for path in find_shard_reports([output])]
+        with self.assertRaises(ConversionError) as raised:
+            merge_reports(reports)
+        self.assertIn("缺少分片 1", str(raised.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
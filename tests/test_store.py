@@ -0,0 +1,59 @@
+"""YOLO 标注转为数据集存储时的类别编号检查"""
+import os
+import tempfile
+import unittest
+
+from labelconverter.engine import STORE_FORMAT, convert_files
+from labelconverter.errors import ConversionError, NonNumericLabelError
+from labelconverter.options import ConvertOptions
+from labelconverter.store import DatasetStore
+
+
+class YoloToStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.temp.name, 'labels')
+        self.output = os.path.join(self.temp.name, 'store')
+        os.makedirs(self.source)
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def write_labels(self, *lines):
+        with open(os.path.join(self.source, 'img0.txt'), 'w') as f:
+            f.write(''.join(line + '\n' for line in lines))
+
+    def convert(self, label_mapping=None):
+        return convert_files(self.source, STORE_FORMAT, '', self.output,
+                             ConvertOptions(label_mapping=label_mapping, source_format='yolo'))
+
+    def test_integer_class_ids(self):
+        self.write_labels("0 0.5 0.5 0.2 0.2", "3 0.4 0.4 0.1 0.1")
+        self.assertEqual(self.convert(), 1)
+        classes, _ = DatasetStore(self.output).boxes_of(0)
+        self.assertEqual(classes.tolist(), [0, 3])
+
+    def test_non_numeric_label(self):
+        self.write_labels("cat 0.5 0.5 0.2 0.2")
+        with self.assertRaises(NonNumericLabelError) as raised:
+            self.convert()
+        self.assertEqual(raised.exception.labels, ['cat'])
+
+    def test_mapped_label(self):
+        self.write_labels("cat 0.5 0.5 0.2 0.2")
+        self.convert({'cat': '7'})
+        classes, _ = DatasetStore(self.output).boxes_of(0)
+        self.assertEqual(classes.tolist(), [7])
+
+    def test_fractional_label_is_not_truncated(self):
+        self.write_labels("1.5 0.5 0.5 0.2 0.2")
+        with self.assertRaises(ConversionError) as raised:
+            self.convert()
+        self.assertNotIsInstance(raised.exception, NonNumericLabelError)
+        self.assertIn("1.5", str(raised.exception))
+        self.assertFalse(os.path.exists(os.path.join(self.output, 'header.json')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+"""流式读取 JSON：值（特别是数字）跨越读取缓冲区边界时应与一次性解析的结果相同"""
+import io
+import json
+import unittest
+
+from labelconverter.streaming import CHUNK_SIZE, iter_object_members
+
+DOCUMENT = {
+    'version': '5.0.1',
+    'imageData': 'x' * 40,
+    'shapes': [
+        {'label': 'cat', 'points': [[1.5, 22.25], [-3.125e-05, 4e+20]], 'group_id': None},
+        {'label': 'dog', 'points': [[0, 10], [123456789.5, -0.5]], 'flags': {'a': True}},
+    ],
+    'imageHeight': 480,
+    'imageWidth': 640.75,
+}
+
+
+class ChunkedFile:
+    """每次最多读出 chunk_size 个字符的文本文件"""
+
+    def __init__(self, text, chunk_size):
+        self.f = io.StringIO(text)
+        self.chunk_size = chunk_size
+
+    def read(self, size=-1):
+        return self.f.read(self.chunk_size if size < 0 else min(size, self.chunk_size))
+
+
+def read_members(text, chunk_size=None):
+    f = io.StringIO(text) if chunk_size is None else ChunkedFile(text, chunk_size)
+    members = {}
+    for key, value in iter_object_members(f, skip_keys=('imageData',), stream_keys=('shapes',)):
+        members[key] = list(value) if key == 'shapes' else value
+    return members
+
+
+class StreamingReaderTest(unittest.TestCase):
+
+    def expected(self):
+        return {key: value for key, value in DOCUMENT.items() if key != 'imageData'}
+
+    def test_tiny_chunks(self):
+        for separators in ((', ', ': '), (',', ':')):
+            text = json.dumps(DOCUMENT, separators=separators)
+            for chunk_size in range(1, 12):
+                with self.subTest(separators=separators, chunk_size=chunk_size):
+                    self.assertEqual(read_members(text, chunk_size), self.expected())
+
+    def test_number_split_at_every_position(self):
+        # 让第一个读取块恰好在数字中的每个位置结束
+        for number in ('1.5', '-3.125e-05', '4E+20', '123456789.5', '0', '-0.5'):
+            prefix = '{"pad": "' + 'p' * 20 + '", "value": '
+            text = prefix + number + '}'
+            for cut in range(len(prefix), len(text)):
+                with self.subTest(number=number, cut=cut):
+                    self.assertEqual(read_members(text, cut)['value'], json.loads(number))
+
+    def test_number_across_chunk_boundary(self):
+        # 按实际的读取块大小，让数字跨越第一个读取块的末尾
+        for number in ('1.5', '-3.125e-05', '4E+20'):
+            for offset in range(1, len(number)):
+                prefix = '{"imageData": "'
+                pad = 'x' * (CHUNK_SIZE - len(prefix) - len('", "value": ') - offset)
+                text = prefix + pad + '", "value": ' + number + '}'
+                with self.subTest(number=number, offset=offset):
+                    self.assertEqual(read_members(text)['value'], json.loads(number))
+
+    def test_truncated_document(self):
+        with self.assertRaises(ValueError):
+            read_members('{"value": 1.', 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
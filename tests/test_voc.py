@@ -0,0 +1,57 @@
+"""VOC XML 的 depth 取自图像文件头中的通道数，尺寸缓存中同时记录通道数"""
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from PIL import Image
+
+from labelconverter.engine import convert_files
+from labelconverter.imagesize import ImageSizeCache, get_image_info
+from labelconverter.options import ConvertOptions
+
+
+class VocDepthTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.temp.name, 'labels')
+        self.images = os.path.join(self.temp.name, 'images')
+        os.makedirs(self.source)
+        os.makedirs(self.images)
+        for name, mode, suffix in (('gray', 'L', '.jpg'), ('rgb', 'RGB', '.jpg'), ('rgba', 'RGBA', '.png')):
+            Image.new(mode, (64, 48)).save(os.path.join(self.images, name + suffix))
+            with open(os.path.join(self.source, name + '.txt'), 'w') as f:
+                f.write("0 0.5 0.5 0.25 0.25\n")
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def test_depth_from_image_header(self):
+        output = os.path.join(self.temp.name, 'xml')
+        cache = os.path.join(self.temp.name, 'sizes.sqlite3')
+        for _ in range(2):  # 第二次转换时尺寸与通道数来自缓存
+            convert_files(self.source, "YOLO 转 XML", self.images, output,
+                          ConvertOptions(source_format='yolo', size_cache=cache))
+            for name, depth in (('gray', 1), ('rgb', 3), ('rgba', 4)):
+                with open(os.path.join(output, name + '.xml')) as f:
+                    self.assertIn(f"<depth>{depth}</depth>", f.read())
+
+    def test_cache_without_depth_column(self):
+        path = os.path.join(self.temp.name, 'old.sqlite3')
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE image_sizes (path TEXT PRIMARY KEY, "
+                     "size INTEGER, mtime_ns INTEGER, width INTEGER, height INTEGER)")
+        conn.commit()
+        conn.close()
+        image = os.path.join(self.images, 'gray.jpg')
+        cache = ImageSizeCache(path)
+        try:
+            self.assertEqual(get_image_info(image, cache), (64, 48, 1))
+            self.assertEqual(cache.get(image, os.stat(image)), (64, 48, 1))
+        finally:
+            cache.close()
+
+
+if __name__ == '__main__':
+    unittest.main()